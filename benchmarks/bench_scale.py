@@ -0,0 +1,211 @@
+"""
+Benchmark d'échelle : temps de chaque étape de la recommandation sur des
+catalogues et grilles météo synthétiques (cf. synthetic.py), de la taille
+actuelle (1.7k itinéraires, ~200 grilles) à 1000× plus.
+
+Étapes mesurées (secondes, meilleur de --repeat sauf load_data) :
+    load_data          lecture + normalisation + précalculs (data_loading.load_data)
+    route_grid_lookup  k grilles voisines de chaque itinéraire
+    route_meteo        météo du jour de tout le catalogue
+    features_7d        features physiques 7 jours de tout le catalogue
+    score_routes       scoring vectorisé (successeur de scoring_v3)
+    top_n              filtres + sélection du top N
+    model_numpy        score neige (snow_quality.hybrid_scores, évaluateur NumPy)
+    model_lightgbm     predict lightgbm.Booster sur les mêmes lignes (si installé)
+    scoring_v3         référence ligne à ligne, sur un échantillon
+    features_7d_ref    référence get_physical_features, sur un échantillon
+Les étapes échantillonnées (et le modèle au-delà de --model-rows) sont
+aussi extrapolées à tout le catalogue (clé "extrapolated_s").
+
+    python benchmarks/bench_scale.py --json bench-scale.json
+    python benchmarks/bench_scale.py --routes 1000,100000,1000000 --grids 0.3,0.1,0.05
+    python benchmarks/compare.py ancien.json bench-scale.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from data_loading import load_data
+from model_registry import MODEL_SPECS, ModelRegistry
+from reference import get_physical_features, scoring_v3
+from scoring import score_routes, select_top_n
+from snow_quality import feature_frame, hybrid_scores
+from synthetic import EXTENTS, START, write_dataset
+
+TARGET_DATE = (START + timedelta(days=7)).date()  # Fenêtre 7 jours complète
+QUERY = {"niveau": "S3", "dplus_min": 800, "dplus_max": 1500}
+TOP_N = 20
+
+
+def best_of(fn, repeat):
+    """(résultat, meilleure durée en s) sur `repeat` appels"""
+    best, result = np.inf, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_case(workdir, n_routes, resolution, args):
+    """Génère un jeu de données puis mesure chaque étape"""
+    paths = write_dataset(workdir, n_routes, resolution, args.days, EXTENTS[args.extent], args.seed)
+
+    # Version unique : load_data ne relit jamais un précalcul persisté
+    version = f"bench-{n_routes}-{resolution}-{time.time_ns()}"
+    t0 = time.perf_counter()
+    (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+     route_grids, route_risk, route_risk_level, outlook) = load_data(paths, version)
+    stages = {"load_data": time.perf_counter() - t0}
+    extrapolated = {}
+
+    route_grids, stages["route_grid_lookup"] = best_of(
+        lambda: cube.nearest_grids(catalogue.lat, catalogue.lon, k=5), args.repeat
+    )
+    meteo, stages["route_meteo"] = best_of(
+        lambda: cube.route_meteo(*route_grids, TARGET_DATE), args.repeat
+    )
+    (features, available), stages["features_7d"] = best_of(
+        lambda: cube.route_physical_features(*route_grids, TARGET_DATE), args.repeat
+    )
+    scores, stages["score_routes"] = best_of(
+        lambda: score_routes(catalogue, meteo, route_risk, **QUERY), args.repeat
+    )
+    _, stages["top_n"] = best_of(
+        lambda: select_top_n(scores, catalogue.filter(
+            dplus_min=QUERY["dplus_min"], dplus_max=QUERY["dplus_max"]
+        ), TOP_N),
+        args.repeat,
+    )
+
+    # --- Modèle : au plus --model-rows lignes, extrapolé au catalogue ---
+    rows = np.flatnonzero(available)[:args.model_rows]
+    batch = {k: v[rows] for k, v in features.items()}
+    batch.update(
+        summit_altitude_clean=np.full(len(rows), 2500.0),
+        topo_denivele=catalogue.dplus[rows],
+        topo_difficulty=np.full(len(rows), 3),
+        massif=catalogue.frame["massif"].to_numpy(dtype=object)[rows],
+    )
+    # Chemins absolus : le benchmark tourne dans un dossier temporaire
+    models = ModelRegistry({
+        name: spec._replace(path=str(ROOT / spec.path)) for name, spec in MODEL_SPECS.items()
+    })
+    if models.get("physical") is None:  # Chargement hors mesure
+        raise SystemExit(f"❌ Modèle absent : {MODEL_SPECS['physical'].path}")
+    _, stages["model_numpy"] = best_of(
+        lambda: hybrid_scores(models, batch, TARGET_DATE), args.repeat
+    )
+    scale = catalogue.n / max(len(rows), 1)
+    extrapolated["model_numpy"] = stages["model_numpy"] * scale
+    try:
+        import lightgbm as lgb
+
+        booster = lgb.Booster(model_file=str(ROOT / MODEL_SPECS["physical"].path))
+        frame = feature_frame(batch, TARGET_DATE)[booster.feature_name()]
+        _, stages["model_lightgbm"] = best_of(lambda: booster.predict(frame), args.repeat)
+        extrapolated["model_lightgbm"] = stages["model_lightgbm"] * scale
+    except ImportError:
+        pass
+
+    # --- Références ligne à ligne : échantillon, extrapolé ---
+    sample = np.random.default_rng(args.seed).choice(
+        catalogue.n, min(args.reference_sample, catalogue.n), replace=False
+    )
+    frame = catalogue.frame
+    grid_lookup = unique_grids.reset_index(drop=True)
+    t0 = time.perf_counter()
+    for i in sample:
+        scoring_v3(frame.iloc[i], QUERY["niveau"], QUERY["dplus_min"], QUERY["dplus_max"],
+                   TARGET_DATE, dict_bera, df_meteo, grid_lookup)
+    stages["scoring_v3"] = time.perf_counter() - t0
+    extrapolated["scoring_v3"] = stages["scoring_v3"] * catalogue.n / len(sample)
+
+    t0 = time.perf_counter()
+    for i in sample:
+        get_physical_features(df_meteo, grid_lookup, catalogue.lat[i], catalogue.lon[i], TARGET_DATE)
+    stages["features_7d_ref"] = time.perf_counter() - t0
+    extrapolated["features_7d_ref"] = stages["features_7d_ref"] * catalogue.n / len(sample)
+
+    return {
+        "routes": int(catalogue.n),
+        "resolution": resolution,
+        "n_grid": int(cube.n_grid),
+        "hourly_rows": int(len(df_meteo)),
+        "model_rows": int(len(rows)),
+        "reference_sample": int(len(sample)),
+        "stages_s": stages,
+        "extrapolated_s": extrapolated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark d'échelle (données synthétiques)")
+    parser.add_argument("--routes", default="1000,10000,100000",
+                        help="Tailles de catalogue, ex. 1000,100000,1000000")
+    parser.add_argument("--grids", default="0.3,0.1",
+                        help="Pas des grilles météo en degrés, ex. 0.3,0.1,0.05")
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--extent", choices=sorted(EXTENTS), default="alpes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model-rows", type=int, default=20_000)
+    parser.add_argument("--reference-sample", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "args": vars(args),
+        "cases": [],
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_scale_") as tmp:
+        os.chdir(tmp)  # data/.derived écrit par load_data reste dans le dossier temporaire
+        try:
+            for resolution in (float(g) for g in args.grids.split(",")):
+                for n_routes in (int(r) for r in args.routes.split(",")):
+                    case = run_case(Path(tmp), n_routes, resolution, args)
+                    results["cases"].append(case)
+                    print(f"📏 {case['routes']:>8} itinéraires · grille {resolution}° "
+                          f"({case['n_grid']} points, {case['hourly_rows']} lignes)")
+                    for stage, seconds in case["stages_s"].items():
+                        extra = case["extrapolated_s"].get(stage)
+                        note = f"  (≈ {extra:.1f} s pour tout le catalogue)" if extra is not None else ""
+                        print(f"   {stage:<18} {seconds * 1000:10.1f} ms{note}")
+        finally:
+            os.chdir(cwd)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
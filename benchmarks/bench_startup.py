@@ -0,0 +1,92 @@
+"""
+Benchmark du démarrage : chargement du modèle et chargement des données,
+mesurés séparément, chacun dans un processus neuf (caches froids côté
+Python ; le cache disque de l'OS reste chaud après le premier passage).
+
+    python scripts/build_models.py      # forme compilée à jour
+    python benchmarks/bench_startup.py --json startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+from data_loading import DERIVED_TAG
+
+PRELUDE = (
+    "import sys, time; sys.path.insert(0, {src!r}); "
+    "import numpy, pandas; t0 = time.perf_counter(); "
+)
+
+# Chaque étape affiche sa durée (s) hors démarrage de l'interpréteur
+STAGES = {
+    "model_lightgbm": (
+        "import lightgbm as lgb; lgb.Booster(model_file={model!r})"
+    ),
+    "model_text": (
+        "from tree_model import TreeEnsemble; TreeEnsemble.from_lightgbm_text({model!r})"
+    ),
+    "model_compiled": (
+        "from tree_model import TreeEnsemble, compiled_path; "
+        "TreeEnsemble.load(compiled_path({model!r}))"
+    ),
+    "data_raw": (
+        "import pandas as pd; from snapshots import resolve_data; "
+        "from catalogue import RouteCatalogue; from weather import WeatherCube; "
+        "paths = resolve_data().paths; pd.read_csv(paths['bera']); "
+        "df = pd.read_csv(paths['routes']); "
+        "df = df.assign(**{{c: pd.to_numeric(df[c], errors='coerce') for c in ['lat', 'lon', 'denivele_positif']}})"
+        ".dropna(subset=['lat', 'lon', 'denivele_positif']); "
+        "df['massif'] = df['massif'].astype(str).str.strip().str.upper(); "
+        "catalogue = RouteCatalogue(df); cube = WeatherCube(pd.read_parquet(paths['meteo'])); "
+        "cube.nearest_grids(catalogue.lat, catalogue.lon, k=5)"
+    ),
+    "data_derived": (
+        "from data_version import load_derived; from snapshots import resolve_data; "
+        "assert load_derived(resolve_data().version, {tag!r}) is not None, 'précalcul absent'"
+    ),
+}
+
+
+def run_stage(stage, model, repeat):
+    """Durées médianes (s) : étape seule, et processus complet"""
+    code = PRELUDE.format(src=str(ROOT / "src")) + STAGES[stage].format(
+        model=str(model), tag=DERIVED_TAG
+    ) + "; print(time.perf_counter() - t0)"
+    inner = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            return None
+        inner.append(float(out.stdout.strip().splitlines()[-1]))
+    return float(np.median(inner))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage (modèle / données)")
+    parser.add_argument("--model", default=str(ROOT / "models" / "skiability_regression_physical.txt"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    results = {"model": args.model, "stages_s": {}}
+    for stage in STAGES:
+        elapsed = run_stage(stage, args.model, args.repeat)
+        results["stages_s"][stage] = elapsed
+        shown = "indisponible" if elapsed is None else f"{elapsed * 1000:8.1f} ms"
+        print(f"⏱️  {stage:<15} {shown}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
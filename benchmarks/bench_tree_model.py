@@ -0,0 +1,115 @@
+"""
+Benchmark : évaluateur NumPy (tree_model.TreeEnsemble) contre lightgbm.Booster.
+
+Mesure le démarrage à froid (import + chargement du modèle, chacun dans un
+processus neuf) puis la latence de prédiction par taille de lot, et vérifie
+l'écart maximal entre les deux prédictions.
+
+    python benchmarks/bench_tree_model.py
+    python benchmarks/bench_tree_model.py --model models/skiability_regression_spring.txt --json out.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+from tree_model import TreeEnsemble
+
+COLD_START = {
+    "lightgbm": "import lightgbm as lgb; lgb.Booster(model_file={path!r})",
+    "numpy": (
+        "import sys; sys.path.insert(0, {src!r}); from tree_model import TreeEnsemble; "
+        "TreeEnsemble.from_lightgbm_text({path!r})"
+    ),
+}
+
+
+def cold_start(kind, path, repeat=3):
+    """Durée médiane (s) d'un processus qui importe et charge le modèle"""
+    code = COLD_START[kind].format(path=str(path), src=str(ROOT / "src"))
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        runs.append(time.perf_counter() - t0)
+    return float(np.median(runs))
+
+
+def synthetic_rows(model, n, seed=0):
+    """Lignes plausibles pour les features du modèle (massif inclus)"""
+    rng = np.random.default_rng(seed)
+    ranges = {
+        "temp_min_7d_avg": (-20, 5), "temp_max_7d_avg": (-10, 20), "temp_amp_7d_avg": (1, 18),
+        "snowfall_7d_sum": (0, 80), "wind_max_7d": (5, 80), "freeze_thaw_cycles_7d": (0, 7),
+        "summit_altitude_clean": (1500, 4000), "topo_denivele": (400, 2500),
+        "topo_difficulty": (1, 5), "day_of_week": (0, 6), "spring_snow_score": (0, 1),
+    }
+    data = {name: rng.uniform(*ranges.get(name, (0, 1)), n) for name in model.feature_names}
+    if model.pandas_categorical:
+        categories = np.array(list(model.pandas_categorical[0]) + ["MONT-BLANC"], dtype=object)
+        for j in model.categorical_features:
+            data[model.feature_names[j]] = pd.Categorical(categories[rng.integers(0, len(categories), n)])
+    return pd.DataFrame(data)[model.feature_names]
+
+
+def batch_latency(predict, frame, min_time=0.2):
+    """Durée moyenne (s) d'un appel de prédiction sur `frame`"""
+    predict(frame)  # échauffement
+    calls, t0 = 0, time.perf_counter()
+    while True:
+        predict(frame)
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=str(ROOT / "models" / "skiability_regression_physical.txt"))
+    parser.add_argument("--sizes", default="1,20,200,2000,20000")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    import lightgbm as lgb
+
+    booster = lgb.Booster(model_file=args.model)
+    ensemble = TreeEnsemble.from_lightgbm_text(args.model)
+    results = {
+        "model": args.model,
+        "trees": ensemble.num_trees,
+        "cold_start_s": {kind: cold_start(kind, args.model) for kind in COLD_START},
+        "batches": [],
+    }
+    print(f"🌲 {Path(args.model).name} : {ensemble.num_trees} arbres, profondeur max {ensemble.max_depth}")
+    print("⏱️  démarrage à froid : " + " · ".join(
+        f"{kind} {t * 1000:.0f} ms" for kind, t in results["cold_start_s"].items()
+    ))
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        frame = synthetic_rows(ensemble, n)
+        max_abs_diff = float(np.abs(booster.predict(frame) - ensemble.predict(frame)).max())
+        row = {
+            "rows": n,
+            "lightgbm_s": batch_latency(booster.predict, frame),
+            "numpy_s": batch_latency(ensemble.predict, frame),
+            "max_abs_diff": max_abs_diff,
+        }
+        results["batches"].append(row)
+        print(f"   n={n:>6} : lightgbm {row['lightgbm_s'] * 1000:8.2f} ms · "
+              f"numpy {row['numpy_s'] * 1000:8.2f} ms · écart max {max_abs_diff:.1e}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
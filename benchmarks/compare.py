@@ -0,0 +1,56 @@
+"""
+Compare deux résultats de bench_scale.py (par exemple entre deux commits)
+et signale les étapes plus lentes au-delà d'un seuil.
+
+    python benchmarks/compare.py avant.json apres.json --threshold 1.2
+
+Code de sortie 1 si au moins une régression.
+"""
+
+import argparse
+import json
+import sys
+
+
+def cases_by_key(results):
+    return {(c["routes"], c["resolution"]): c for c in results["cases"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deux résultats de bench_scale.py")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Ratio après/avant au-delà duquel une étape est signalée")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(f"🔖 {before.get('commit')} → {after.get('commit')}")
+
+    old_cases = cases_by_key(before)
+    regressions = 0
+    for key, case in sorted(cases_by_key(after).items()):
+        old = old_cases.get(key)
+        if old is None:
+            continue
+        print(f"📏 {key[0]} itinéraires · grille {key[1]}°")
+        for stage, seconds in case["stages_s"].items():
+            previous = old["stages_s"].get(stage)
+            if not previous:
+                continue
+            ratio = seconds / previous
+            flag = "⚠️" if ratio > args.threshold else "  "
+            regressions += ratio > args.threshold
+            print(f"  {flag} {stage:<18} {previous * 1000:10.1f} → {seconds * 1000:10.1f} ms  (×{ratio:.2f})")
+
+    if regressions:
+        print(f"❌ {regressions} étape(s) plus lente(s) que ×{args.threshold}")
+        sys.exit(1)
+    print("✅ Pas de régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Harnais d'équivalence « golden » : le moteur vectorisé doit reproduire les
+sorties des implémentations de référence ligne à ligne (reference.py) sur
+un instantané de données figé et une grille de requêtes figée.
+
+    python benchmarks/golden.py record   # fige benchmarks/golden/ (une fois)
+    python benchmarks/golden.py check    # compare le moteur actuel + speed-ups
+
+record copie la météo et le BERA courants et un échantillon du catalogue
+dans benchmarks/golden/data/, puis y enregistre (reference.json) :
+    scores    scoring_v3 de chaque itinéraire, par (niveau, D+, date)
+    rankings  nombre d'itinéraires filtrés et top N (ordre de sort_values
+              comme l'ancienne app), par (niveau, D+, date, expositions)
+    features  get_physical_features par (date, itinéraire)
+    snow      compute_hybrid_snow_score par (date, itinéraire), et pour
+              des dates de sortie en transition / printemps / été
+check recalcule tout avec load_data + RouteCatalogue.filter +
+WeatherCube.route_meteo + score_routes + select_top_n + snow_details /
+hybrid_scores, échoue (code 1) au-delà de --tol, et mesure les facteurs
+d'accélération en rechronométrant la référence sur quelques itinéraires.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+import reference
+from data_loading import load_data
+from model_registry import MODEL_SPECS, ModelRegistry
+from scoring import score_routes, select_top_n, snow_details
+from snapshots import resolve_data
+from snow_quality import hybrid_scores
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+DATA_FILES = {"meteo": "meteo_cache.parquet", "bera": "bera_latest.csv", "routes": "itineraires.csv"}
+
+# ============================================================================
+# GRILLE DE REQUÊTES FIGÉE
+# ============================================================================
+
+N_ROUTES = 120
+TOP_N = 10
+SEED = 0
+NIVEAUX = ["S2", "S3", "S4"]
+DPLUS_RANGES = [(400, 900), (800, 1500), (1200, 2500)]
+EXPOSITIONS = {
+    "toutes": ["N", "NE", "E", "SE", "S", "SO", "O", "NO"],
+    "froides": ["N", "NE", "E", "O", "NO"],
+    "sud": ["SE", "S", "SO"],
+}
+# Début de fenêtre incomplète, fenêtre complète, dernier jour, hors données (jour le plus proche)
+DATES = ["2026-01-25", "2026-01-31", "2026-02-02", "2026-02-05"]
+# Dates de sortie hors hiver : saison du score neige, features du jour FEATURE_DATE
+FEATURE_DATE = "2026-01-31"
+SEASON_DATES = ["2026-03-20", "2026-04-10", "2026-07-01"]
+
+# Informations itinéraire attendues par le modèle (comme scoring.snow_details)
+ROUTE_DEFAULTS = {"summit_altitude_clean": 2500.0, "topo_difficulty": 3}
+
+
+def score_key(niveau, dplus, day):
+    return f"{niveau}|{dplus[0]}-{dplus[1]}|{day}"
+
+
+def sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def git_commit():
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                         capture_output=True, text=True)
+    return out.stdout.strip() or None
+
+
+def load_frozen(golden_dir):
+    """load_data sur les fichiers figés (précalculs écrits hors de data/.derived)"""
+    paths = {name: str(golden_dir / "data" / filename) for name, filename in DATA_FILES.items()}
+    version = "golden-" + hashlib.sha256(
+        "".join(sha256(p) for p in paths.values()).encode()
+    ).hexdigest()[:16]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="golden_") as tmp:
+        os.chdir(tmp)
+        try:
+            return load_data(paths, version)
+        finally:
+            os.chdir(cwd)
+
+
+def model_registry():
+    """Registre aux chemins absolus (indépendant du dossier courant)"""
+    return ModelRegistry({
+        name: spec._replace(path=str(ROOT / spec.path)) for name, spec in MODEL_SPECS.items()
+    })
+
+
+def reference_model():
+    """Modèle physique pour la référence : Booster LightGBM si installé"""
+    path = str(ROOT / MODEL_SPECS["physical"].path)
+    try:
+        import lightgbm as lgb
+        return lgb.Booster(model_file=path), "lightgbm"
+    except ImportError:
+        return model_registry().get("physical"), "tree_model"
+
+
+def route_features(features, row):
+    """Features de référence complétées des infos itinéraire"""
+    return {**features, **ROUTE_DEFAULTS, "topo_denivele": row["denivele_positif"], "massif": row["massif"]}
+
+
+def to_json(value):
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+# ============================================================================
+# ENREGISTREMENT DE LA RÉFÉRENCE
+# ============================================================================
+
+def freeze_data(golden_dir):
+    """Copie météo + BERA courants et un échantillon fixe du catalogue"""
+    paths = resolve_data().paths
+    data_dir = golden_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(paths["meteo"], data_dir / DATA_FILES["meteo"])
+    shutil.copyfile(paths["bera"], data_dir / DATA_FILES["bera"])
+    try:
+        routes = pd.read_csv(paths["routes"], encoding="utf-8")
+    except UnicodeDecodeError:
+        routes = pd.read_csv(paths["routes"], encoding="cp1252")
+    valid = routes.dropna(subset=["lat", "lon", "denivele_positif"])
+    sample = np.sort(np.random.default_rng(SEED).choice(len(valid), min(N_ROUTES, len(valid)), replace=False))
+    valid.iloc[sample].to_csv(data_dir / DATA_FILES["routes"], index=False)
+    return {name: {"file": filename, "sha256": sha256(data_dir / filename)}
+            for name, filename in DATA_FILES.items()}
+
+
+def record(golden_dir, force=False):
+    target = golden_dir / "reference.json"
+    if target.exists() and not force:
+        raise SystemExit(f"❌ {target} existe déjà (référence figée) : --force pour la remplacer")
+
+    frozen = freeze_data(golden_dir)
+    (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, *_rest) = load_frozen(golden_dir)
+    frame = catalogue.frame
+    grid_lookup = reference.build_grid_lookup(unique_grids)
+    ski_model, model_kind = reference_model()
+    print(f"🧊 {catalogue.n} itinéraires figés, modèle de référence : {model_kind}")
+
+    # get_meteo_agg ne dépend que de (itinéraire, date) : calculé une fois
+    # par couple au lieu d'une fois par requête (sorties identiques)
+    meteo_agg, memo = reference.get_meteo_agg, {}
+
+    def memo_meteo_agg(df_meteo, grid_lookup, lat, lon, target_date=None, n_neighbors=3):
+        key = (lat, lon, target_date, n_neighbors)
+        if key not in memo:
+            memo[key] = meteo_agg(df_meteo, grid_lookup, lat, lon, target_date, n_neighbors)
+        return memo[key]
+
+    reference.get_meteo_agg = memo_meteo_agg
+    try:
+        scores, rankings = {}, {}
+        for day in DATES:
+            target_date = date.fromisoformat(day)
+            for niveau in NIVEAUX:
+                for dplus in DPLUS_RANGES:
+                    all_scores = frame.apply(
+                        lambda row: reference.scoring_v3(row, niveau, dplus[0], dplus[1], target_date,
+                                                         dict_bera, df_meteo, grid_lookup),
+                        axis=1,
+                    )
+                    scores[score_key(niveau, dplus, day)] = [float(s) for s in all_scores]
+                    for expo_name, expositions in EXPOSITIONS.items():
+                        # Filtre et tri de l'ancienne app
+                        mask = (frame["massif"].isin(catalogue.massifs)
+                                & (frame["denivele_positif"] >= dplus[0])
+                                & (frame["denivele_positif"] <= dplus[1])
+                                & frame["exposition"].isin(expositions))
+                        top = all_scores[mask].sort_values(ascending=False).head(TOP_N)
+                        rankings[f"{score_key(niveau, dplus, day)}|{expo_name}"] = {
+                            "n_filtered": int(mask.sum()),
+                            "top": [[int(i), float(s)] for i, s in top.items()],
+                        }
+            print(f"   ✅ scores {day}")
+    finally:
+        reference.get_meteo_agg = meteo_agg
+
+    features, snow = {}, {}
+    for day in DATES:
+        target_date = date.fromisoformat(day)
+        features[day], snow[day] = [], []
+        for i in range(catalogue.n):
+            f = reference.get_physical_features(df_meteo, grid_lookup, catalogue.lat[i],
+                                                catalogue.lon[i], target_date)
+            features[day].append(None if f is None else to_json(f))
+            if f is None:
+                snow[day].append(None)
+                continue
+            hybrid, base, spring, saison = reference.compute_hybrid_snow_score(
+                route_features(f, frame.iloc[i]), target_date, ski_model)
+            snow[day].append([float(hybrid), float(base), float(spring), saison])
+        print(f"   ✅ features + neige {day}")
+
+    for day in SEASON_DATES:
+        season_date = date.fromisoformat(day)
+        snow[f"{FEATURE_DATE}@{day}"] = [
+            None if f is None else [
+                float(v) if not isinstance(v, str) else v
+                for v in reference.compute_hybrid_snow_score(
+                    route_features(f, frame.iloc[i]), season_date, ski_model)
+            ]
+            for i, f in enumerate(features[FEATURE_DATE])
+        ]
+
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "reference_model": model_kind,
+        "data": frozen,
+        "grid": {
+            "routes": int(catalogue.n), "top_n": TOP_N, "niveaux": NIVEAUX,
+            "dplus_ranges": DPLUS_RANGES, "dates": DATES, "expositions": EXPOSITIONS,
+            "feature_date": FEATURE_DATE, "season_dates": SEASON_DATES,
+        },
+        "scores": scores,
+        "rankings": rankings,
+        "features": features,
+        "snow": snow,
+    }
+    target.write_text(json.dumps(payload, indent=1, ensure_ascii=False))
+    print(f"💾 {target} ({len(scores)} jeux de scores, {len(rankings)} classements)")
+
+
+# ============================================================================
+# VÉRIFICATION DU MOTEUR ACTUEL
+# ============================================================================
+
+class Report:
+    """Écarts maximaux par contrôle et échecs (au-delà de la tolérance)"""
+
+    def __init__(self, tol):
+        self.tol = tol
+        self.max_error = {}
+        self.failures = []
+
+    def compare(self, check, key, expected, actual):
+        error = float(np.max(np.abs(np.asarray(expected, float) - np.asarray(actual, float)), initial=0.0))
+        self.max_error[check] = max(self.max_error.get(check, 0.0), error)
+        if not error <= self.tol:
+            self.failures.append(f"{check} [{key}] : écart {error:.3g}")
+
+    def fail(self, check, key, message):
+        self.failures.append(f"{check} [{key}] : {message}")
+
+
+def compare_ranking(report, key, expected, top_idx, scores, n_filtered):
+    """
+    Même nombre d'itinéraires filtrés, mêmes scores rang par rang, et mêmes
+    itinéraires hormis les ex æquo (à la tolérance près) en bas du top N,
+    que sort_values ordonne arbitrairement.
+    """
+    if n_filtered != expected["n_filtered"]:
+        report.fail("rankings", key, f"{n_filtered} filtrés au lieu de {expected['n_filtered']}")
+        return
+    ref_idx = [i for i, _ in expected["top"]]
+    ref_scores = [s for _, s in expected["top"]]
+    if len(top_idx) != len(ref_idx):
+        report.fail("rankings", key, f"top {len(top_idx)} au lieu de {len(ref_idx)}")
+        return
+    report.compare("rankings", key, ref_scores, scores[top_idx])
+    if not ref_scores:
+        return
+    cutoff = ref_scores[-1] + report.tol
+    sure_ref = {i for i, s in expected["top"] if s > cutoff}
+    sure_new = {int(i) for i in top_idx if scores[i] > cutoff}
+    if sure_ref != sure_new:
+        report.fail("rankings", key, f"itinéraires différents : {sorted(sure_ref ^ sure_new)}")
+
+
+def snow_row(snow, j):
+    return [snow["hybrid"][j], snow["base"][j], snow["spring"][j]]
+
+
+def check(golden_dir, tol, timing_sample):
+    golden = json.loads((golden_dir / "reference.json").read_text())
+    for name, entry in golden["data"].items():
+        if sha256(golden_dir / "data" / entry["file"]) != entry["sha256"]:
+            raise SystemExit(f"❌ Données figées modifiées : {entry['file']}")
+
+    data = load_frozen(golden_dir)
+    (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+     route_grids, route_risk, route_risk_level, outlook) = data
+    grid = golden["grid"]
+    models = model_registry()
+    report = Report(tol)
+    all_idx = np.arange(catalogue.n)
+
+    # --- Scores et classements ---
+    query_times = []
+    for day in grid["dates"]:
+        target_date = date.fromisoformat(day)
+        for niveau in grid["niveaux"]:
+            for dplus in grid["dplus_ranges"]:
+                key = score_key(niveau, dplus, day)
+                t0 = time.perf_counter()
+                meteo = cube.route_meteo(*route_grids, target_date)
+                scores = score_routes(catalogue, meteo, route_risk, niveau, dplus[0], dplus[1])
+                query_times.append(time.perf_counter() - t0)
+                report.compare("scores", key, golden["scores"][key], scores)
+                for expo_name, expositions in grid["expositions"].items():
+                    t0 = time.perf_counter()
+                    idx = catalogue.filter(massifs=catalogue.massifs, dplus_min=dplus[0],
+                                           dplus_max=dplus[1], expositions=expositions)
+                    top_idx = select_top_n(scores, idx, grid["top_n"])
+                    query_times[-1] += (time.perf_counter() - t0) / len(grid["expositions"])
+                    compare_ranking(report, f"{key}|{expo_name}", golden["rankings"][f"{key}|{expo_name}"],
+                                    top_idx, scores, len(idx))
+
+    # --- Features et score neige ---
+    for day in grid["dates"]:
+        details = snow_details(catalogue, cube, route_grids, all_idx, date.fromisoformat(day), models=models)
+        for i, (expected_f, expected_s, detail) in enumerate(zip(golden["features"][day], golden["snow"][day], details)):
+            if (expected_f is None) != (detail["features"] is None):
+                report.fail("features", f"{day}|{i}", "disponibilité différente")
+                continue
+            if expected_f is None:
+                continue
+            report.compare("features", f"{day}|{i}", [expected_f[k] for k in expected_f],
+                           [detail["features"][k] for k in expected_f])
+            report.compare("snow", f"{day}|{i}", expected_s[:3],
+                           [detail["snow"]["hybrid"], detail["snow"]["base"], detail["snow"]["spring"]])
+            if detail["saison"] != expected_s[3]:
+                report.fail("snow", f"{day}|{i}", f"saison {detail['saison']} au lieu de {expected_s[3]}")
+
+    feature_date = date.fromisoformat(grid["feature_date"])
+    features, available = cube.route_physical_features(*route_grids, feature_date)
+    batch = {k: v[available] for k, v in features.items()}
+    batch.update({k: np.full(available.sum(), v) for k, v in ROUTE_DEFAULTS.items()})
+    batch["topo_denivele"] = catalogue.dplus[available]
+    batch["massif"] = catalogue.frame["massif"].to_numpy(dtype=object)[available]
+    positions = np.cumsum(available) - 1
+    for day in grid["season_dates"]:
+        snow, saison = hybrid_scores(models, batch, date.fromisoformat(day))
+        for i, expected in enumerate(golden["snow"][f"{grid['feature_date']}@{day}"]):
+            if expected is None or not available[i]:
+                if (expected is None) != (not available[i]):
+                    report.fail("snow_seasons", f"{day}|{i}", "disponibilité différente")
+                continue
+            report.compare("snow_seasons", f"{day}|{i}", expected[:3], snow_row(snow, positions[i]))
+            if saison != expected[3]:
+                report.fail("snow_seasons", f"{day}|{i}", f"saison {saison} au lieu de {expected[3]}")
+
+    speedups = measure_speedups(data, models, query_times, timing_sample)
+    return report, speedups
+
+
+def measure_speedups(data, models, query_times, timing_sample):
+    """Temps par itinéraire : référence (échantillon) contre moteur vectorisé"""
+    (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+     route_grids, route_risk, route_risk_level, outlook) = data
+    grid_lookup = reference.build_grid_lookup(unique_grids)
+    ski_model, _ = reference_model()
+    target_date = date.fromisoformat(FEATURE_DATE)
+    sample = np.arange(min(timing_sample, catalogue.n))
+    n = catalogue.n
+
+    def per_route(fn, count):
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) / count
+
+    ref = {
+        "scoring": per_route(lambda: [reference.scoring_v3(
+            catalogue.frame.iloc[i], "S3", 800, 1500, target_date, dict_bera, df_meteo, grid_lookup
+        ) for i in sample], len(sample)),
+        "meteo": per_route(lambda: [reference.get_meteo_agg(
+            df_meteo, grid_lookup, catalogue.lat[i], catalogue.lon[i], target_date) for i in sample], len(sample)),
+        "features": per_route(lambda: [reference.get_physical_features(
+            df_meteo, grid_lookup, catalogue.lat[i], catalogue.lon[i], target_date) for i in sample], len(sample)),
+    }
+    features = [reference.get_physical_features(df_meteo, grid_lookup, catalogue.lat[i], catalogue.lon[i], target_date)
+                for i in sample]
+    rows = [(f, catalogue.frame.iloc[i]) for f, i in zip(features, sample) if f is not None]
+    ref["snow"] = per_route(lambda: [reference.compute_hybrid_snow_score(
+        route_features(f, row), target_date, ski_model) for f, row in rows], max(len(rows), 1))
+
+    new = {
+        "scoring": float(np.median(query_times)) / n,
+        "meteo": per_route(lambda: cube.route_meteo(*route_grids, target_date), n),
+        "features": per_route(lambda: cube.route_physical_features(*route_grids, target_date), n),
+        "snow": per_route(lambda: snow_details(catalogue, cube, route_grids, np.arange(n), target_date,
+                                               models=models), n),
+    }
+    labels = {
+        "scoring": "scoring_v3 → score_routes + filtre + top N",
+        "meteo": "get_meteo_agg → WeatherCube.route_meteo",
+        "features": "get_physical_features → route_physical_features",
+        "snow": "compute_hybrid_snow_score → snow_details (features + neige)",
+    }
+    return {name: {"label": labels[name], "reference_us": ref[name] * 1e6, "engine_us": new[name] * 1e6,
+                   "speedup": ref[name] / new[name] if new[name] > 0 else None}
+            for name in labels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence référence / moteur vectorisé")
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("--golden-dir", type=Path, default=GOLDEN_DIR)
+    parser.add_argument("--force", action="store_true", help="record : remplace la référence figée")
+    parser.add_argument("--tol", type=float, default=1e-9, help="check : écart absolu toléré")
+    parser.add_argument("--timing-sample", type=int, default=10,
+                        help="check : itinéraires rechronométrés avec la référence")
+    parser.add_argument("--json", help="check : écrit écarts et speed-ups dans ce fichier")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.golden_dir, force=args.force)
+        return
+
+    report, speedups = check(args.golden_dir, args.tol, args.timing_sample)
+    print(f"🔎 Écart max par contrôle (tolérance {args.tol:g}) :")
+    for name, error in report.max_error.items():
+        print(f"   {'✅' if error <= args.tol else '❌'} {name:<13} {error:.3g}")
+    print("⚡ Temps par itinéraire (référence → moteur) :")
+    for entry in speedups.values():
+        print(f"   {entry['label']:<58} {entry['reference_us']:10.1f} µs → {entry['engine_us']:8.2f} µs"
+              f"  (×{entry['speedup']:.0f})")
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "commit": git_commit(), "tol": args.tol, "max_error": report.max_error,
+            "failures": report.failures, "speedups": speedups,
+        }, indent=2, ensure_ascii=False))
+    if report.failures:
+        print(f"❌ {len(report.failures)} écart(s) :")
+        for failure in report.failures[:20]:
+            print(f"   • {failure}")
+        sys.exit(1)
+    print("✅ Sorties identiques à la référence")
+
+
+if __name__ == "__main__":
+    main()
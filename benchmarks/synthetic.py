@@ -0,0 +1,123 @@
+"""
+Données synthétiques au format des fichiers de data/ pour les benchmarks
+d'échelle : catalogue d'itinéraires, météo horaire sur une grille régulière
+et bulletins BERA par massif.
+
+Emprise par défaut : Alpes françaises + Suisse (celle des Pyrénées s'ajoute
+avec `extent=EXTENTS["alpes+pyrenees"]`). Les valeurs sont plausibles
+(altitude → température, neige quand il gèle) sans chercher le réalisme :
+seuls les volumes et les distributions comptent pour mesurer les temps.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# (sud, ouest, nord, est)
+EXTENTS = {
+    "alpes": (43.9, 4.9, 47.9, 10.6),
+    "alpes+pyrenees": (42.3, -2.0, 47.9, 10.6),
+}
+
+START = datetime(2026, 1, 24)  # Même début que data/meteo_cache.parquet
+MASSIF_CELL_DEG = 1.0          # Un massif synthétique par case de 1° (< 127 massifs)
+
+EXPOSITIONS = ["N", "NE", "E", "SE", "S", "SO", "O", "NO", "T"]
+DIFFICULTIES = ["S1", "S2", "S3", "S4", "S5", "S3+", "S4-", ""]
+
+
+def massif_of(lat, lon, extent):
+    """Nom de massif synthétique (case de MASSIF_CELL_DEG degrés)"""
+    south, west = extent[0], extent[1]
+    row = ((np.asarray(lat) - south) // MASSIF_CELL_DEG).astype(int)
+    col = ((np.asarray(lon) - west) // MASSIF_CELL_DEG).astype(int)
+    return np.char.add(np.char.add("MASSIF-", row.astype(str)), np.char.add("-", col.astype(str)))
+
+
+def synthetic_routes(n_routes, extent=EXTENTS["alpes"], seed=0):
+    """Catalogue au format data/raw/itineraires_alpes_camptocamp.csv"""
+    rng = np.random.default_rng(seed)
+    south, west, north, east = extent
+    lat = np.round(rng.uniform(south, north, n_routes), 4)
+    lon = np.round(rng.uniform(west, east, n_routes), 4)
+    ids = np.arange(n_routes)
+    return pd.DataFrame({
+        "name": np.char.add("Itinéraire ", ids.astype(str)),
+        "massif": massif_of(lat, lon, extent),
+        "lat": lat,
+        "lon": lon,
+        "denivele_positif": rng.integers(300, 2800, n_routes),
+        "exposition": rng.choice(EXPOSITIONS, n_routes),
+        "difficulty_ski": rng.choice(DIFFICULTIES, n_routes),
+        "url": np.char.add("https://example.org/routes/", ids.astype(str)),
+        "source": "synthetic",
+    })
+
+
+def synthetic_weather(resolution, days=10, extent=EXTENTS["alpes"], seed=0):
+    """
+    Météo horaire au format data/meteo_cache.parquet sur une grille
+    régulière de pas `resolution` degrés.
+    """
+    rng = np.random.default_rng(seed)
+    south, west, north, east = extent
+    lats = np.round(np.arange(south, north + 1e-9, resolution), 4)
+    lons = np.round(np.arange(west, east + 1e-9, resolution), 4)
+    grid_lat, grid_lon = (a.ravel() for a in np.meshgrid(lats, lons, indexing="ij"))
+    n_grid, n_hours = len(grid_lat), days * 24
+
+    hours = np.arange(n_hours)
+    altitude_offset = rng.uniform(-8, 4, n_grid)  # Relief : décalage de température
+    diurnal = 5 * np.sin((hours % 24 - 9) / 24 * 2 * np.pi)
+    synoptic = 4 * np.sin(hours / (24 * 5) * 2 * np.pi)
+    temperature = (altitude_offset[:, None] + diurnal[None, :] + synoptic[None, :]
+                   + rng.normal(0, 1.5, (n_grid, n_hours)))
+    precipitation = np.where(rng.random((n_grid, n_hours)) < 0.15,
+                             rng.exponential(1.0, (n_grid, n_hours)), 0.0)
+    snowfall = np.where(temperature < 0.5, precipitation * 0.7, 0.0)
+
+    time = pd.date_range(START, periods=n_hours, freq="h").to_numpy()
+    return pd.DataFrame({
+        "time": np.tile(time, n_grid),
+        "latitude": np.repeat(grid_lat, n_hours),
+        "longitude": np.repeat(grid_lon, n_hours),
+        "temperature_2m": np.round(temperature, 1).ravel(),
+        "relative_humidity_2m": rng.integers(40, 100, n_grid * n_hours),
+        "wind_speed_10m": np.round(rng.gamma(2.0, 8.0, n_grid * n_hours), 1),
+        "precipitation": np.round(precipitation, 1).ravel(),
+        "snowfall": np.round(snowfall, 2).ravel(),
+        "cloudcover": rng.integers(0, 100, n_grid * n_hours),
+    })
+
+
+def synthetic_bera(massifs, seed=0):
+    """Un bulletin par massif au format data/bera_latest.csv"""
+    rng = np.random.default_rng(seed)
+    massifs = sorted(set(massifs))
+    risk = rng.integers(1, 5, len(massifs)).astype(float)
+    return pd.DataFrame({
+        "date_validite": (START + pd.Timedelta(days=6)).isoformat(),
+        "risque_actuel": risk,
+        "risque_j2": risk,
+        "massif": massifs,
+    })
+
+
+def write_dataset(directory, n_routes, resolution, days=10, extent=EXTENTS["alpes"], seed=0):
+    """
+    Écrit les trois fichiers lus par load_data dans `directory`.
+
+    Returns:
+        dict de chemins au format snapshots.resolve_data().paths
+    """
+    routes = synthetic_routes(n_routes, extent, seed)
+    paths = {
+        "bera": str(directory / "bera_latest.csv"),
+        "meteo": str(directory / "meteo_cache.parquet"),
+        "routes": str(directory / "itineraires.csv"),
+    }
+    routes.to_csv(paths["routes"], index=False)
+    synthetic_weather(resolution, days, extent, seed).to_parquet(paths["meteo"], index=False)
+    synthetic_bera(routes["massif"].str.upper(), seed).to_csv(paths["bera"], index=False)
+    return paths
@@ -0,0 +1,122 @@
+"""
+Serveur local qui imite l'API archive d'Open-Meteo, pour essayer
+fetch_meteo_archive.py sans réseau (reprise, parallélisme, erreurs).
+
+Réponses déterministes : mêmes paramètres → mêmes valeurs horaires
+(température saisonnière + cycle jour/nuit, neige sous 0°C, vent).
+--fail-rate renvoie des 503 au hasard pour exercer les nouvelles
+tentatives, --latency simule un serveur lent.
+
+    python scripts/archive_stub_server.py --port 8765 --fail-rate 0.2
+    python scripts/fetch_meteo_archive.py --start 2025-01-01 --end 2025-02-28 \\
+        --base-url http://127.0.0.1:8765/v1/archive --rate 0 --root /tmp/meteo_archive
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+ARCHIVE_PATH = "/v1/archive"
+
+
+def point_series(lat, lon, start, end, variables):
+    """Série horaire d'un point, reproductible (graine tirée des coordonnées)"""
+    times = pd.date_range(start, pd.Timestamp(end) + pd.Timedelta(hours=23), freq="h")
+    seed = int(hashlib.sha1(f"{lat:.4f},{lon:.4f}".encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed + times[0].dayofyear * 1000 + times[0].year)
+
+    day = times.dayofyear.to_numpy()
+    hour = times.hour.to_numpy()
+    altitude_effect = (lat - 44.0) * 2.0 + (lon - 5.0) * 0.8
+    temp = (4.0 - altitude_effect + 8.0 * np.cos((day - 200) / 365 * 2 * np.pi)
+            + 6.0 * np.sin((hour - 9) / 24 * 2 * np.pi) + rng.normal(0, 1.5, len(times)))
+    precip = np.where(rng.random(len(times)) < 0.08, rng.gamma(1.5, 1.2, len(times)), 0.0)
+    values = {
+        "temperature_2m": temp,
+        "relative_humidity_2m": np.clip(70 + rng.normal(0, 12, len(times)), 10, 100),
+        "wind_speed_10m": np.abs(rng.normal(12, 8, len(times))),
+        "precipitation": precip,
+        "snowfall": np.where(temp < 0.5, precip * 0.7, 0.0),
+        "cloudcover": np.clip(rng.normal(50, 30, len(times)), 0, 100),
+    }
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "Europe/Paris",
+        "hourly": {
+            "time": list(times.strftime("%Y-%m-%dT%H:%M")),
+            **{v: np.round(values[v], 2).tolist() for v in variables if v in values},
+        },
+    }
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    latency = 0.0
+    _rng = random.Random(0)
+    _lock = threading.Lock()
+    requests_served = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != ARCHIVE_PATH:
+            return self._reply(404, {"error": True, "reason": "Not found"})
+        with ArchiveHandler._lock:
+            ArchiveHandler.requests_served += 1
+            fail = self._rng.random() < self.fail_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return self._reply(503, {"error": True, "reason": "Simulated outage"})
+
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            lats = [float(v) for v in query["latitude"].split(",")]
+            lons = [float(v) for v in query["longitude"].split(",")]
+            start, end = query["start_date"], query["end_date"]
+            variables = query.get("hourly", "").split(",")
+        except (KeyError, ValueError) as e:
+            return self._reply(400, {"error": True, "reason": f"Paramètre invalide : {e}"})
+        if len(lats) != len(lons):
+            return self._reply(400, {"error": True, "reason": "latitude/longitude de tailles différentes"})
+
+        results = [point_series(lat, lon, start, end, variables) for lat, lon in zip(lats, lons)]
+        self._reply(200, results if len(results) > 1 else results[0])
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass  # Silencieux : fetch_meteo_archive.py affiche déjà chaque lot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Faux serveur archive Open-Meteo (tests locaux)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Part de réponses 503 (0-1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai par requête (s)")
+    args = parser.parse_args()
+
+    ArchiveHandler.fail_rate = args.fail_rate
+    ArchiveHandler.latency = args.latency
+    server = ThreadingHTTPServer((args.host, args.port), ArchiveHandler)
+    print(f"🧪 Archive locale : http://{args.host}:{args.port}{ARCHIVE_PATH} "
+          f"(échecs {args.fail_rate:.0%}, latence {args.latency:g} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Arrêt après {ArchiveHandler.requests_served} requêtes")
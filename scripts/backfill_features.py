@@ -0,0 +1,123 @@
+"""
+Table de features d'entraînement sur toute une saison : features physiques
+7 jours (vrais cycles gel/dégel journaliers), mesures du jour, calendrier
+et infos topo, pour chaque (itinéraire, date) ou (grille, date), en une
+passe glissante sur l'historique horaire (cf. src/backfill.py).
+
+    python scripts/backfill_features.py                          # itinéraires, tout l'historique
+    python scripts/backfill_features.py --grids --start 2026-01-25
+    python scripts/backfill_features.py --cycles window --check 50
+
+--cycles window reproduit l'indicateur 0/1 de l'app (modèles actuels) ;
+--check N compare N couples tirés au hasard à get_physical_features.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+import reference
+from backfill import grid_table, route_table
+from catalogue import RouteCatalogue
+from data_loading import load_routes
+from data_version import ARTEFACTS
+from meteo_archive import load_meteo
+from profiling import Profile
+from timing import Timings
+from weather import PHYSICAL_FEATURES, WeatherCube
+
+OUTPUT_DIR = Path("data/features")
+
+timings = Timings("backfill_features")
+
+
+def check_against_reference(table, df_meteo, catalogue, n, cycles, seed=0):
+    """
+    Écart max entre la table et get_physical_features sur `n` couples
+    (itinéraire, date). Les cycles ne sont comparés qu'en mode "window",
+    la référence ne connaissant que l'indicateur 0/1.
+    """
+    grid_lookup = reference.build_grid_lookup(
+        df_meteo[["latitude", "longitude"]].dropna().drop_duplicates()
+    )
+    columns = PHYSICAL_FEATURES if cycles == "window" else PHYSICAL_FEATURES[:-1]
+    sample = table.sample(min(n, len(table)), random_state=seed)
+    worst = 0.0
+    for row in sample.itertuples():
+        ref = reference.get_physical_features(
+            df_meteo, grid_lookup, catalogue.lat[row.route], catalogue.lon[row.route], row.date
+        )
+        if ref is None:
+            raise AssertionError(f"Référence sans données : itinéraire {row.route}, {row.date:%Y-%m-%d}")
+        worst = max(worst, max(abs(getattr(row, c) - ref[c]) for c in columns))
+    return worst, len(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table de features d'entraînement (backfill saison)")
+    parser.add_argument("--meteo", default=ARTEFACTS["meteo"],
+                        help="Météo horaire : parquet ou archive partitionnée (data/meteo_archive)")
+    parser.add_argument("--routes", default=ARTEFACTS["routes"], help="Catalogue d'itinéraires (CSV)")
+    parser.add_argument("--grids", action="store_true", help="Une ligne par grille au lieu d'itinéraire")
+    parser.add_argument("--start", help="Première date (AAAA-MM-JJ)")
+    parser.add_argument("--end", help="Dernière date (AAAA-MM-JJ)")
+    parser.add_argument("--cycles", choices=["daily", "window"], default="daily",
+                        help="Cycles gel/dégel : nombre de jours (défaut) ou indicateur de l'app")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="Garde les lignes sans météo (meteo_available = 0)")
+    parser.add_argument("--out", help="Fichier parquet de sortie (défaut : data/features/...)")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="Compare N lignes tirées au hasard à get_physical_features")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+    if args.check and args.grids:
+        parser.error("--check ne s'applique qu'aux itinéraires")
+
+    kind = "grids" if args.grids else "routes"
+    out = Path(args.out) if args.out else OUTPUT_DIR / f"{kind}_features_{args.cycles}.parquet"
+
+    print(f"🧮 Backfill des features ({kind}, cycles {args.cycles})")
+    t0 = time.perf_counter()
+    with Profile("backfill_features", enabled=args.profile) as profile:
+        with timings.span("load"):
+            df_meteo = load_meteo(args.meteo, args.start, args.end)
+        with timings.span("cube"):
+            cube = WeatherCube(df_meteo)
+        with timings.span("features"):
+            if args.grids:
+                catalogue = None
+                table = grid_table(cube, args.start, args.end, args.cycles,
+                                   dropna=not args.keep_missing)
+            else:
+                catalogue = RouteCatalogue(load_routes(args.routes))
+                table = route_table(cube, catalogue, args.start, args.end, args.cycles,
+                                    dropna=not args.keep_missing)
+        with timings.span("write"):
+            out.parent.mkdir(parents=True, exist_ok=True)
+            table.to_parquet(out, index=False, compression="snappy")
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
+
+    print(f"   ✅ {out} : {len(table):,} lignes, {table.shape[1]} colonnes "
+          f"({time.perf_counter() - t0:.1f} s)")
+    if len(table):
+        print(f"   • Période : {table['date'].min():%Y-%m-%d} → {table['date'].max():%Y-%m-%d}")
+        cycles = table["freeze_thaw_cycles_7d"].value_counts().sort_index()
+        print("   • Cycles gel/dégel 7 j : " + ", ".join(f"{k}→{v}" for k, v in cycles.items()))
+
+    if args.check:
+        with timings.span("check"):
+            worst, n = check_against_reference(table, df_meteo, catalogue, args.check, args.cycles)
+        status = "✅" if worst <= 1e-9 else "❌"
+        print(f"   {status} Écart max vs get_physical_features ({n} lignes) : {worst:.2e}")
+
+    print(f"\n{timings.report()}")
+    timings.log(rows=len(table), kind=kind, cycles=args.cycles)
+    return not args.check or worst <= 1e-9
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,143 @@
+"""
+Rejeu d'une saison passée : classements « à date » d'une grille de profils
+utilisateurs pour chaque jour, comparés aux sorties réellement faites et au
+ressenti de leurs récits (cf. src/backtest.py).
+
+    python scripts/backtest_season.py --start 2025-01-01 --end 2025-04-30 \\
+        --outings data/outings/outings.parquet
+    python scripts/backtest_season.py --meteo data/meteo_cache.parquet   # données courantes
+
+Entrées :
+    --meteo     archive partitionnée (scripts/fetch_meteo_archive.py) ou parquet
+    --bera      bulletins (plusieurs fichiers) ; défaut : courant + instantanés
+    --outings   sorties (id_sortie, date, route_url ou route_id)
+    --sentiment ressenti des récits (id_sortie, sentiment, confidence)
+
+Sorties dans --out : rankings.parquet (top N par profil et par jour),
+outcomes.parquet (rang de chaque sortie pour chaque profil), metrics.csv.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from backtest import (
+    BERA_MAX_AGE, BERA_MIN_COVERAGE, SENTIMENT_FILE, SeasonReplay, bera_history,
+    default_bera_files, profile_grid, profile_metrics, resolve_outings,
+)
+from catalogue import RouteCatalogue
+from data_loading import load_routes
+from data_version import ARTEFACTS
+from meteo_archive import ARCHIVE_ROOT, load_meteo
+from model_registry import ModelRegistry
+from outings import OUTINGS_FILE
+from profiling import Profile
+from timing import Timings
+from weather import WeatherCube
+
+OUTPUT_DIR = "data/backtest"
+
+timings = Timings("backtest_season")
+
+
+def read_table(path):
+    return pd.read_parquet(path) if str(path).endswith(".parquet") else pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu à date d'une saison (backtest du scoring)")
+    parser.add_argument("--meteo", default=ARCHIVE_ROOT if Path(ARCHIVE_ROOT).is_dir() else ARTEFACTS["meteo"],
+                        help="Archive météo partitionnée ou parquet (défaut : archive si présente)")
+    parser.add_argument("--routes", default=ARTEFACTS["routes"], help="Catalogue d'itinéraires (CSV)")
+    parser.add_argument("--bera", nargs="+", help="Fichiers BERA (défaut : courant + instantanés)")
+    parser.add_argument("--outings", default=OUTINGS_FILE, help="Sorties (CSV ou parquet)")
+    parser.add_argument("--sentiment", default=SENTIMENT_FILE, help="Ressenti des récits (CSV)")
+    parser.add_argument("--start", type=date.fromisoformat, help="Premier jour rejoué")
+    parser.add_argument("--end", type=date.fromisoformat, help="Dernier jour rejoué")
+    parser.add_argument("--top-n", type=int, default=10, help="Taille du classement proposé")
+    parser.add_argument("--snow", action="store_true", help="Ajoute le score neige du top N (modèles)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="Dossier des résultats")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔁 REJEU DE SAISON - SKI TOURING LIVE")
+    print("=" * 60)
+    t0 = time.perf_counter()
+    with Profile("backtest_season", enabled=args.profile) as profile:
+        with timings.span("load"):
+            df_meteo = load_meteo(args.meteo, args.start, args.end)
+            catalogue = RouteCatalogue(load_routes(args.routes))
+            bera_files = args.bera or default_bera_files()
+            bera = bera_history([pd.read_csv(f) for f in bera_files])
+        with timings.span("cube"):
+            cube = WeatherCube(df_meteo)
+        days = [d for d in cube.dates
+                if (args.start is None or d >= args.start) and (args.end is None or d <= args.end)]
+        if not days:
+            print("❌ Aucun jour météo dans la période demandée")
+            return False
+
+        print(f"📅 {days[0]} → {days[-1]} ({len(days)} jours) · {catalogue.n} itinéraires")
+        print(f"⚠️  BERA : {len(bera)} bulletins ({len(bera_files)} fichiers)")
+
+        with timings.span("replay"):
+            replay = SeasonReplay(cube, catalogue, bera, days,
+                                  models=ModelRegistry() if args.snow else None)
+        print(f"   • Jours-massifs couverts par un bulletin : {replay.bera_coverage:.0%}")
+        if replay.bera_coverage < BERA_MIN_COVERAGE:
+            print(f"   ⚠️  Historique BERA insuffisant (bulletins de plus de {BERA_MAX_AGE.days} jours "
+                  f"ignorés) : risque par défaut sur le reste, passer les bulletins de la saison "
+                  f"avec --bera")
+
+        outings = None
+        if Path(args.outings).exists():
+            with timings.span("outings"):
+                outings, counts = resolve_outings(
+                    read_table(args.outings), pd.read_csv(args.sentiment), catalogue, days
+                )
+            print(f"🎿 Sorties : {counts['outings']} · avec ressenti {counts['with_sentiment']} · "
+                  f"au catalogue {counts['in_catalogue']} · dans la période {counts['in_season']}")
+        else:
+            print(f"⚠️  {args.outings} absent : classements seuls, sans comparaison aux sorties")
+
+        profiles = profile_grid()
+        with timings.span("ranking"):
+            rankings, outcomes = replay.run(profiles, top_n=args.top_n, outings=outings)
+
+        with timings.span("write"):
+            out = Path(args.out)
+            out.mkdir(parents=True, exist_ok=True)
+            rankings.to_parquet(out / "rankings.parquet", index=False)
+            metrics = None
+            if outcomes is not None:
+                outcomes.to_parquet(out / "outcomes.parquet", index=False)
+                metrics = profile_metrics(outcomes, args.top_n)
+                metrics.to_csv(out / "metrics.csv", index=False)
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
+
+    print(f"\n📊 {len(profiles)} profils x {len(days)} jours → {len(rankings):,} lignes de classement "
+          f"({time.perf_counter() - t0:.1f} s)")
+    if "snow" in rankings:
+        print(f"   • Score neige moyen du top {args.top_n} : {np.nanmean(rankings['snow']):.3f}")
+    if metrics is not None and len(metrics):
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(metrics.round(3).to_string(index=False))
+    print(f"   ✅ {out}")
+
+    print(f"\n{timings.report()}")
+    timings.log(days=len(days), profiles=len(profiles), routes=catalogue.n,
+                outings=0 if outings is None else len(outings))
+    return True
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
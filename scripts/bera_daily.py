@@ -4,14 +4,23 @@ Script autonome de récupération des BERA avec génération automatique du toke
 Inspiré de beragrok.py mais avec APPLICATION_ID au lieu du token manuel
 """
 
+import argparse
 import requests
 import os
 import xml.etree.ElementTree as ET
 import json
 import csv
+import io
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from data_version import atomic_write_bytes, update_manifest
+from snapshots import publish_snapshot
+from profiling import Profile
+from timing import Timings
+
 # ──────────────────────────────────────────────────────────────
 # CONFIGURATION - Choisis UNE des deux méthodes
 # ──────────────────────────────────────────────────────────────
@@ -74,6 +83,9 @@ massifs = [
     (74, "Cerdagne-Canigou", "Pyrénées-Orientales", "Pyrénées"),
 ]
 
+# Durées réseau / parsing / écriture (résumé en fin d'exécution, SKI_TIMINGS=0 pour couper)
+timings = Timings("bera_daily")
+
 # ──────────────────────────────────────────────────────────────
 # Génération automatique du token
 # ──────────────────────────────────────────────────────────────
@@ -86,7 +98,8 @@ def get_token():
     data = {"grant_type": "client_credentials"}
     
     try:
-        r = requests.post(AUTH_URL, data=data, headers=headers, timeout=10)
+        with timings.span("network"):
+            r = requests.post(AUTH_URL, data=data, headers=headers, timeout=10)
         r.raise_for_status()
         token_data = r.json()
         print(f"✅ Token généré (valide {token_data['expires_in']}s)\n")
@@ -108,24 +121,26 @@ def fetch_bera(massif_id, token):
     }
     
     try:
-        r = requests.get(url, headers=headers, timeout=10)
+        with timings.span("network"):
+            r = requests.get(url, headers=headers, timeout=10)
         if r.status_code == 404:
             return None
         r.raise_for_status()
         
-        # Parse le XML
-        root = ET.fromstring(r.content)
-        
-        # Extraction des données
-        risque_elem = root.find("./CARTOUCHERISQUE/RISQUE")
-        data = {
-            "date_validite": root.attrib.get("DATEBULLETIN"),
-            "risque_actuel": risque_elem.attrib.get("RISQUEMAXI") if risque_elem is not None else None,
-            "risque_j2": risque_elem.attrib.get("RISQUEMAXIJ2") if risque_elem is not None else None,
-            "depart_spontane": root.findtext("./CARTOUCHERISQUE/NATUREL"),
-            "declenchement_skieur": root.findtext("./CARTOUCHERISQUE/ACCIDENTEL"),
-            "resume": root.findtext("./CARTOUCHERISQUE/RESUME"),
-        }
+        with timings.span("parse"):
+            # Parse le XML
+            root = ET.fromstring(r.content)
+            
+            # Extraction des données
+            risque_elem = root.find("./CARTOUCHERISQUE/RISQUE")
+            data = {
+                "date_validite": root.attrib.get("DATEBULLETIN"),
+                "risque_actuel": risque_elem.attrib.get("RISQUEMAXI") if risque_elem is not None else None,
+                "risque_j2": risque_elem.attrib.get("RISQUEMAXIJ2") if risque_elem is not None else None,
+                "depart_spontane": root.findtext("./CARTOUCHERISQUE/NATUREL"),
+                "declenchement_skieur": root.findtext("./CARTOUCHERISQUE/ACCIDENTEL"),
+                "resume": root.findtext("./CARTOUCHERISQUE/RESUME"),
+            }
         return data
         
     except Exception:
@@ -135,6 +150,12 @@ def fetch_bera(massif_id, token):
 # EXÉCUTION PRINCIPALE
 # ──────────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Récupération des BERA Météo-France")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+    profile = Profile("bera_daily", enabled=args.profile)
+    
     print(f"🟢 Récupération BERA du {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     
     # Vérifie que l'APPLICATION_ID est configuré
@@ -145,6 +166,7 @@ if __name__ == "__main__":
         exit(1)
     
     # Génère le token automatiquement
+    profile.start()
     token = get_token()
     
     # Crée le dossier data s'il n'existe pas
@@ -169,14 +191,29 @@ if __name__ == "__main__":
     # ──────────────────────────────────────────────────────────
     
     if resultats:
-        keys = resultats[0].keys()
-        with open("data/bera_latest.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
+        with timings.span("write"):
+            keys = resultats[0].keys()
+            buffer = io.StringIO(newline="")
+            writer = csv.DictWriter(buffer, fieldnames=keys)
             writer.writeheader()
             writer.writerows(resultats)
+            # Écriture atomique : l'app ne lit jamais un CSV à moitié écrit
+            atomic_write_bytes("data/bera_latest.csv", buffer.getvalue().encode("utf-8"))
+            
+            dates = sorted(r["date_validite"] for r in resultats if r.get("date_validite"))
+            time_range = (dates[0], dates[-1]) if dates else None
+            update_manifest("bera", "data/bera_latest.csv", rows=len(resultats), time_range=time_range)
+            
+            # Nouvel instantané versionné + bascule atomique du pointeur CURRENT
+            snapshot = publish_snapshot({
+                "bera": {"path": "data/bera_latest.csv", "rows": len(resultats), "time_range": time_range}
+            })
+        print(f"📦 Instantané publié : {snapshot}")
     
     # Résumé
     print(f"✅ {len(resultats)} bulletins sauvés → data/bera_latest.csv")
+    print(timings.report())
+    timings.log(bulletins=len(resultats))
     
     # Statistiques risque
     if resultats:
@@ -185,4 +222,8 @@ if __name__ == "__main__":
             count = sum(1 for r in resultats if r.get("risque_actuel") == niveau)
             if count > 0:
                 emoji = "🟢" if niveau in ["1", "2"] else "🟡" if niveau == "3" else "🔴"
-                print(f"   {emoji} Risque {niveau}/5 : {count} massifs")
\ No newline at end of file
+                print(f"   {emoji} Risque {niveau}/5 : {count} massifs")
+    
+    profile.stop()
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
@@ -9,9 +9,15 @@ import os
 import xml.etree.ElementTree as ET
 import json
 import csv
+import io
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from data_version import atomic_write_bytes, update_manifest
+from snapshots import publish_snapshot
+
 # ──────────────────────────────────────────────────────────────
 # CONFIGURATION - Choisis UNE des deux méthodes
 # ──────────────────────────────────────────────────────────────
@@ -170,10 +176,22 @@ if __name__ == "__main__":
     
     if resultats:
         keys = resultats[0].keys()
-        with open("data/bera_latest.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(resultats)
+        buffer = io.StringIO(newline="")
+        writer = csv.DictWriter(buffer, fieldnames=keys)
+        writer.writeheader()
+        writer.writerows(resultats)
+        # Écriture atomique : l'app ne lit jamais un CSV à moitié écrit
+        atomic_write_bytes("data/bera_latest.csv", buffer.getvalue().encode("utf-8"))
+        
+        dates = sorted(r["date_validite"] for r in resultats if r.get("date_validite"))
+        time_range = (dates[0], dates[-1]) if dates else None
+        update_manifest("bera", "data/bera_latest.csv", rows=len(resultats), time_range=time_range)
+        
+        # Nouvel instantané versionné + bascule atomique du pointeur CURRENT
+        snapshot = publish_snapshot({
+            "bera": {"path": "data/bera_latest.csv", "rows": len(resultats), "time_range": time_range}
+        })
+        print(f"📦 Instantané publié : {snapshot}")
     
     # Résumé
     print(f"✅ {len(resultats)} bulletins sauvés → data/bera_latest.csv")
@@ -0,0 +1,50 @@
+"""
+Compile les modèles LightGBM du registre (dumps texte de models/) en forme
+binaire prête au memory-map, lue par l'app au démarrage (cf. tree_model.py).
+
+À relancer après chaque réentraînement ; un modèle compilé périmé (hash du
+dump différent) est ignoré par l'app, qui reparse alors le texte et le
+compile dans data/.derived/models/ (cf. tree_model.load_model) : sans ce
+script, seul le premier démarrage paie la conversion.
+
+    python scripts/build_models.py
+    python scripts/build_models.py models/skiability_regression_physical.txt
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from model_registry import MODEL_SPECS
+from tree_model import TreeEnsemble, compiled_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile les modèles LightGBM texte")
+    parser.add_argument("models", nargs="*", help="Dumps texte (défaut : modèles du registre)")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.models] or [
+        Path(spec.path) for spec in MODEL_SPECS.values() if Path(spec.path).exists()
+    ]
+    for path in paths:
+        t0 = time.perf_counter()
+        model = TreeEnsemble.from_lightgbm_text(path)
+        t1 = time.perf_counter()
+        target = compiled_path(path)
+        model.save(target)
+        t2 = time.perf_counter()
+        TreeEnsemble.load(target)
+        t3 = time.perf_counter()
+
+        size = sum(f.stat().st_size for f in target.iterdir())
+        print(f"✅ {path.name} → {target.name} : {model.num_trees} arbres, "
+              f"{len(model.feature_names)} features, {size / 1024:.0f} Ko")
+        print(f"   conversion {(t1 - t0) * 1000:.0f} ms · écriture {(t2 - t1) * 1000:.0f} ms · "
+              f"chargement compilé {(t3 - t2) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
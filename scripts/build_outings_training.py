@@ -0,0 +1,125 @@
+"""
+Table d'entraînement étiquetée à partir des sorties Camptocamp
+(scripts/fetch_camptocamp_outings.py) : une ligne par sortie rattachée au
+catalogue, avec les features météo 7 jours de sa date, les infos topo, le
+BERA du matin et les étiquettes (conditions Camptocamp, ressenti du récit).
+Cf. outings.training_table.
+
+    python scripts/build_outings_training.py
+    python scripts/build_outings_training.py --meteo data/meteo_archive --cycles window
+
+Avec l'archive météo, chaque mois de sorties est traité avec son propre
+extrait (mémoire bornée quelle que soit la profondeur d'historique).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from backtest import (
+    BERA_MAX_AGE, BERA_MIN_COVERAGE, SENTIMENT_FILE, bera_history, default_bera_files,
+)
+from catalogue import RouteCatalogue
+from data_loading import load_routes
+from data_version import ARTEFACTS
+from meteo_archive import ARCHIVE_ROOT, load_meteo, month_chunks
+from outings import OUTINGS_FILE, TRAINING_FILE, training_table
+from profiling import Profile
+from timing import Timings
+from weather import WeatherCube
+
+timings = Timings("build_outings_training")
+
+
+def meteo_periods(meteo, dates):
+    """Périodes traitées d'un bloc : les mois des sorties (archive) ou tout (parquet)"""
+    if not Path(meteo).is_dir():
+        return [(None, None)]
+    months = month_chunks(dates.min().date(), dates.max().date())
+    present = set(dates.dt.to_period("M"))
+    return [(s, e) for s, e in months if pd.Period(s, "M") in present]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table d'entraînement des sorties Camptocamp")
+    parser.add_argument("--outings", default=OUTINGS_FILE, help="Sorties consolidées (parquet)")
+    parser.add_argument("--meteo", default=ARCHIVE_ROOT if Path(ARCHIVE_ROOT).is_dir() else ARTEFACTS["meteo"],
+                        help="Archive météo partitionnée ou parquet (défaut : archive si présente)")
+    parser.add_argument("--routes", default=ARTEFACTS["routes"], help="Catalogue d'itinéraires (CSV)")
+    parser.add_argument("--bera", nargs="+", help="Fichiers BERA (défaut : courant + instantanés)")
+    parser.add_argument("--sentiment", default=SENTIMENT_FILE, help="Ressenti des récits (CSV)")
+    parser.add_argument("--cycles", choices=["daily", "window"], default="daily",
+                        help="Cycles gel/dégel : nombre de jours (défaut) ou indicateur de l'app")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="Garde les sorties sans météo (meteo_available = 0)")
+    parser.add_argument("--out", default=TRAINING_FILE, help="Fichier parquet de sortie")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+
+    print(f"🏷️  Table d'entraînement des sorties (cycles {args.cycles})")
+    t0 = time.perf_counter()
+    with Profile("build_outings_training", enabled=args.profile) as profile:
+        with timings.span("load"):
+            outings = pd.read_parquet(args.outings)
+            catalogue = RouteCatalogue(load_routes(args.routes))
+            bera = bera_history([pd.read_csv(f) for f in (args.bera or default_bera_files())])
+            sentiment = pd.read_csv(args.sentiment) if Path(args.sentiment).exists() else None
+        dates = pd.to_datetime(outings["date"]).dt.normalize()
+
+        parts = []
+        for start, end in meteo_periods(args.meteo, dates):
+            with timings.span("load"):
+                df_meteo = load_meteo(args.meteo, start, end)
+                if df_meteo.empty:
+                    print(f"   ⚠️  {start:%Y-%m} : pas de météo archivée")
+                    continue
+                cube = WeatherCube(df_meteo)
+            in_period = dates.between(pd.Timestamp(cube.dates[0]), pd.Timestamp(cube.dates[-1]))
+            if start is not None:
+                in_period &= dates.between(pd.Timestamp(start), pd.Timestamp(end))
+            if not in_period.any():
+                continue
+            with timings.span("merge"):
+                parts.append(training_table(outings[in_period.to_numpy()], catalogue, cube, bera,
+                                            sentiment, args.cycles, dropna=not args.keep_missing))
+            label = "tout l'historique" if start is None else f"{start:%Y-%m}"
+            print(f"   • {label} : {in_period.sum():,} sorties → {len(parts[-1]):,} lignes")
+
+        if not parts:
+            print("❌ Aucune sortie couverte par la météo")
+            return False
+        with timings.span("write"):
+            table = pd.concat(parts, ignore_index=True)
+            table["massif"] = table["massif"].astype("category")
+            out = Path(args.out)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            table.to_parquet(out, index=False, compression="snappy")
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
+
+    print(f"   ✅ {out} : {len(table):,} lignes, {table.shape[1]} colonnes "
+          f"({time.perf_counter() - t0:.1f} s)")
+    without_meteo = table["meteo_available"] == 0
+    print(f"   • Sorties : {len(outings):,} · au catalogue et avec météo : {(~without_meteo).sum():,}"
+          + (f" · sans météo (gardées) : {without_meteo.sum():,}" if args.keep_missing else ""))
+    if table.loc[without_meteo, ["freeze_thaw_cycles_7d", "spring_snow_score"]].notna().any(axis=None):
+        print("   ⚠️  Lignes sans météo avec des features météo renseignées : table incohérente")
+    print(f"   • Avec BERA : {table['bera_risk'].notna().mean():.0%} · "
+          f"avec conditions : {table['condition_score'].notna().mean():.0%}"
+          + (f" · avec ressenti : {table['sentiment'].notna().mean():.0%}" if "sentiment" in table else ""))
+    if table["bera_risk"].notna().mean() < BERA_MIN_COVERAGE:
+        print(f"   ⚠️  Historique BERA insuffisant (bulletins de plus de {BERA_MAX_AGE.days} jours "
+              f"ignorés) : bera_risk manquant, passer les bulletins de la période avec --bera")
+
+    print(f"\n{timings.report()}")
+    timings.log(rows=len(table), outings=len(outings), cycles=args.cycles)
+    return True
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,53 @@
+"""
+Précalcule la carte de skiabilité (score neige par maille météo et par jour)
+pour la version de données servie, dans data/.derived/.
+
+L'app la calcule elle-même au premier affichage si elle est absente ; ce
+script permet de le faire juste après la récupération météo.
+
+    python scripts/build_skiability_raster.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from catalogue import RouteCatalogue
+from data_loading import load_routes
+from data_version import save_derived
+from model_registry import ModelRegistry
+from raster import RASTER_TAG, grid_massifs, skiability_raster
+from snapshots import resolve_data
+from weather import WeatherCube
+
+
+def main():
+    resolved = resolve_data()
+    print(f"📦 Données {resolved.snapshot or 'data/'} (version {resolved.version})")
+
+    t0 = time.perf_counter()
+    cube = WeatherCube(pd.read_parquet(resolved.paths["meteo"]))
+    catalogue = RouteCatalogue(load_routes(resolved.paths["routes"]))
+    massifs = grid_massifs(cube, catalogue, cube.nearest_grids(catalogue.lat, catalogue.lon, k=5))
+    models = ModelRegistry()
+    t1 = time.perf_counter()
+
+    raster = skiability_raster(cube, models, massifs)
+    t2 = time.perf_counter()
+    save_derived(resolved.version, RASTER_TAG, raster)
+
+    values = raster["values"]
+    print(f"✅ {len(raster['dates'])} jours × {cube.n_grid} mailles "
+          f"({values.nbytes / 1024:.1f} Ko)")
+    print(f"   chargement {t1 - t0:.2f}s · calcul {t2 - t1:.2f}s")
+    for date, row in zip(raster["dates"], values):
+        if np.isfinite(row).any():
+            print(f"   {date} : moyenne {np.nanmean(row) * 10:.1f}/10, max {np.nanmax(row) * 10:.1f}/10")
+
+
+if __name__ == "__main__":
+    main()
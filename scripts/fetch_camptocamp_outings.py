@@ -0,0 +1,181 @@
+"""
+Sorties ski de rando Camptocamp des itinéraires du catalogue, rangées
+dans data/outings/ (cf. src/outings.py).
+
+Deux passes, chacune par lots demandés en parallèle (limiteur de débit,
+sessions par thread et reprises de src/http_pool.py, comme
+fetch_meteo_archive.py) :
+    1. sorties : /outings?r=<itinéraire>, un lot = un itinéraire
+    2. récits  : /outings/<id> des sorties sans récit, un lot = N sorties
+Chaque lot terminé est un point de reprise : relancer la même commande
+après une coupure ne redemande que les lots manquants. Un itinéraire
+ajouté au catalogue n'ajoute qu'un lot, sans décaler les autres.
+--refresh redemande les sorties de tous les itinéraires (nouvelles sorties).
+
+    python scripts/fetch_camptocamp_outings.py
+    python scripts/fetch_camptocamp_outings.py --max-chunks 5 --no-recits
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from catalogue import RouteCatalogue
+from data_loading import load_routes
+from data_version import ARTEFACTS
+from http_pool import request_json, run_chunks
+from meteo_archive import ArchiveWriter
+from outings import (
+    OUTING_COLUMNS, OUTINGS_ROOT, RECIT_COLUMNS, catalogue_route_ids, compact_outings,
+    compact_recits, consolidate, ids_key, parse_outing, parse_recit, read_parts,
+)
+from profiling import Profile
+from timing import Timings
+
+# Configuration
+BASE_URL = "https://api.camptocamp.org/outings"
+PAGE_SIZE = 100          # Maximum de l'API
+RECITS_PER_CHUNK = 50    # Sorties par lot (passe 2)
+WORKERS = 4              # Requêtes simultanées
+RATE = 2.0               # Requêtes par seconde au plus, tous threads confondus
+
+# Durées réseau / parsing / écriture (résumé en fin d'exécution, SKI_TIMINGS=0 pour couper)
+timings = Timings("fetch_camptocamp_outings")
+
+
+def fetch_route_outings(route_id, base_url, limiter, workers):
+    """Toutes les sorties ski de rando d'un itinéraire (pages de PAGE_SIZE)"""
+    rows, offset = [], 0
+    while True:
+        params = {"r": route_id, "act": "skitouring", "pl": "fr",
+                  "offset": offset, "limit": PAGE_SIZE}
+        data = request_json(base_url, params, limiter, workers, timer=timings)
+        documents = data.get("documents", [])
+        with timings.span("parse"):
+            rows += [row for row in (parse_outing(doc, route_id) for doc in documents) if row]
+        offset += len(documents)
+        if not documents or offset >= data.get("total", 0):
+            return rows
+
+
+def fetch_routes_chunk(writer, chunk, route_id, base_url, limiter, workers):
+    """Sorties d'un itinéraire → un fichier (même vide : lot terminé)"""
+    rows = fetch_route_outings(int(route_id), base_url, limiter, workers)
+    with timings.span("write"):
+        writer.write(chunk, compact_outings(rows))
+    return len(rows)
+
+
+def fetch_recits_chunk(writer, chunk, outing_ids, base_url, limiter, workers):
+    """Récits d'un lot de sorties (un document complet par sortie)"""
+    rows = []
+    for outing_id in outing_ids:
+        doc = request_json(f"{base_url}/{int(outing_id)}", {"cook": "fr"}, limiter, workers,
+                           timer=timings)
+        with timings.span("parse"):
+            rows.append(parse_recit(doc))
+    with timings.span("write"):
+        writer.write(chunk, compact_recits(rows), outings=len(outing_ids))
+    return len(rows)
+
+
+def route_chunks(route_ids):
+    """Lots (chunk, itinéraire) : un point de reprise par itinéraire"""
+    return [(f"routes/{route_id}", route_id) for route_id in route_ids]
+
+
+def recit_batches(ids, size):
+    """Lots (chunk, sorties) de récits : clé stable tirée des identifiants"""
+    groups = [ids[i:i + size] for i in range(0, len(ids), size)]
+    return [(f"recits/batch-{ids_key(group)}", group) for group in groups]
+
+
+def fetch_outings(routes_file=ARTEFACTS["routes"], base_url=BASE_URL, root=OUTINGS_ROOT,
+                  recits_per_chunk=RECITS_PER_CHUNK, workers=WORKERS, rate=RATE, max_chunks=None, refresh=False, recits=True):
+    """Remplit data/outings ; renvoie False si un lot a échoué"""
+    print("=" * 60)
+    print("🎿 SORTIES CAMPTOCAMP - SKI TOURING LIVE")
+    print("=" * 60)
+    print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    catalogue = RouteCatalogue(load_routes(routes_file))
+    route_ids = np.unique(catalogue_route_ids(catalogue))
+    route_ids = route_ids[route_ids >= 0].tolist()
+    print(f"🗺️  Catalogue : {catalogue.n} itinéraires dont {len(route_ids)} Camptocamp")
+    print(f"🔗 {base_url} · {workers} en parallèle · {rate:g} req/s max\n")
+
+    # Passe 1 : sorties par itinéraire
+    writer = ArchiveWriter(root, columns=OUTING_COLUMNS, compression="zstd")
+    chunks = route_chunks(route_ids)
+    todo = chunks if refresh else [(c, r) for c, r in chunks if not writer.is_done(c)]
+    done = len(chunks) - len(todo)
+    todo = todo[:max_chunks] if max_chunks is not None else todo
+    print(f"📦 Itinéraires : {len(chunks)} dont {done} déjà récupérés, {len(todo)} à récupérer")
+    rows, failed = run_chunks("sorties", fetch_routes_chunk, writer, todo, base_url, workers, rate)
+    with timings.span("consolidate"):
+        outings, _ = consolidate(root)
+    n_outings = 0 if outings is None else outings["id_sortie"].nunique()
+    print(f"   • {rows:,} sorties-itinéraires récupérées · {n_outings:,} sorties au total")
+
+    # Passe 2 : récits des sorties qui n'en ont pas encore
+    n_recits = 0
+    if recits and n_outings:
+        known = read_parts(root, "recits", columns=["id_sortie"])
+        known = set() if known is None else set(known["id_sortie"].tolist())
+        missing = sorted(set(outings["id_sortie"].tolist()) - known)
+        recit_writer = ArchiveWriter(root, columns=RECIT_COLUMNS, compression="zstd")
+        todo = [(c, ids) for c, ids in recit_batches(missing, recits_per_chunk)
+                if not recit_writer.is_done(c)]
+        todo = todo[:max_chunks] if max_chunks is not None else todo
+        print(f"\n📦 Récits : {len(known):,} déjà archivés, {len(missing):,} manquants "
+              f"({len(todo)} lots)")
+        n_recits, recit_failed = run_chunks("récits", fetch_recits_chunk, recit_writer, todo,
+                                            base_url, workers, rate)
+        failed += recit_failed
+        with timings.span("consolidate"):
+            consolidate(root)
+
+    print("\n📊 Statistiques :")
+    print(f"   • Sorties : {n_outings:,} · récits récupérés : {n_recits:,}")
+    print(f"   • Dossier : {root}")
+    print(f"\n{timings.report()}")
+    timings.log(outings=n_outings, recits=n_recits, failed=len(failed))
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} lot(s) en échec : relancer la même commande pour les reprendre")
+        return False
+    print("\n✅ Terminé !")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sorties Camptocamp des itinéraires du catalogue")
+    parser.add_argument("--routes", default=ARTEFACTS["routes"], help="Catalogue d'itinéraires (CSV)")
+    parser.add_argument("--base-url", default=BASE_URL, help="Point d'accès /outings (ou serveur local)")
+    parser.add_argument("--root", default=OUTINGS_ROOT, help="Dossier des sorties")
+    parser.add_argument("--recits-per-chunk", type=int, default=RECITS_PER_CHUNK,
+                        help="Sorties par lot de récits")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Requêtes simultanées")
+    parser.add_argument("--rate", type=float, default=RATE, help="Requêtes par seconde au plus (0 = libre)")
+    parser.add_argument("--max-chunks", type=int, help="Ne récupère que les N premiers lots manquants")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Redemande les sorties de tous les itinéraires")
+    parser.add_argument("--no-recits", action="store_true", help="Sorties seules, sans les récits")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+    try:
+        with Profile("fetch_camptocamp_outings", enabled=args.profile) as profile:
+            success = fetch_outings(args.routes, args.base_url, args.root, args.recits_per_chunk,
+                                    args.workers, args.rate, args.max_chunks, args.refresh,
+                                    not args.no_recits)
+        if profile.done:
+            print("🔬 Profil : {} · {}".format(*profile.save()))
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrompu : les lots terminés sont conservés, relancer pour reprendre")
+        exit(1)
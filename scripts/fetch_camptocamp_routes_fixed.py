@@ -3,17 +3,27 @@ Scraper Camptocamp API v6 pour récupérer des itinéraires ski de rando
 Format de sortie compatible avec itineraires_alpes.csv
 """
 
+import argparse
 import requests
 import pandas as pd
 import time
 from typing import List, Dict, Optional
 import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from profiling import Profile
+from timing import Timings
 
 # Configuration
 BASE_URL = "https://api.camptocamp.org/routes"
 OUTPUT_FILE = "data/raw/itineraires_alpes_camptocamp_new.csv"
 MAX_ROUTES = 600  # Nombre d'itinéraires à récupérer
 
+# Durées réseau / parsing / écriture (résumé en fin d'exécution, SKI_TIMINGS=0 pour couper)
+timings = Timings("fetch_camptocamp")
+
 # Mapping des massifs depuis les areas Camptocamp
 # UNIQUEMENT ALPES FRANÇAISES - correspond aux massifs BERA
 MASSIF_MAPPING = {
@@ -96,9 +106,10 @@ def fetch_routes_batch(offset: int = 0, limit: int = 100) -> Optional[Dict]:
     }
     
     try:
-        response = requests.get(BASE_URL, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        with timings.span("network"):
+            response = requests.get(BASE_URL, params=params, headers=headers, timeout=10)
+            response.raise_for_status()
+            return response.json()
     except requests.exceptions.RequestException as e:
         print(f"❌ Erreur requête API (offset {offset}): {e}")
         return None
@@ -326,23 +337,24 @@ def fetch_all_routes(max_routes: int = 600) -> List[Dict]:
         parsed_count = 0
         skip_reasons = {"no_coords": 0, "out_of_zone": 0, "no_denivele": 0, "no_massif": 0}
         
-        for doc in documents:
-            parsed = parse_route(doc)
-            if parsed:
-                all_routes.append(parsed)
-                parsed_count += 1
-            else:
-                # Compte les raisons de skip pour debug
-                if not doc.get("geometry"):
-                    skip_reasons["no_coords"] += 1
-                elif doc.get("geometry"):
-                    lat, lon = parse_coordinates(doc.get("geometry", {}))
-                    if lat and not (44.0 <= lat <= 47.5 and 5.0 <= lon <= 8.0):
-                        skip_reasons["out_of_zone"] += 1
-                    elif not doc.get("height_diff_up"):
-                        skip_reasons["no_denivele"] += 1
-                    else:
-                        skip_reasons["no_massif"] += 1
+        with timings.span("parse"):
+            for doc in documents:
+                parsed = parse_route(doc)
+                if parsed:
+                    all_routes.append(parsed)
+                    parsed_count += 1
+                else:
+                    # Compte les raisons de skip pour debug
+                    if not doc.get("geometry"):
+                        skip_reasons["no_coords"] += 1
+                    elif doc.get("geometry"):
+                        lat, lon = parse_coordinates(doc.get("geometry", {}))
+                        if lat and not (44.0 <= lat <= 47.5 and 5.0 <= lon <= 8.0):
+                            skip_reasons["out_of_zone"] += 1
+                        elif not doc.get("height_diff_up"):
+                            skip_reasons["no_denivele"] += 1
+                        else:
+                            skip_reasons["no_massif"] += 1
         
         reasons_str = ", ".join([f"{k}: {v}" for k, v in skip_reasons.items() if v > 0])
         print(f"   → {parsed_count} routes valides | Skip: {reasons_str} (Total: {len(all_routes)})")
@@ -404,8 +416,11 @@ def main():
     print(df_final["difficulty_ski"].value_counts())
     
     # Sauvegarde
-    df_final.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
+    with timings.span("write"):
+        df_final.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
     print(f"\n✅ Fichier sauvegardé: {OUTPUT_FILE}")
+    print(timings.report())
+    timings.log(routes=len(df_final))
     print(f"\n🎉 Terminé ! Tu peux maintenant utiliser ce CSV dans ton app.")
     
     # Preview avec URLs
@@ -415,4 +430,11 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scraper Camptocamp (itinéraires ski de rando)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+    with Profile("fetch_camptocamp", enabled=args.profile) as profile:
+        main()
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
@@ -0,0 +1,149 @@
+"""
+Historique météo horaire de la grille Alpes via l'API archive d'Open-Meteo,
+rangé dans l'archive partitionnée par mois (cf. src/meteo_archive.py).
+
+Même grille et mêmes variables que fetch_meteo_auto.py, mais par lots
+(points x mois) demandés en parallèle. Chaque lot terminé est un point de
+reprise : relancer la même commande après une coupure ne redemande que
+les lots manquants.
+
+    python scripts/fetch_meteo_archive.py --start 2024-12-01 --end 2025-04-30
+    python scripts/fetch_meteo_archive.py --start 2025-01-01 --end 2025-01-31 \\
+        --base-url http://127.0.0.1:8765/v1/archive    # cf. archive_stub_server.py
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from fetch_meteo_auto import RESOLUTION, generer_grille, parse_meteo_response
+from http_pool import RETRIES, request_json, run_chunks
+from meteo_archive import ARCHIVE_ROOT, ArchiveWriter, chunk_id, month_chunks
+from profiling import Profile
+from timing import Timings
+
+# Configuration
+BASE_URL = "https://archive-api.open-meteo.com/v1/archive"
+HOURLY_VARIABLES = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "wind_speed_10m",
+    "precipitation",
+    "snowfall",
+    "cloudcover",
+]
+BATCH_SIZE = 50   # Points par requête (un mois horaire ≈ 750 valeurs par point et variable)
+WORKERS = 4       # Requêtes simultanées
+RATE = 2.0        # Requêtes par seconde au plus, tous threads confondus
+
+# Durées réseau / parsing / écriture (résumé en fin d'exécution, SKI_TIMINGS=0 pour couper)
+timings = Timings("fetch_meteo_archive")
+
+
+def fetch_archive_batch(points_batch, start, end, base_url, limiter, workers, retries=RETRIES):
+    """Récupère l'historique horaire d'un lot de points sur [start, end]"""
+    params = {
+        "latitude": ",".join(str(p[0]) for p in points_batch),
+        "longitude": ",".join(str(p[1]) for p in points_batch),
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "hourly": ",".join(HOURLY_VARIABLES),
+        "timezone": "auto",
+    }
+    return request_json(base_url, params, limiter, workers, retries, timer=timings)
+
+
+def fetch_chunk(writer, chunk, points_batch, start, end, base_url, limiter, workers):
+    """Récupère, met en forme et écrit un lot ; renvoie son nombre de lignes"""
+    api_response = fetch_archive_batch(points_batch, start, end, base_url, limiter, workers)
+    with timings.span("parse"):
+        df = parse_meteo_response(api_response, points_batch)
+        if df is None or df.empty:
+            raise RuntimeError("aucune donnée valide")
+        df["time"] = pd.to_datetime(df["time"])
+    with timings.span("write"):
+        writer.write(chunk, df, start=start, end=end)
+    return len(df)
+
+
+def fetch_archive(start, end, base_url=BASE_URL, root=ARCHIVE_ROOT, batch_size=BATCH_SIZE,
+                  workers=WORKERS, rate=RATE, max_chunks=None):
+    """Remplit l'archive pour [start, end] ; renvoie False si un lot a échoué"""
+    print("=" * 60)
+    print("🗄️  ARCHIVE MÉTÉO ALPES - OPEN-METEO")
+    print("=" * 60)
+    print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    points = generer_grille()
+    batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+    months = month_chunks(start, end)
+    writer = ArchiveWriter(root)
+
+    todo, done, partial = [], 0, 0
+    for month_start, month_end in months:
+        for batch in batches:
+            chunk = chunk_id(month_start, batch)
+            covered = writer.coverage(chunk)
+            if writer.is_done(chunk, month_start, month_end):
+                done += 1
+                continue
+            s, e = month_start, month_end
+            if covered is not None:
+                # Le fichier du lot est remplacé en entier : redemande l'union des plages
+                partial += 1
+                s, e = min(s, covered[0]), max(e, covered[1])
+            todo.append((chunk, batch, s, e))
+    if max_chunks is not None:
+        todo = todo[:max_chunks]
+
+    print(f"🗺️  Grille : {len(points)} points (résolution {RESOLUTION}°), lots de {batch_size}")
+    print(f"📅 Période : {start} → {end} ({len(months)} mois)")
+    print(f"📦 Lots : {len(months) * len(batches)} dont {done} déjà archivés, {len(todo)} à récupérer "
+          f"(dont {partial} partiels à compléter)")
+    print(f"🔗 {base_url} · {workers} en parallèle · {rate:g} req/s max\n")
+
+    rows, failed = run_chunks("archive", fetch_chunk, writer, todo, base_url, workers, rate)
+
+    print("\n📊 Statistiques :")
+    print(f"   • Lots récupérés : {len(todo) - len(failed)}/{len(todo)} ({rows:,} lignes)")
+    print(f"   • Lots déjà archivés : {done}")
+    print(f"   • Archive : {root}")
+    print(f"\n{timings.report()}")
+    timings.log(rows=rows, chunks=len(todo), failed=len(failed), skipped=done)
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} lot(s) en échec : relancer la même commande pour les reprendre")
+        return False
+    print("\n✅ Terminé ! Lots archivés pour la période.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historique météo Open-Meteo (archive partitionnée)")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="Premier jour (AAAA-MM-JJ)")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Dernier jour (AAAA-MM-JJ)")
+    parser.add_argument("--base-url", default=BASE_URL, help="Point d'accès archive (ou serveur local)")
+    parser.add_argument("--root", default=ARCHIVE_ROOT, help="Dossier de l'archive")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Points par requête")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Requêtes simultanées")
+    parser.add_argument("--rate", type=float, default=RATE, help="Requêtes par seconde au plus (0 = libre)")
+    parser.add_argument("--max-chunks", type=int, help="Ne récupère que les N premiers lots manquants")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+    if args.end < args.start:
+        parser.error("--end avant --start")
+    try:
+        with Profile("fetch_meteo_archive", enabled=args.profile) as profile:
+            success = fetch_archive(args.start, args.end, args.base_url, args.root,
+                                    args.batch_size, args.workers, args.rate, args.max_chunks)
+        if profile.done:
+            print("🔬 Profil : {} · {}".format(*profile.save()))
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrompu : les lots terminés sont conservés, relancer pour reprendre")
+        exit(1)
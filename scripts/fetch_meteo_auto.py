@@ -3,11 +3,20 @@ Script automatisé pour récupérer les prévisions météo Alpes
 Via Open-Meteo (gratuit, pas de clé API nécessaire)
 """
 
+import argparse
+import io
 import requests
 import pandas as pd
 import pyarrow
-import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from data_version import atomic_write_bytes, update_manifest
+from snapshots import publish_snapshot
+from profiling import Profile
+from timing import Timings
 
 # Configuration
 OUTPUT_FILE = "data/meteo_cache.csv"
@@ -23,6 +32,10 @@ LATITUDE_MAX = 47.5
 LONGITUDE_MIN = 5.0
 LONGITUDE_MAX = 10.0
 
+# Durées réseau / parsing / écriture (résumé en fin d'exécution, SKI_TIMINGS=0 pour couper)
+timings = Timings("fetch_meteo")
+
+
 def generer_grille():
     """Génère une grille de points lat/lon sur les Alpes"""
     latitudes = [
@@ -67,9 +80,10 @@ def fetch_meteo_batch(points_batch):
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with timings.span("network"):
+            response = requests.post(url, json=payload, timeout=30)
+            response.raise_for_status()
+            return response.json()
     except requests.exceptions.RequestException as e:
         print(f"   ❌ Erreur API : {e}")
         return None
@@ -141,7 +155,8 @@ def fetch_all_meteo():
             print("❌ Échec")
             continue
         
-        df_batch = parse_meteo_response(api_response, batch)
+        with timings.span("parse"):
+            df_batch = parse_meteo_response(api_response, batch)
         if df_batch is not None and not df_batch.empty:
             all_dataframes.append(df_batch)
             print(f"✅ {len(df_batch)} lignes récupérées")
@@ -154,16 +169,29 @@ def fetch_all_meteo():
         return False
     
     print(f"\n💾 Consolidation et sauvegarde...")
-    df_final = pd.concat(all_dataframes, ignore_index=True)
-    df_final["time"] = pd.to_datetime(df_final["time"])
-    
-    # Sauvegarde
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    df_final.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
-    df_final.to_parquet(OUTPUT_FILEPARQUET, index = False, compression = 'snappy')
-    
+    with timings.span("parse"):
+        df_final = pd.concat(all_dataframes, ignore_index=True)
+        df_final["time"] = pd.to_datetime(df_final["time"])
+    
+    with timings.span("write"):
+        # Sauvegarde atomique : l'app ne lit jamais un fichier à moitié écrit
+        atomic_write_bytes(OUTPUT_FILE, df_final.to_csv(index=False).encode("utf-8"))
+        buffer = io.BytesIO()
+        df_final.to_parquet(buffer, index=False, compression="snappy")
+        atomic_write_bytes(OUTPUT_FILEPARQUET, buffer.getvalue())
+        
+        # Manifeste (hash du contenu) : l'app recharge exactement quand la météo change
+        time_range = (df_final["time"].min(), df_final["time"].max())
+        update_manifest("meteo", OUTPUT_FILEPARQUET, rows=len(df_final), time_range=time_range)
+        
+        # Nouvel instantané versionné + bascule atomique du pointeur CURRENT
+        snapshot = publish_snapshot({
+            "meteo": {"path": OUTPUT_FILEPARQUET, "rows": len(df_final), "time_range": time_range}
+        })
     
     print(f"   ✅ {OUTPUT_FILE}")
+    print(f"   ✅ {OUTPUT_FILEPARQUET} (manifeste mis à jour)")
+    print(f"   ✅ Instantané publié : {snapshot}")
     print(f"\n📊 Statistiques :")
     print(f"   • Lignes totales : {len(df_final):,}")
     print(f"   • Points géographiques : {df_final[['latitude', 'longitude']].drop_duplicates().shape[0]}")
@@ -171,13 +199,23 @@ def fetch_all_meteo():
     print(f"   • Température moyenne : {df_final['temperature_2m'].mean():.1f}°C")
     print(f"   • Précipitations totales : {df_final['precipitation'].sum():.1f} mm")
     
+    print(f"\n{timings.report()}")
+    timings.log(rows=len(df_final), points=n_points)
+    
     print(f"\n✅ Terminé ! Données prêtes pour l'app.")
     return True
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Récupération météo Open-Meteo (grille Alpes)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
     try:
-        success = fetch_all_meteo()
+        with Profile("fetch_meteo", enabled=args.profile) as profile:
+            success = fetch_all_meteo()
+        if profile.done:
+            print("🔬 Profil : {} · {}".format(*profile.save()))
         exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrompu par l'utilisateur")
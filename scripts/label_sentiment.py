@@ -0,0 +1,127 @@
+"""
+Ressenti des récits de sortie (data/outings/recits.parquet, cf.
+fetch_camptocamp_outings.py) → data/recit_sentiment_analysis.csv
+(id_sortie, sentiment, confidence). Lexique hors ligne : src/sentiment.py.
+
+Seules les sorties absentes du CSV sont traitées (--relabel : toutes).
+Les récits vides ne sont pas étiquetés : un 0.0 « neutre » ne se
+distinguerait pas d'un vrai récit neutre ; ils seront repris si un texte
+apparaît.
+Les résultats sont mis en cache par empreinte du texte et version du
+lexique : un récit identique (même sortie relancée, texte dupliqué) n'est
+jamais réanalysé. Les textes restants passent dans un ProcessPoolExecutor
+par paquets de --chunk-size.
+
+    python scripts/label_sentiment.py
+    python scripts/label_sentiment.py --relabel --workers 8
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from backtest import SENTIMENT_FILE
+from data_version import DERIVED_DIR, atomic_write_bytes
+from outings import RECITS_FILE
+from profiling import Profile
+from sentiment import LEXICON_VERSION, label_texts, recit_text, text_hash
+from timing import Timings
+
+CACHE_FILE = f"{DERIVED_DIR}/sentiment_cache.parquet"
+CHUNK_SIZE = 500
+
+timings = Timings("label_sentiment")
+
+
+def read_cache(path):
+    """Cache text_hash → (sentiment, confidence) de la version courante du lexique"""
+    if not Path(path).exists():
+        return pd.DataFrame(columns=["text_hash", "sentiment", "confidence"])
+    cache = pd.read_parquet(path)
+    return cache[cache["lexicon"] == LEXICON_VERSION].drop(columns="lexicon")
+
+
+def write_parquet(path, df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, compression="zstd")
+    atomic_write_bytes(path, buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ressenti des récits de sortie (lexique hors ligne)")
+    parser.add_argument("--recits", default=RECITS_FILE, help="Récits consolidés (parquet)")
+    parser.add_argument("--out", default=SENTIMENT_FILE, help="CSV id_sortie, sentiment, confidence")
+    parser.add_argument("--cache", default=CACHE_FILE, help="Cache par empreinte de texte")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processus")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Textes par paquet")
+    parser.add_argument("--relabel", action="store_true",
+                        help="Réétiquette toutes les sorties (le cache reste utilisé)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile + tracemalloc) dans profiles/")
+    args = parser.parse_args()
+
+    print(f"💬 Ressenti des récits (lexique {LEXICON_VERSION})")
+    t0 = time.perf_counter()
+    with Profile("label_sentiment", enabled=args.profile) as profile:
+        with timings.span("load"):
+            recits = pd.read_parquet(args.recits)
+            existing = None
+            if Path(args.out).exists() and not args.relabel:
+                existing = pd.read_csv(args.out)
+                recits = recits[~recits["id_sortie"].isin(existing["id_sortie"])]
+            cache = read_cache(args.cache)
+
+        with timings.span("hash"):
+            todo = pd.DataFrame({
+                "id_sortie": recits["id_sortie"].to_numpy(),
+                "text": recit_text(recits).to_numpy() if len(recits) else [],
+            })
+            no_text = todo["text"] == ""
+            todo = todo[~no_text].reset_index(drop=True)
+            todo["text_hash"] = todo["text"].map(text_hash)
+
+        if todo.empty:
+            print(f"   ✅ Aucune nouvelle sortie à étiqueter ({no_text.sum():,} sans texte)")
+            return True
+        known = todo["text_hash"].isin(cache["text_hash"])
+        fresh = todo[~known].drop_duplicates("text_hash")
+
+        with timings.span("label"):
+            labels = label_texts(fresh["text"], args.workers, args.chunk_size)
+        new_cache = pd.DataFrame(labels, columns=["sentiment", "confidence"])
+        new_cache.insert(0, "text_hash", fresh["text_hash"].to_numpy())
+        cache = pd.concat([cache, new_cache], ignore_index=True)
+
+        with timings.span("write"):
+            result = todo[["id_sortie", "text_hash"]].merge(cache, on="text_hash", how="left")
+            result = result[["id_sortie", "sentiment", "confidence"]]
+            if existing is not None:
+                result = pd.concat([existing, result], ignore_index=True)
+            result = result.drop_duplicates("id_sortie", keep="last")
+            atomic_write_bytes(args.out, result.to_csv(index=False).encode("utf-8"))
+            write_parquet(args.cache, cache.assign(lexicon=LEXICON_VERSION))
+    if profile.done:
+        print("🔬 Profil : {} · {}".format(*profile.save()))
+
+    elapsed = time.perf_counter() - t0
+    print(f"   • Nouvelles sorties : {len(todo):,} · en cache : {known.sum():,} · "
+          f"analysées : {len(fresh):,} ({args.workers} processus, paquets de {args.chunk_size})")
+    print(f"   • Sans texte, non étiquetées : {no_text.sum():,}")
+    print("   • Répartition : " + ", ".join(
+        f"{k} {v}" for k, v in result["sentiment"].value_counts().items()))
+    print(f"   ✅ {args.out} : {len(result):,} sorties ({elapsed:.1f} s)")
+
+    print(f"\n{timings.report()}")
+    timings.log(outings=len(todo), cached=int(known.sum()), labelled=len(fresh),
+                no_text=int(no_text.sum()), workers=args.workers)
+    return True
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,61 @@
+"""
+Recalcule data/manifest.json à partir des fichiers présents sur le disque.
+À lancer après une modification manuelle des données (ex: nettoyage du
+catalogue d'itinéraires), les scripts de récupération le faisant déjà.
+
+    python scripts/update_manifest.py                   # manifeste seul
+    python scripts/update_manifest.py --publish         # + nouvel instantané servi par l'app
+    python scripts/update_manifest.py routes --publish  # catalogue modifié seulement
+
+Tant qu'aucun instantané n'est publié, l'app lit directement les fichiers
+modifiés (cf. snapshots.resolve_data).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from data_version import ARTEFACTS, MANIFEST_PATH, update_manifest
+from snapshots import publish_snapshot
+
+
+def time_range_of(name, path):
+    """Plage temporelle couverte par un artefact (None si sans objet)"""
+    if name == "meteo":
+        times = pd.read_parquet(path, columns=["time"])["time"]
+        return len(times), (times.min(), times.max())
+    if name == "bera":
+        df = pd.read_csv(path)
+        dates = pd.to_datetime(df["date_validite"], format="ISO8601", errors="coerce")
+        return len(df), (dates.min(), dates.max())
+    return len(pd.read_csv(path)), None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("artefacts", nargs="*", metavar="ARTEFACT",
+                        help=f"artefacts à enregistrer (défaut : tous ; {', '.join(ARTEFACTS)})")
+    parser.add_argument("--publish", action="store_true",
+                        help="publie aussi un instantané dans data/snapshots/")
+    args = parser.parse_args()
+    unknown = sorted(set(args.artefacts) - set(ARTEFACTS))
+    if unknown:
+        parser.error(f"artefact inconnu : {', '.join(unknown)}")
+
+    updates = {}
+    for name in args.artefacts or ARTEFACTS:
+        path = ARTEFACTS[name]
+        if not Path(path).exists():
+            print(f"⚠️  {name} : fichier absent ({path})")
+            continue
+        rows, time_range = time_range_of(name, path)
+        manifest = update_manifest(name, path, rows=rows, time_range=time_range)
+        updates[name] = {"path": path, "rows": rows, "time_range": time_range}
+        print(f"✅ {name} : {rows} lignes")
+    print(f"\n🔖 Version données : {manifest['version']} → {MANIFEST_PATH}")
+
+    if args.publish:
+        print(f"📦 Instantané publié : {publish_snapshot(updates)}")
@@ -1,13 +1,25 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import numpy as np
 import os
-import folium
 import pyarrow
-import lightgbm as lgb
+import weakref
+from contextlib import contextmanager
 from streamlit_folium import st_folium
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime
 from math import radians, cos, sin, sqrt, atan2
+from data_loading import DATA_FIELDS, WEATHER_ALERTS, get_weather_icon, load_data
+from data_version import load_derived, read_manifest, save_derived
+from result_cache import ResultCache, normalise_query
+from scoring import build_recommendation, score_routes, select_top_n, snow_details
+from maps import catalogue_geojson, default_map, map_html, results_map
+from model_registry import ModelRegistry
+from raster import RASTER_TAG, grid_massifs, rasterize, skiability_raster, to_rgba
+from snapshots import MANIFEST_NAME, SNAPSHOT_ROOT, SnapshotWatcher
+from timing import ENV_ENABLED, Timings
+from profiling import Profile, profiling_requested
+from memory import ENV_BUDGET, budget_bytes, deep_size, evict_until, format_bytes, memory_report, process_rss
 
 
 
@@ -18,587 +30,279 @@ from math import radians, cos, sin, sqrt, atan2
 
 st.set_page_config(page_title="Ski Touring Live", layout="wide",initial_sidebar_state="expanded")
 
-# ============================================================================
-# FONCTIONS UTILITAIRES
-# ============================================================================
+# Durées des étapes de ce rerun (panneau Debug + une ligne JSON en fin de script)
+timings = Timings("app")
 
+# Profilage de la recherche (?profile=1 ou SKI_PROFILE=1), résultat dans le panneau Debug
+profiling = profiling_requested(st.query_params)
 
-def get_weather_icon(meteo):
-    """
-    Retourne un emoji météo selon les conditions.
-    Basé sur température, neige, précipitations, vent.
-    """
-    snow = meteo.get('total_snow', 0)
-    temp = meteo.get('mean_temp', 0)
-    precip = meteo.get('total_precip', 0)
-    wind = meteo.get('max_wind', 0)
-    
-    # Vent dominant
-    if wind > 40:
-        return "💨"  # Vent fort
-    
-    # Neige
-    if snow > 20:
-        return "🌨️"  # Neige forte
-    elif snow > 5:
-        return "🌨"   # Neige modérée
-    
-    # Pluie (temp positive + précip)
-    if temp > 0 and precip > 5:
-        return "🌧️"
-    
-    # Conditions spéciales (danger)
-    if temp > 0 and snow > 10:
-        return "⚠️"  # Neige + chaleur = transformation
-    
-    # Temps sec et froid (ciel clair probable)
-    if temp < -5 and snow < 2:
-        return "☀️"  # Beau temps froid
-    
-    # Temps doux
-    if temp > 0:
-        return "🌤️"  # Partiellement nuageux
-    
-    # Par défaut
-    return "⛅"  # Nuageux
+# ============================================================================
+# MODÈLES ET DONNÉES
+# ============================================================================
 
 @st.cache_resource
-def load_physical_model():
-    """Charge le modèle LightGBM une seule fois."""
-    model_path = "models/skiability_regression_physical.txt"
-    if os.path.exists(model_path):
-        return lgb.Booster(model_file=model_path)
-    return None
-
-ski_model = load_physical_model()
-
-
-def spring_activation_factor(snowfall_7d):
-    """Facteur d'activation du score de printemps selon la neige récente"""
-    if snowfall_7d <= 3:
-        return 1.0
-    elif snowfall_7d <= 10:
-        return 0.5
-    else:
-        return 0.0
-
+def get_model_registry():
+    """Registre des modèles, partagé ; chaque modèle est chargé à son premier usage."""
+    return ModelRegistry()
 
-def freeze_quality(temp_min):
-    """Qualité du regel nocturne"""
-    if temp_min <= -6:
-        return 1.0
-    elif temp_min <= -3:
-        return 0.8
-    elif temp_min <= -1:
-        return 0.6
-    else:
-        return 0.2
+model_registry = get_model_registry()
 
 
-def thermal_amplitude_quality(temp_amp):
-    """Qualité de l'amplitude thermique jour/nuit"""
-    if temp_amp >= 12:
-        return 1.0
-    elif temp_amp >= 8:
-        return 0.8
-    elif temp_amp >= 5:
-        return 0.6
-    else:
-        return 0.3
-
-
-def wind_penalty_spring(wind_max):
-    """Pénalité vent pour conditions de printemps"""
-    if wind_max <= 15:
-        return 1.0
-    elif wind_max <= 30:
-        return 0.7
-    else:
-        return 0.4
-
-
-def compute_spring_snow_score(features):
+# 1. Chargement unique + surveillance du pointeur data/snapshots/CURRENT.
+# Une nouvelle version est chargée en tâche de fond puis substituée par une
+# seule affectation : les requêtes ne bloquent jamais sur un rechargement.
+def timed_load_data(paths, version):
     """
-    Calcule le score de qualité neige pour conditions de printemps.
-    Privilégie regel/dégel avec faible neige récente.
-    
-    Returns: float [0-1]
+    load_data chronométré, avec sa propre ligne de log : le premier
+    chargement comme les rechargements du thread de surveillance, qui
+    n'appartiennent à aucun rerun.
     """
-    activation = spring_activation_factor(features["snowfall_7d_sum"])
-    if activation == 0:
-        return 0.0
-
-    freeze = freeze_quality(features["temp_min_7d_avg"])
-    amp = thermal_amplitude_quality(features["temp_amp_7d_avg"])
-    wind = wind_penalty_spring(features["wind_max_7d"])
-
-    raw_score = (
-        0.45 * freeze +
-        0.35 * amp +
-        0.20 * wind
-    )
+    load_timings = Timings("app.data_load")
+    with load_timings.span("load_data"):
+        data = load_data(paths, version)
+    load_timings.log(data_version=version)
+    return data
 
-    return round(raw_score * activation, 3)
 
+@st.cache_resource(show_spinner="📥 Chargement des données...")
+def get_data_watcher():
+    return SnapshotWatcher(timed_load_data, poll_interval=30)
 
-def compute_base_snow_score_boosted(features, date_sortie):
-    """
-    Score hiver avec correction du biais avalanche via power boost.
-    
-    Le modèle ML sous-estime les bonnes conditions de poudreuse car 
-    les gens sortent moins quand il y a risque d'avalanche.
-    On applique un boost pour corriger ce biais.
-    
-    Returns: float [0-1]
-    """
-    if not ski_model:
-        return 0.5  # Fallback si pas de modèle
-    
-    # Préparation du vecteur pour LightGBM
-    input_data = pd.DataFrame([{
-        "temp_min_7d_avg": features["temp_min_7d_avg"],
-        "temp_max_7d_avg": features["temp_max_7d_avg"],
-        "temp_amp_7d_avg": features["temp_amp_7d_avg"],
-        "snowfall_7d_sum": features["snowfall_7d_sum"],
-        "wind_max_7d": features["wind_max_7d"],
-        "freeze_thaw_cycles_7d": features["freeze_thaw_cycles_7d"],
-        "summit_altitude_clean": features.get("summit_altitude_clean", 2400),
-        "topo_denivele": features.get("topo_denivele", 1200),
-        "topo_difficulty": features.get("topo_difficulty", 3),
-        "massif": features.get("massif", "MONT-BLANC"),
-        "day_of_week": date_sortie.weekday()
-    }])
-    
-    # Conversion catégorielle
-    input_data["massif"] = input_data["massif"].astype("category")
-    
-    # Prédiction
-    score = ski_model.predict(input_data)[0]
-    
-    # Normalisation [-1, 1] → [0, 1]
-    normalized = np.clip((score + 1) / 2, 0, 1)
-    ml_boosted = 1 - (1 - normalized) ** 1.5
-    final_score = winter_exception_boost(ml_boosted, features)
-    
-    # Exposant 0.65 rehausse les scores moyens sans dénaturer
-    final_score = final_score ** 0.65
-    
-    
-    return round(final_score, 3)
+try:
+    data_watcher = get_data_watcher()
+except FileNotFoundError as e:
+    st.error(f"❌ Fichier manquant : {e.filename or e}")
+    st.stop()
 
+# 2. Une seule lecture de la référence par rerun : données cohérentes
+# pendant tout le script même si une bascule a lieu entre-temps
+data_state = data_watcher.current
+data_version = data_state.version
+(df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+ route_grids, route_risk, route_risk_level, outlook) = data_state.data
 
-def compute_hybrid_snow_score(features, date_sortie):
-    """
-    Score hybride intelligent qui combine base et spring selon la saison.
-    
-    Logique :
-    - Jan-Fév : 100% base (hiver pur)
-    - Mars : transition progressive (100% base → 60% spring)
-    - Avr-Juin : max(spring, base*0.7) - priorité printemps
-    - Reste : 100% base
-    
-    Returns: float [0-1]
-    """
-    month = date_sortie.month
-    
-    # Calcul des deux scores
-    spring_score = compute_spring_snow_score(features)
-    base_score = compute_base_snow_score_boosted(features, date_sortie)
-    
-    # Hiver pur (janvier-février)
-    if month <= 2:
-        return base_score, base_score, spring_score, "hiver"
-    
-    # Transition hiver → printemps (mars)
-    elif month == 3:
-        day = date_sortie.day
-        spring_weight = min(day / 31 * 0.6, 0.6)  # 0 → 0.6 progressif
-        hybrid = (1 - spring_weight) * base_score + spring_weight * spring_score
-        return hybrid, base_score, spring_score, "transition"
-    
-    # Saison de printemps (avril-juin)
-    elif 4 <= month <= 6:
-        hybrid = max(spring_score, base_score * 0.7)
-        return hybrid, base_score, spring_score, "printemps"
-    
-    # Reste de l'année
-    else:
-        return base_score, base_score, spring_score, "hiver"
 
 # ============================================================================
-# BOOST HIVER MÉTIER (JOURNÉES EXCEPTIONNELLES)
+# SCORES DU CATALOGUE (CACHE DE SESSION)
 # ============================================================================
 
-def is_exceptional_winter_day(features):
-    """
-    Détecte une journée de ski hivernal exceptionnelle (poudreuse froide, calme).
-    """
-    return (
-        features["snowfall_7d_sum"] >= 25 and
-        features["temp_min_7d_avg"] <= -6 and
-        features["wind_max_7d"] <= 35
-    )
+SCORE_CACHE_SIZE = 8
+
+
+class SessionScores(dict):
+    """Scores d'une session, LRU (sous-classe de dict : référençable par weakref)"""
 
 
-def winter_exception_boost(base_score, features):
+@st.cache_resource
+def get_score_caches():
     """
-    Déplafonne volontairement les très bonnes journées d'hiver,
-    sans casser la hiérarchie du score.
+    Caches de scores de toutes les sessions, par id de session. Références
+    faibles : un cache disparaît avec sa session ; l'éviction mémoire peut
+    ainsi réduire ceux de toutes les sessions, pas seulement la courante.
     """
-    if not is_exceptional_winter_day(features):
-        return base_score
-
-    headroom = 1.0 - base_score
-    boosted = base_score + 0.5 * headroom
+    return weakref.WeakValueDictionary()
 
-    return round(min(boosted, 1.0), 3)
 
+def session_score_cache():
+    cache = st.session_state.get("score_cache")
+    if cache is None:
+        cache = st.session_state.score_cache = SessionScores()
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            get_score_caches()[ctx.session_id] = cache
+    return cache
 
-# ============================================================================
-# CHARGEMENT DES DONNÉES (Optimisé pour Streamlit Cloud)
-# ============================================================================
 
-@st.cache_data(ttl=600, show_spinner="📥 Mise à jour des données en cours...")
-def load_data(_bera_hash, _meteo_hash, _itin_hash):
+def catalogue_scores(date_sortie, niveau, dplus_min, dplus_max):
     """
-    Charge et normalise les données. 
-    L'underscore devant les arguments (_bera_hash) indique à Streamlit 
-    de ne pas inspecter l'objet lui-même, ce qui accélère le cache.
+    Scores de tout le catalogue pour (date, niveau, D+), gardés en session
+    avec la météo du jour qui a servi à les calculer.
+    Changer massifs, expositions, zone ou N ne fait que re-filtrer et
+    re-sélectionner le top N à partir de ces tableaux.
     """
-    # ------------------------
-    # BERA
-    # ------------------------
-    df_bera = pd.read_csv("data/bera_latest.csv")
-    df_bera["massif"] = df_bera["massif"].astype(str).str.strip().str.upper()
-    df_bera["date_validite"] = pd.to_datetime(
-            df_bera["date_validite"], 
-            format="ISO8601",
-            errors="coerce"
-    )
+    key = (data_version, date_sortie, niveau, dplus_min, dplus_max)
+    cache = session_score_cache()
+    hit = cache.pop(key, None)  # pop : l'éviction peut vider le cache entre-temps
+    if hit is not None:
+        cache[key] = hit  # Remonte en tête (LRU)
+        return hit
     
-    dict_bera = dict(
-        zip(df_bera["massif"], df_bera["risque_actuel"].astype(float) / 5.0)
-    )
-
-    # ------------------------
-    # MÉTÉO
-    # ------------------------
-    #df_meteo = pd.read_csv("data/meteo_cache.csv")
-    #df_meteo["time"] = pd.to_datetime(df_meteo["time"], errors="coerce")
-    df_meteo = pd.read_parquet("data/meteo_cache.parquet")
-
-    unique_grids = (
-        df_meteo[["latitude", "longitude"]]
-        .dropna()
-        .drop_duplicates()
-        .reset_index(drop=True)
-    )
-
-    # ------------------------
-    # ITINÉRAIRES
-    # ------------------------
-    try:
-        df = pd.read_csv("data/raw/itineraires_alpes_camptocamp.csv", encoding="utf-8")
-    except UnicodeDecodeError:
-        df = pd.read_csv("data/raw/itineraires_alpes_camptocamp.csv", encoding="cp1252")
-
-    df["massif"] = df["massif"].astype(str).str.strip().str.upper()
+    with timings.span("scoring"):
+        meteo = cube.route_meteo(*route_grids, date_sortie)
+        scores = score_routes(catalogue, meteo, route_risk, niveau, dplus_min, dplus_max)
     
-    numeric_cols = ["lat", "lon", "denivele_positif"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    df = df.dropna(subset=["lat", "lon", "denivele_positif"])
-
-    return df, df_bera, dict_bera, df_meteo, unique_grids
-
-# 1. Vérification de sécurité
-REQUIRED_FILES = [
-    "data/bera_latest.csv",
-    "data/meteo_cache.csv",
-    "data/raw/itineraires_alpes_camptocamp.csv"
-]
-
-for f in REQUIRED_FILES:
-    if not os.path.exists(f):
-        st.error(f"❌ Fichier manquant : {f}")
-        st.stop()
+    cache[key] = (scores, meteo)
+    while len(cache) > SCORE_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    return scores, meteo
 
-# 2. Utilisation combinée du Timestamp et du TTL
-# On passe les mtime en arguments pour que Streamlit sache quand les fichiers changent sur le disque
-bera_mtime = os.path.getmtime("data/bera_latest.csv")
-meteo_mtime = os.path.getmtime("data/meteo_cache.csv")
-itin_mtime = os.path.getmtime("data/raw/itineraires_alpes_camptocamp.csv")
 
-# 3. Chargement avec les "hashes" de fichiers
-df, df_bera, dict_bera, df_meteo, unique_grids = load_data(
-    bera_mtime, meteo_mtime, itin_mtime
-)
-
-
-
-def build_grid_lookup(unique_grids):
-    return unique_grids.reset_index(drop=True)
-
-grid_lookup = build_grid_lookup(unique_grids)
+# ============================================================================
+# CACHE DE RÉSULTATS PARTAGÉ (TOUTES SESSIONS)
+# ============================================================================
 
+@st.cache_resource
+def get_result_cache():
+    """LRU process-wide : les requêtes identiques de tous les utilisateurs"""
+    return ResultCache(maxsize=256, ttl=600)
 
+result_cache = get_result_cache()
 
 
-def get_physical_features(lat, lon, target_date, n_neighbors=5):
+def compute_recommendation(date_sortie, niveau, dplus_range, massifs, expositions,
+                           n_results, near=None, bbox=None):
     """
-    Version améliorée avec lissage spatial sur les N grilles les plus proches.
-    
-    Args:
-        lat, lon: Coordonnées du sommet
-        target_date: Date cible
-        n_neighbors: Nombre de grilles voisines à moyenner (3-5 recommandé)
-    
-    Returns:
-        dict: Features météo lissées ou None si pas de données
+    Filtre + scoring + top N. Renvoie une Recommendation (ou None si aucun
+    itinéraire ne passe les filtres) portant météo et BERA du top N.
+    Le détail IA (features + score neige) est calculé après l'affichage.
     """
-    # 1. Trouve les N grilles les plus proches
-    coords = grid_lookup[['latitude', 'longitude']].to_numpy()
-    dists = np.sqrt((coords[:, 0] - lat)**2 + (coords[:, 1] - lon)**2)
-    
-    # Indices des N plus proches
-    closest_indices = np.argsort(dists)[:n_neighbors]
-    closest_grids = grid_lookup.iloc[closest_indices]
-    closest_dists = dists[closest_indices]
-    
-    # 2. Définit la fenêtre temporelle
-    start_date = pd.to_datetime(target_date) - pd.Timedelta(days=7)
-    end_date = pd.to_datetime(target_date)
-    
-    # 3. Collecte les données de chaque grille avec pondération inverse distance
-    all_features = []
-    weights = []
-    
-    for idx, (_, grid) in enumerate(closest_grids.iterrows()):
-        mask = (
-            (df_meteo['latitude'] == grid['latitude']) & 
-            (df_meteo['longitude'] == grid['longitude']) &
-            (df_meteo['time'] > start_date) &
-            (df_meteo['time'] <= end_date)
+    with timings.span("filter"):
+        idx_filtered = catalogue.filter(
+            massifs=massifs,
+            dplus_min=dplus_range[0],
+            dplus_max=dplus_range[1],
+            expositions=expositions,
+            near=near,
+            bbox=bbox
         )
-        df_hist = df_meteo[mask]
-        
-        if not df_hist.empty:
-            # Calcul des features pour cette grille
-            t_min = df_hist['temperature_2m'].min()
-            t_max = df_hist['temperature_2m'].max()
-            
-            features = {
-                "temp_min_7d_avg": t_min,
-                "temp_max_7d_avg": t_max,
-                "temp_amp_7d_avg": t_max - t_min,
-                "snowfall_7d_sum": df_hist['snowfall'].sum(),
-                "wind_max_7d": df_hist['wind_speed_10m'].max(),
-                "freeze_thaw_cycles_7d": ((df_hist['temperature_2m'].max() > 0) & 
-                                           (df_hist['temperature_2m'].min() < 0)).sum()
-            }
-            all_features.append(features)
-            
-            # Poids inversement proportionnel à la distance (+ epsilon pour éviter division par 0)
-            weight = 1.0 / (closest_dists[idx] + 0.01)
-            weights.append(weight)
-    
-    if not all_features:
+    if len(idx_filtered) == 0:
         return None
     
-    # 4. Moyenne pondérée des features
-    weights = np.array(weights)
-    weights = weights / weights.sum()  # Normalisation
+    # Scores de tout le catalogue (cache de session par date/niveau/D+)
+    scores, meteo = catalogue_scores(date_sortie, niveau, dplus_range[0], dplus_range[1])
     
-    smoothed_features = {
-        # Moyennes pondérées pour variables continues
-        "temp_min_7d_avg": sum(f["temp_min_7d_avg"] * w for f, w in zip(all_features, weights)),
-        "temp_max_7d_avg": sum(f["temp_max_7d_avg"] * w for f, w in zip(all_features, weights)),
-        "temp_amp_7d_avg": sum(f["temp_amp_7d_avg"] * w for f, w in zip(all_features, weights)),
-        "snowfall_7d_sum": sum(f["snowfall_7d_sum"] * w for f, w in zip(all_features, weights)),
-        
-        # MAX pour le vent (approche conservatrice pour la sécurité)
-        "wind_max_7d": max(f["wind_max_7d"] for f in all_features),
-        
-        # Round pour variable discrète
-        "freeze_thaw_cycles_7d": int(round(sum(f["freeze_thaw_cycles_7d"] * w for f, w in zip(all_features, weights))))
-    }
-    return smoothed_features
+    # Top N résultats (sélection partielle)
+    with timings.span("top_n"):
+        top_idx = select_top_n(scores, idx_filtered, n_results)
+        return build_recommendation(meteo, route_risk_level, scores, top_idx, len(idx_filtered))
 
-# ============================================================================
 
 # ============================================================================
-# FONCTION MÉTÉO AMÉLIORÉE
+# DÉTAIL IA À LA DEMANDE (FEATURES 7 JOURS + SCORE NEIGE)
 # ============================================================================
 
-@st.cache_data(ttl=3600)
+@st.cache_resource
+def get_details_cache():
+    """Détail IA mémoïsé par (version, itinéraire, date), toutes sessions"""
+    return ResultCache(maxsize=4096, ttl=None)
+
+details_cache = get_details_cache()
 
-def get_meteo_agg(lat, lon, target_date=None, n_neighbors=3):
+
+def scoring_details(idx, date_sortie, use_cache=True):
     """
-    Météo agrégée avec lissage spatial sur N grilles proches.
-    Version améliorée pour réduire les artefacts.
+    Détail IA des itinéraires affichés. Les itinéraires déjà vus (même
+    version de données, même date) sont relus ; les autres sont calculés
+    ensemble, en un seul predict. use_cache=False recalcule tout (profilage)
+    et rafraîchit le cache.
     """
-    if target_date is None:
-        target_date = datetime.today().date()
-    
-    # 1. Trouve les N grilles les plus proches
-    coords = grid_lookup[['latitude', 'longitude']].to_numpy()
-    dists = np.sqrt((coords[:, 0] - lat)**2 + (coords[:, 1] - lon)**2)
-    
-    closest_indices = np.argsort(dists)[:n_neighbors]
-    closest_grids = grid_lookup.iloc[closest_indices]
-    closest_dists = dists[closest_indices]
-    
-    # 2. Collecte les données de chaque grille
-    all_meteo = []
-    weights = []
-    
-    for idx, (_, grid) in enumerate(closest_grids.iterrows()):
-        df_day = df_meteo[
-            (df_meteo['latitude'] == grid['latitude']) & 
-            (df_meteo['longitude'] == grid['longitude']) & 
-            (df_meteo['time'].dt.date == target_date)
-        ]
+    keys = [(data_version, int(i), date_sortie) for i in idx]
+    found = details_cache.get_many(keys) if use_cache else {}
+    missing = [int(i) for i, k in zip(idx, keys) if k not in found]
+    if missing:
+        with timings.span("model"):
+            computed = snow_details(catalogue, cube, route_grids, missing, date_sortie, models=model_registry)
+        new = {(data_version, i, date_sortie): d for i, d in zip(missing, computed)}
+        details_cache.put_many(new)
+        found.update(new)
+    return [found[k] for k in keys]
+
+
+def render_snow_details(details):
+    """Qualité de neige prédite + expander '📈 Détails du scoring IA'"""
+    features_meteo = details["features"]
+    
+    if details["snow"] is not None:
+        hybrid_score = details["snow"]["hybrid"]
+        base_score = details["snow"]["base"]
+        spring_score = details["snow"]["spring"]
+        saison = details["saison"]
         
-        # Fallback si pas de données pour cette date
-        if df_day.empty:
-            df_grid = df_meteo[
-                (df_meteo['latitude'] == grid['latitude']) & 
-                (df_meteo['longitude'] == grid['longitude'])
-            ]
-            if not df_grid.empty:
-                df_grid_copy = df_grid.copy()
-                df_grid_copy['date_diff'] = abs((df_grid_copy['time'].dt.date - target_date).apply(lambda x: x.days))
-                closest_date_idx = df_grid_copy['date_diff'].idxmin()
-                closest_date = df_grid.loc[closest_date_idx, 'time'].date()
-                df_day = df_grid[df_grid['time'].dt.date == closest_date]
+        # Conversion en note sur 10
+        note_neige = round(hybrid_score * 10, 1)
         
-        if not df_day.empty:
-            meteo = {
-                "mean_temp": df_day['temperature_2m'].mean(),
-                "max_wind": df_day['wind_speed_10m'].max(),
-                "total_snow": df_day['snowfall'].sum(),
-                "total_precip": df_day['precipitation'].sum()
-            }
-            all_meteo.append(meteo)
-            
-            # Poids inversement proportionnel à la distance
-            weight = 1.0 / (closest_dists[idx] + 0.01)
-            weights.append(weight)
-    
-    if not all_meteo:
-        return {
-            "mean_temp": 0, 
-            "max_wind": 10, 
-            "total_snow": 0, 
-            "total_precip": 0,
-            "data_available": False,
-            "distance_km": closest_dists[0]
-        }
-    
-    # 3. Moyenne pondérée
-    weights = np.array(weights)
-    weights = weights / weights.sum()
-    
-    smoothed_meteo = {
-        # Moyennes pondérées pour variables continues
-        "mean_temp": sum(m["mean_temp"] * w for m, w in zip(all_meteo, weights)),
-        "total_snow": sum(m["total_snow"] * w for m, w in zip(all_meteo, weights)),
-        "total_precip": sum(m["total_precip"] * w for m, w in zip(all_meteo, weights)),
+        # Pictogrammes selon la qualité
+        if note_neige >= 8:
+            picto = "⭐⭐⭐"
+            qualite = "Excellente"
+            color = "green"
+        elif note_neige >= 6:
+            picto = "⭐⭐"
+            qualite = "Bonne"
+            color = "blue"
+        elif note_neige >= 4:
+            picto = "⭐"
+            qualite = "Moyenne"
+            color = "orange"
+        else:
+            picto = "❄️"
+            qualite = "Difficile"
+            color = "red"
         
-        # MAX pour le vent (approche sécuritaire)
-        "max_wind": max(m["max_wind"] for m in all_meteo),
+        # Affichage principal
+        st.markdown(f"**🎿 Qualité de neige prédite :** :{color}[{picto} {note_neige}/10 - {qualite}]")
         
-        "data_available": True,
-        "distance_km": closest_dists[0]
-    }
-    
-    smoothed_meteo["icon"] = get_weather_icon(smoothed_meteo)
-    
-    return smoothed_meteo
-
+        # 📊 AFFICHAGE DÉTAILLÉ (expander)
+        with st.expander("📈 Détails du scoring IA"):
+            col_scores1, col_scores2, col_scores3 = st.columns(3)
+            
+            # Adaptation du message selon la saison
+            if saison == "printemps":
+                col_scores1.metric("Score Printemps 🌱", f"{spring_score:.2f}")
+                col_scores2.metric("Score Hiver ❄️", f"{base_score:.2f}")
+                col_scores3.metric("Score Final 🎯", f"{hybrid_score:.2f}")
+                st.caption("🌸 **Mode printemps actif** : Privilégie regel/dégel avec faible neige récente")
+            
+            elif saison == "transition":
+                col_scores1.metric("Score Hiver ❄️", f"{base_score:.2f}")
+                col_scores2.metric("Score Printemps 🌱", f"{spring_score:.2f}")
+                col_scores3.metric("Score Final 🎯", f"{hybrid_score:.2f}")
+                st.caption("🔄 **Transition mars** : Combinaison progressive hiver → printemps")
+            
+            else:  # hiver
+                col_scores1.metric("Score Hiver ❄️", f"{base_score:.2f}")
+                col_scores2.metric("Score Final 🎯", f"{hybrid_score:.2f}")
+                col_scores3.metric("Spring (ref)", f"{spring_score:.2f}")
+                st.caption("❄️ **Mode hiver** : Privilégie poudreuse et conditions froides")
+            
+            # Conditions détaillées
+            st.markdown("**📊 Conditions détaillées (7 derniers jours) :**")
+            col_feat1, col_feat2, col_feat3 = st.columns(3)
+            col_feat1.text(f"🌡️ Tmin: {features_meteo['temp_min_7d_avg']:.1f}°C")
+            col_feat2.text(f"🌡️ Tmax: {features_meteo['temp_max_7d_avg']:.1f}°C")
+            col_feat3.text(f"📊 Amplitude: {features_meteo['temp_amp_7d_avg']:.1f}°C")
+            
+            col_feat4, col_feat5, col_feat6 = st.columns(3)
+            col_feat4.text(f"❄️ Neige: {features_meteo['snowfall_7d_sum']:.0f} cm")
+            col_feat5.text(f"💨 Vent max: {features_meteo['wind_max_7d']:.0f} km/h")
+            col_feat6.text(f"🔄 Cycles gel/dégel: {features_meteo['freeze_thaw_cycles_7d']}")
 
 
 # ============================================================================
-# FONCTION DE SCORING AMÉLIORÉE
+# INTERFACE STREAMLIT
 # ============================================================================
 
-def scoring_v3(row, niveau, dplus_min, dplus_max, target_date):
+@st.cache_data(max_entries=4, show_spinner=False)
+def data_overview(data_version, _cube, _df_bera, _catalogue):
     """
-    Version améliorée du scoring avec :
-    - Normalisation massifs
-    - Haversine pour météo
-    - Range D+ au lieu d'idéal
-    - Date de sortie configurable
-    - Gestion robuste des erreurs
+    Infos d'en-tête dérivées des données, calculées une fois par version
+    (fraîcheur météo/BERA, jours disponibles, massifs) au lieu d'un
+    parcours de df_meteo à chaque rerun.
     """
-    
-    # --- BERA (avec normalisation) ---
-    massif_key = row["massif"]
-    avy_risk = dict_bera.get(massif_key, 0.6)  # Défaut 3/5
-    
-    # --- Météo (avec haversine + date) ---
-    meteo = get_meteo_agg(row["lat"], row["lon"], target_date)
-    
-    fresh_snow_penalty = min(meteo["total_snow"] / 30.0, 1.0)
-    wet_snow_penalty = 1.0 if (meteo["mean_temp"] > 0 and meteo["total_precip"] > 0) else 0.0
-    wind_penalty = min(meteo["max_wind"] / 25.0, 1.0)
-    
-    # --- Exposition & pente ---
-    expo_map = {
-        "N": 0.1, "NE": 0.2, "E": 0.4, "SE": 0.7, 
-        "S": 1.0, "SO": 0.8, "O": 0.6, "NO": 0.3, "NW": 0.2
+    bera_status, bera_date = "missing", None
+    if len(_df_bera) > 0 and 'date_validite' in _df_bera.columns:
+        latest = _df_bera['date_validite'].max()
+        bera_status, bera_date = ("ok", latest) if pd.notna(latest) else ("invalid", None)
+    return {
+        "dates": list(_cube.dates),
+        "meteo_earliest": _cube.dates[0] if _cube.dates else None,
+        "meteo_latest": _cube.dates[-1] if _cube.dates else None,
+        "bera_status": bera_status,
+        "bera_date": bera_date,
+        "massifs": list(_catalogue.massifs),
     }
-    expo_penalty = expo_map.get(str(row["exposition"]).strip().upper()[:2], 0.5)
-    
-    slope_penalty = 1.0 if str(row["difficulty_ski"]).strip().upper().startswith(("S4", "S5")) else 0.3
-    
-    # --- Danger ---
-    danger = (0.30 * avy_risk +
-              0.20 * wind_penalty +
-              0.15 * fresh_snow_penalty +
-              0.15 * wet_snow_penalty +
-              0.10 * expo_penalty +
-              0.10 * slope_penalty)
-    
-    # --- Fitness ---
-    diff_ski = str(row["difficulty_ski"]).strip().upper()
-    user_level = niveau.strip().upper()
-    
-    level_order = {"S1": 1, "S2": 2, "S3": 3, "S4": 4, "S5": 5}
-    route_level = next((v for k, v in level_order.items() if diff_ski.startswith(k)), 3)
-    target_level = level_order.get(user_level, 3)
-    
-    level_diff = abs(route_level - target_level)
-    level_bonus = 1.0 / (1 + level_diff)
-    
-    # D+ - Bonus si dans le range, pénalité si hors range
-    try:
-        dplus = float(row["denivele_positif"])
-    except:
-        dplus = 1000
-    
-    if dplus_min <= dplus <= dplus_max:
-        # Dans le range : bonus selon position dans le range
-        range_center = (dplus_min + dplus_max) / 2
-        distance_from_center = abs(dplus - range_center) / (dplus_max - dplus_min)
-        dplus_bonus = 1.0 - (0.3 * distance_from_center)  # 0.7 à 1.0
-    else:
-        # Hors range : forte pénalité
-        if dplus < dplus_min:
-            dplus_bonus = max(0.1, dplus / dplus_min * 0.5)
-        else:
-            dplus_bonus = max(0.1, dplus_max / dplus * 0.5)
-    
-    fitness = dplus_bonus * level_bonus
-    
-    # --- Score final ---
-    return fitness / (1 + danger)
 
-
-# ============================================================================
-# INTERFACE STREAMLIT
-# ============================================================================
+overview = data_overview(data_version, cube, df_bera, catalogue)
 
 st.title("⛷️ Ski Touring Live")
 st.markdown("**Ton conseiller IA ultime — avalanche live + vent + expo + pente**")
@@ -611,8 +315,8 @@ col_meteo, col_bera = st.columns(2)
 
 # Fraîcheur météo
 with col_meteo:
-    meteo_latest = df_meteo['time'].max().date()
-    meteo_earliest = df_meteo['time'].min().date()
+    meteo_latest = overview["meteo_latest"]
+    meteo_earliest = overview["meteo_earliest"]
     today = datetime.today().date()
     
     if meteo_earliest <= today <= meteo_latest:
@@ -636,156 +340,270 @@ with col_meteo:
 
 # Fraîcheur BERA
 with col_bera:
-    if len(df_bera) > 0 and 'date_validite' in df_bera.columns:
-        bera_date = df_bera['date_validite'].max()
-        if pd.notna(bera_date):
-            st.info(f"⚠️ BERA : {bera_date.strftime('%d/%m/%Y %H:%M')}")
-        else:
-            st.warning("⚠️ BERA : Date invalide")
+    if overview["bera_status"] == "ok":
+        st.info(f"⚠️ BERA : {overview['bera_date'].strftime('%d/%m/%Y %H:%M')}")
+    elif overview["bera_status"] == "invalid":
+        st.warning("⚠️ BERA : Date invalide")
     else:
         st.warning("⚠️ BERA : Données manquantes")
 
 st.markdown("---")
 
-# Sidebar : Paramètres utilisateur
-st.sidebar.header("🎿 Tes préférences")
-
 # ============================================================================
-# DATE DE LA SORTIE
+# SIDEBAR : PRÉFÉRENCES (FRAGMENT)
 # ============================================================================
 
-# ============================================================================
-# SÉLECTEUR DE DATE (Style Boutons Radio - Futur uniquement)
-# ============================================================================
-
-st.sidebar.subheader("📅 Date de sortie")
+VILLES_DEPART = {
+    "Grenoble": (45.188, 5.724),
+    "Chambéry": (45.564, 5.917),
+    "Annecy": (45.899, 6.129),
+    "Chamonix": (45.924, 6.869),
+    "Bourg-Saint-Maurice": (45.618, 6.769),
+    "Briançon": (44.899, 6.643),
+    "Gap": (44.559, 6.079),
+    "Barcelonnette": (44.387, 6.652),
+    "Nice": (43.710, 7.262),
+}
+
+
+@st.fragment
+def sidebar_preferences():
+    """
+    Préférences utilisateur. Fragment : modifier un widget ne relance que
+    la sidebar, pas le chargement, les résultats ni la carte. Les valeurs
+    sont relues par le script complet au clic sur le bouton de recherche.
+    """
+    st.header("🎿 Tes préférences")
 
-today = datetime.today().date()
+    # --- Date de sortie (boutons radio, futur uniquement) ---
+    st.subheader("📅 Date de sortie")
 
-# 1. On filtre pour ne garder que aujourd'hui et les jours suivants
-all_dates = sorted(df_meteo['time'].dropna().dt.date.unique())
-dates_futures = [d for d in all_dates if d >= today]
+    today = datetime.today().date()
 
-# 2. On prépare les labels pour les boutons
-date_labels = {}
-for date in dates_futures:
-    days_diff = (date - today).days
-    if days_diff == 0:
-        date_labels[date] = f"🗓️ Aujourd'hui ({date.strftime('%d/%m')})"
-    elif days_diff == 1:
-        date_labels[date] = f"📆 Demain ({date.strftime('%d/%m')})"
-    elif days_diff == 2:
-        date_labels[date] = f"📆 Après-demain ({date.strftime('%d/%m')})"
+    # 1. On filtre pour ne garder que aujourd'hui et les jours suivants
+    dates_futures = [d for d in overview["dates"] if d >= today]
+
+    # 2. On prépare les labels pour les boutons
+    date_labels = {}
+    for date in dates_futures:
+        days_diff = (date - today).days
+        if days_diff == 0:
+            date_labels[date] = f"🗓️ Aujourd'hui ({date.strftime('%d/%m')})"
+        elif days_diff == 1:
+            date_labels[date] = f"📆 Demain ({date.strftime('%d/%m')})"
+        elif days_diff == 2:
+            date_labels[date] = f"📆 Après-demain ({date.strftime('%d/%m')})"
+        else:
+            date_labels[date] = f"📅 {date.strftime('%d/%m')}"
+
+    # 3. Affichage des boutons radio (on limite aux 3-4 prochains jours pour garder l'interface propre)
+    if dates_futures:
+        date_sortie = st.radio(
+            "Choisis ton jour",
+            options=dates_futures[:4], # Affiche les 4 premiers jours futurs
+            format_func=lambda x: date_labels.get(x, x.strftime('%d/%m')),
+            key="date_selector_radio" # Clé unique pour éviter l'erreur DuplicateKey
+        )
     else:
-        date_labels[date] = f"📅 {date.strftime('%d/%m')}"
-
-# 3. Affichage des boutons radio (on limite aux 3-4 prochains jours pour garder l'interface propre)
-if dates_futures:
-    date_sortie = st.sidebar.radio(
-        "Choisis ton jour",
-        options=dates_futures[:4], # Affiche les 4 premiers jours futurs
-        format_func=lambda x: date_labels.get(x, x.strftime('%d/%m')),
-        key="date_selector_radio" # Clé unique pour éviter l'erreur DuplicateKey
+        st.error("⚠️ Aucune donnée météo future trouvée.")
+        date_sortie = today
+
+
+    st.markdown("---")
+
+    # Niveau
+    niveau = st.selectbox(
+        "Ton niveau ski de rando", 
+        ["S1", "S2", "S3", "S4", "S5"], 
+        index=2,
+        key="niveau_selector"
     )
-else:
-    st.sidebar.error("⚠️ Aucune donnée météo future trouvée.")
-    date_sortie = today
-
-
-st.sidebar.markdown("---")
-
-# Niveau
-niveau = st.sidebar.selectbox(
-    "Ton niveau ski de rando", 
-    ["S1", "S2", "S3", "S4", "S5"], 
-    index=2,
-    key="niveau_selector"
-)
-
-
-# D+ Range (au lieu d'idéal)
-st.sidebar.subheader("📏 Dénivelé")
-dplus_range = st.sidebar.slider(
-    "Dénivelé acceptable (m)",
-    min_value=400,
-    max_value=2500,
-    value=(800, 1500),
-    step=50,
-    help="Filtre les sorties entre ces deux valeurs de D+",
-    key="dplus_slider"
-)
-
-# Expositions
-st.sidebar.subheader("🧭 Expositions")
-
-# Bouton intelligent pour éviter chaleur
-avoid_south = st.sidebar.checkbox(
-    "☀️ Éviter expositions chaudes (S, SE, SO)",
-    value=False,
-    help="Utile en cas de températures positives ou neige humide",
-    key="avoid_south_checkbox"
-)
-
-# Liste des expositions
-all_expositions = ["N", "NE", "E", "SE", "S", "SO", "O", "NO"]
-default_expositions = ["N", "NE", "E", "O", "NO"] if avoid_south else all_expositions
-
-expositions_selected = st.sidebar.multiselect(
-    "Expositions acceptables",
-    options=all_expositions,
-    default=default_expositions,
-    help="Sélectionne les orientations de pente acceptables",
-    key="expositions_multiselect"
-)
-
-# Nombre de résultats
-st.sidebar.markdown("---")
-n_results = st.sidebar.slider(
-    "Nombre de sorties à afficher",
-    min_value=3,
-    max_value=20,
-    value=5,
-    step=1,
-    help="Affiche les N meilleures sorties selon les conditions",
-    key="n_results_slider"
-)
-
-# Sélection des massifs
-st.sidebar.markdown("---")
-st.sidebar.subheader("🏔️ Massifs")
-
-# Liste des massifs disponibles
-massifs_disponibles = sorted(df['massif'].unique())
-
-# Boutons Tout sélectionner / Tout désélectionner
-col_sel1, col_sel2 = st.sidebar.columns(2)
-if col_sel1.button("✅ Tous", use_container_width=True, key="btn_tous_massifs"):
-    st.session_state.massifs_selected = massifs_disponibles
-if col_sel2.button("❌ Aucun", use_container_width=True, key="btn_aucun_massif"):
-    st.session_state.massifs_selected = []
-
-# Initialise la sélection si pas encore fait
-if 'massifs_selected' not in st.session_state:
-    st.session_state.massifs_selected = massifs_disponibles
-
-# Multiselect
-massifs_selected = st.sidebar.multiselect(
-    "Choisis tes massifs",
-    options=massifs_disponibles,
-    default=st.session_state.massifs_selected,
-    help="Sélectionne les massifs où tu veux partir",
-    key="massifs_multiselect"
-)
+
+
+    # D+ Range (au lieu d'idéal)
+    st.subheader("📏 Dénivelé")
+    dplus_range = st.slider(
+        "Dénivelé acceptable (m)",
+        min_value=400,
+        max_value=2500,
+        value=(800, 1500),
+        step=50,
+        help="Filtre les sorties entre ces deux valeurs de D+",
+        key="dplus_slider"
+    )
+
+    # Expositions
+    st.subheader("🧭 Expositions")
+
+    # Bouton intelligent pour éviter chaleur
+    avoid_south = st.checkbox(
+        "☀️ Éviter expositions chaudes (S, SE, SO)",
+        value=False,
+        help="Utile en cas de températures positives ou neige humide",
+        key="avoid_south_checkbox"
+    )
+
+    # Liste des expositions
+    all_expositions = ["N", "NE", "E", "SE", "S", "SO", "O", "NO"]
+    default_expositions = ["N", "NE", "E", "O", "NO"] if avoid_south else all_expositions
+
+    expositions_selected = st.multiselect(
+        "Expositions acceptables",
+        options=all_expositions,
+        default=default_expositions,
+        help="Sélectionne les orientations de pente acceptables",
+        key="expositions_multiselect"
+    )
+
+    # Nombre de résultats
+    st.markdown("---")
+    n_results = st.slider(
+        "Nombre de sorties à afficher",
+        min_value=3,
+        max_value=20,
+        value=5,
+        step=1,
+        help="Affiche les N meilleures sorties selon les conditions",
+        key="n_results_slider"
+    )
+
+    # Sélection des massifs
+    st.markdown("---")
+    st.subheader("🏔️ Massifs")
+
+    # Liste des massifs disponibles (calculée une fois par version)
+    massifs_disponibles = overview["massifs"]
+
+    # Boutons Tout sélectionner / Tout désélectionner
+    col_sel1, col_sel2 = st.columns(2)
+    if col_sel1.button("✅ Tous", use_container_width=True, key="btn_tous_massifs"):
+        st.session_state.massifs_selected = massifs_disponibles
+    if col_sel2.button("❌ Aucun", use_container_width=True, key="btn_aucun_massif"):
+        st.session_state.massifs_selected = []
+
+    # Initialise la sélection si pas encore fait
+    if 'massifs_selected' not in st.session_state:
+        st.session_state.massifs_selected = massifs_disponibles
+
+    # Multiselect
+    massifs_selected = st.multiselect(
+        "Choisis tes massifs",
+        options=massifs_disponibles,
+        default=st.session_state.massifs_selected,
+        help="Sélectionne les massifs où tu veux partir",
+        key="massifs_multiselect"
+    )
+
+    # Zone géographique (optionnelle)
+    st.markdown("---")
+    st.subheader("📍 Zone géographique")
+
+    zone_mode = st.radio(
+        "Limiter la recherche",
+        options=["Partout", "Autour d'une ville", "Vue de la carte"],
+        help="Restreint les itinéraires analysés à une zone",
+        key="zone_mode_radio"
+    )
+
+    # La carte d'accueil est hors du fragment : HTML statique, ou st_folium
+    # qui renvoie la zone visible en mode « Vue de la carte », colorée selon
+    # le jour choisi. Si le mode ou le jour changent, rerun complet pour la
+    # reconstruire.
+    landing = (zone_mode == "Vue de la carte", date_sortie)
+    if "topN" not in st.session_state and \
+            st.session_state.get("landing_map", landing) != landing:
+        st.session_state.landing_map = landing
+        st.rerun(scope="app")
+
+    zone_near = None
+    zone_bbox = None
+    if zone_mode == "Autour d'une ville":
+        ville = st.selectbox(
+            "Ville de départ",
+            options=list(VILLES_DEPART),
+            key="ville_selector"
+        )
+        rayon_km = st.slider(
+            "Rayon (km)",
+            min_value=10,
+            max_value=150,
+            value=40,
+            step=5,
+            key="rayon_slider"
+        )
+        zone_near = (*VILLES_DEPART[ville], rayon_km)
+    elif zone_mode == "Vue de la carte":
+        zone_bbox = st.session_state.get("map_bbox")
+        if zone_bbox is None:
+            st.caption("💡 Déplace ou zoome la carte pour définir la zone")
+
+    return {
+        "date_sortie": date_sortie,
+        "niveau": niveau,
+        "dplus_range": dplus_range,
+        "expositions": expositions_selected,
+        "n_results": n_results,
+        "massifs": massifs_selected,
+        "near": zone_near,
+        "bbox": zone_bbox,
+    }
+
+
+with st.sidebar:
+    prefs = sidebar_preferences()
+
+
+def bounds_to_bbox(map_state):
+    """Convertit les bounds renvoyées par st_folium en (sud, ouest, nord, est)"""
+    bounds = (map_state or {}).get("bounds") or {}
+    sw = bounds.get("_southWest") or {}
+    ne = bounds.get("_northEast") or {}
+    if None in (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng")):
+        return None
+    return (sw["lat"], sw["lng"], ne["lat"], ne["lng"])
+
 
 # Debug info (optionnel)
 with st.sidebar.expander("🔍 Debug Info"):
     st.metric("Massifs avec BERA", len(dict_bera))
     st.metric("Itinéraires", len(df))
-    meteo_range = f"{df_meteo['time'].min().date()} → {df_meteo['time'].max().date()}"
+    meteo_range = f"{overview['meteo_earliest']} → {overview['meteo_latest']}"
     st.text(f"📅 Météo: {meteo_range}")
     
+    # Cache de résultats partagé
+    cache_stats = result_cache.stats()
+    st.text(
+        f"🗄️ Cache: {cache_stats['size']}/{cache_stats['maxsize']} | "
+        f"hits {cache_stats['hits']} · miss {cache_stats['misses']} · "
+        f"coalescés {cache_stats['coalesced']}"
+    )
+    st.text(f"🔖 Version données: {data_version}")
+    st.text(f"📦 Instantané: {data_state.snapshot or 'data/ (historique)'}")
+    st.caption(
+        f"Chargé le {datetime.fromtimestamp(data_state.loaded_at).strftime('%d/%m %H:%M:%S')}"
+        f" · {data_watcher.reloads} rechargement(s) à chaud"
+    )
+    if data_watcher.last_error:
+        st.warning(f"⚠️ Rechargement en échec : {data_watcher.last_error}")
+    loaded_models = model_registry.loaded()
+    st.text("🌲 Modèles chargés: " + (", ".join(
+        name if ok else f"{name} (absent)" for name, ok in loaded_models.items()
+    ) or "aucun"))
+    manifest_path = (
+        os.path.join(SNAPSHOT_ROOT, data_state.snapshot, MANIFEST_NAME)
+        if data_state.snapshot else "data/manifest.json"
+    )
+    for name, entry in read_manifest(manifest_path).get("artefacts", {}).items():
+        st.caption(f"{name}: {entry.get('rows')} lignes · maj {entry.get('updated_at')}")
+    
+    # Durées des étapes, profil de la recherche et mémoire, remplis en fin de script
+    timings_slot = st.empty()
+    profile_slot = st.empty()
+    memory_slot = st.empty()
+    st.toggle("🧠 Détail mémoire (caches et sessions)", key="memory_details")
+    
     # Vérification matching massifs
-    massifs_itin = set(df['massif'].unique())
+    massifs_itin = set(overview["massifs"])
     massifs_bera = set(dict_bera.keys())
     missing = massifs_itin - massifs_bera
     if missing:
@@ -793,8 +611,37 @@ with st.sidebar.expander("🔍 Debug Info"):
     else:
         st.success("✅ Tous les massifs matchés")
 
+def profile_recommendation(date_sortie, prefs, near, bbox):
+    """
+    Recherche complète sous cProfile + tracemalloc : sans le cache de
+    résultats, les scores de session ni le cache du détail IA (tout est
+    recalculé, predict du top N inclus). Le profil est gardé en session
+    pour le panneau Debug.
+    """
+    st.session_state.pop("score_cache", None)
+    with Profile("recommend") as profile:
+        recommendation = compute_recommendation(
+            date_sortie, prefs["niveau"], prefs["dplus_range"], prefs["massifs"],
+            prefs["expositions"], prefs["n_results"], near, bbox
+        )
+        if recommendation is not None:
+            scoring_details(recommendation.idx, date_sortie, use_cache=False)
+    st.session_state.profile = {
+        "name": f"recommend-{profile.created_at:%Y%m%d-%H%M%S}",
+        "stats": profile.stats_bytes(),
+        "report": profile.report(),
+        "hot": profile.top_functions("tottime"),
+        "elapsed": profile.elapsed,
+        "memory_peak": profile.memory_peak,
+    }
+    return recommendation
+
+
 # Bouton principal
 if st.button("🔥 Trouve-moi la sortie parfaite  !", type="primary", use_container_width=True):
+    date_sortie = prefs["date_sortie"]
+    massifs_selected = prefs["massifs"]
+    expositions_selected = prefs["expositions"]
     
     # Vérifications
     if not massifs_selected:
@@ -804,6 +651,9 @@ if st.button("🔥 Trouve-moi la sortie parfaite  !", type="primary", use_contai
     if not expositions_selected:
         st.error("⚠️ Sélectionne au moins une exposition !")
         st.stop()
+    if st.session_state.get("zone_mode_radio") == "Vue de la carte" and prefs["bbox"] is None:
+        st.error("⚠️ Zone de la carte inconnue : déplace ou zoome la carte, puis relance la recherche.")
+        st.stop()
     
     # Vérifie fraîcheur données météo
     days_old = (date_sortie - meteo_latest).days
@@ -814,52 +664,57 @@ if st.button("🔥 Trouve-moi la sortie parfaite  !", type="primary", use_contai
         st.stop()
     
     with st.spinner("Analyse des conditions live (météo, neige, avalanche)..."):
-        # Filtre les itinéraires
-        df_filtered = df[
-            (df['massif'].isin(massifs_selected)) &
-            (df['denivele_positif'] >= dplus_range[0]) &
-            (df['denivele_positif'] <= dplus_range[1]) &
-            (df['exposition'].isin(expositions_selected))
-        ].copy()
+        query_key = normalise_query(
+            date_sortie, prefs["niveau"], prefs["dplus_range"], massifs_selected,
+            expositions_selected, prefs["n_results"], prefs["near"], prefs["bbox"]
+        )
+        # Zone arrondie de la clé : deux vues de carte de même clé ont le même résultat
+        near, bbox = query_key[6], query_key[7]
+        with timings.span("recommendation"):  # filtre + scoring + top N, ou cache
+            if profiling:
+                recommendation = profile_recommendation(date_sortie, prefs, near, bbox)
+            else:
+                recommendation = result_cache.get_or_compute(
+                    (data_version, query_key),
+                    lambda: compute_recommendation(
+                        date_sortie, prefs["niveau"], prefs["dplus_range"], massifs_selected,
+                        expositions_selected, prefs["n_results"], near, bbox
+                    )
+                )
         
-        if len(df_filtered) == 0:
+        if recommendation is None:
             st.warning("Aucun itinéraire trouvé avec ces critères.")
-            st.info("💡 Élargis tes filtres (D+, expositions, massifs)")
+            st.info("💡 Élargis tes filtres (D+, expositions, massifs, zone)")
             st.stop()
         
-        # Calcul des scores (avec date de sortie)
-        df_filtered["score"] = df_filtered.apply(
-            lambda row: scoring_v3(row, niveau, dplus_range[0], dplus_range[1], date_sortie), 
-            axis=1
-        )
-        
-        # Top N résultats
-        topN = df_filtered.sort_values("score", ascending=False).head(n_results).copy()
+        topN = catalogue.take(recommendation.idx).copy()
+        topN["score"] = recommendation.scores
         st.session_state.topN = topN
-        st.session_state.n_results = n_results
-        st.session_state.n_filtered = len(df_filtered)
+        st.session_state.recommendation = recommendation
+        st.session_state.n_results = prefs["n_results"]
+        st.session_state.massifs = massifs_selected
+        st.session_state.n_filtered = recommendation.n_filtered
         st.session_state.date_sortie = date_sortie
+        st.session_state.score_key = (
+            date_sortie, prefs["niveau"], prefs["dplus_range"][0], prefs["dplus_range"][1]
+        )
 
-# Affichage des résultats
-if "topN" in st.session_state:
+# ============================================================================
+# RÉSULTATS ET CARTES (FRAGMENTS)
+# ============================================================================
+
+@st.fragment
+def render_results():
+    """Liste du top N (relit la recherche stockée en session)"""
     topN = st.session_state.topN
+    recommendation = st.session_state.recommendation
     n_results = st.session_state.n_results
     n_filtered = st.session_state.n_filtered
     date_sortie = st.session_state.date_sortie
     
-    # Calcule l'icône météo globale pour la journée
-    df_meteo_jour = df_meteo[df_meteo['time'].dt.date == date_sortie]
-    
-    if not df_meteo_jour.empty:
-        meteo_global = {
-            "total_snow": df_meteo_jour['snowfall'].mean(),
-            "mean_temp": df_meteo_jour['temperature_2m'].mean(),
-            "total_precip": df_meteo_jour['precipitation'].mean(),
-            "max_wind": df_meteo_jour['wind_speed_10m'].max()
-        }
-        icon_global = get_weather_icon(meteo_global)
-    else:
-        icon_global = "⛅"
+    # Icône météo globale de la journée (précalculée au chargement)
+    jour = outlook["days"].get(date_sortie)
+    icon_global = jour["icon"] if jour else "⛅"
     
     # Titre avec date et icône météo
     date_label = "aujourd'hui" if date_sortie == datetime.today().date() else date_sortie.strftime('%d/%m/%y')
@@ -870,23 +725,25 @@ if "topN" in st.session_state:
     # ALERTES CONDITIONS MÉTÉO
     # ========================================================================
     
-    if not df_meteo_jour.empty:
-        mean_snow = df_meteo_jour['snowfall'].mean()
-        mean_temp = df_meteo_jour['temperature_2m'].mean()
-        max_wind = df_meteo_jour['wind_speed_10m'].max()
-        
-        conditions_alertes = []
-        
-        if mean_snow > 20:
-            conditions_alertes.append("❄️ **Neige fraîche abondante** (20+ cm) → Risque plaques à vent")
-        if mean_temp > 0:
-            conditions_alertes.append("☀️ **Températures positives** → Éviter expositions Sud (coulées)")
-        if max_wind > 40:
-            conditions_alertes.append("💨 **Vent fort** (40+ km/h) → Attention aux crêtes")
-        
-        if conditions_alertes:
-            st.warning("⚠️ **Conditions particulières ce jour :**\n\n" + 
-                       "\n\n".join(conditions_alertes))
+    if jour and jour["alerts"]:
+        st.warning("⚠️ **Conditions particulières ce jour :**\n\n" + 
+                   "\n\n".join(WEATHER_ALERTS[a][0] for a in jour["alerts"]))
+    
+    # Vue d'ensemble par massif (mêmes seuils, grilles du massif)
+    massifs_jour = [
+        (m, outlook["massifs"].get(m, {}).get(date_sortie)) for m in st.session_state.massifs
+    ]
+    massifs_jour = [(m, j) for m, j in massifs_jour if j]
+    if massifs_jour:
+        n_alert = sum(1 for _, j in massifs_jour if j["alerts"])
+        with st.expander(f"🏔️ Conditions par massif ({n_alert} en alerte)"):
+            for m, j in massifs_jour:
+                meteo_m = j["meteo"]
+                labels = " · ".join(WEATHER_ALERTS[a][1] for a in j["alerts"]) or "✅ RAS"
+                st.text(
+                    f"{j['icon']} {m.title()} : {meteo_m['mean_temp']:.1f}°C | "
+                    f"💨 {meteo_m['max_wind']:.0f}km/h | {labels}"
+                )
     
     st.markdown("---")
     
@@ -895,7 +752,9 @@ if "topN" in st.session_state:
     # ========================================================================
     
     # Affichage des itinéraires
+    snow_slots = []
     for i, (idx, row) in enumerate(topN.iterrows(), 1):
+        result = recommendation.route(i - 1)
         with st.container():
             col1, col2 = st.columns([3, 1])
             
@@ -917,95 +776,22 @@ if "topN" in st.session_state:
                 st.text(f"📍 Massif : {row['massif'].title()}")
                 
                 # Météo résumé avec icône
-                meteo = get_meteo_agg(row["lat"], row["lon"], date_sortie)
-                icon = meteo.get('icon', '⛅')
+                meteo = result["meteo"]
+                icon = get_weather_icon(meteo) if meteo["data_available"] else "⛅"
                 st.text(f"{icon} Météo : {meteo['mean_temp']:.1f}°C | ❄️ {meteo['total_snow']:.0f}cm | 💨 {meteo['max_wind']:.0f}km/h")
                 
                 # Données BERA
-                massif_key = row['massif']
-                if massif_key in dict_bera:
-                    bera_row = df_bera[df_bera['massif'] == massif_key].iloc[0]
-                    risque = int(bera_row['risque_actuel'])
+                risque = result["risk_level"]
+                if risque:
                     risque_color = ["🟢", "🟡", "🟠", "🔴", "⚫"][risque - 1] if 1 <= risque <= 5 else "⚪"
                     st.text(f"⚠️ Risque avalanche : {risque_color} {risque}/5")
                 
                 
                 
-                # --- MODELE IA AVEC SPRING SCORE ---
-                features_meteo = get_physical_features(row["lat"], row["lon"], date_sortie)
-                
-                if features_meteo and ski_model:
-                    # Enrichissement des features avec infos de l'itinéraire
-                    features_meteo["summit_altitude_clean"] = row.get('alt_sommet', 2500)
-                    features_meteo["topo_denivele"] = row['denivele_positif']
-                    features_meteo["topo_difficulty"] = 3  # À mapper si besoin
-                    features_meteo["massif"] = row['massif']
-                    
-                    
-                    # 🎯 CALCUL DU SCORE HYBRIDE
-                    hybrid_score, base_score, spring_score, saison = compute_hybrid_snow_score(
-                        features_meteo, 
-                        date_sortie
-                    )
-                    
-                    # Conversion en note sur 10
-                    note_neige = round(hybrid_score * 10, 1)
-                    
-                    # Pictogrammes selon la qualité
-                    if note_neige >= 8:
-                        picto = "⭐⭐⭐"
-                        qualite = "Excellente"
-                        color = "green"
-                    elif note_neige >= 6:
-                        picto = "⭐⭐"
-                        qualite = "Bonne"
-                        color = "blue"
-                    elif note_neige >= 4:
-                        picto = "⭐"
-                        qualite = "Moyenne"
-                        color = "orange"
-                    else:
-                        picto = "❄️"
-                        qualite = "Difficile"
-                        color = "red"
-                    
-                    # Affichage principal
-                    st.markdown(f"**🎿 Qualité de neige prédite :** :{color}[{picto} {note_neige}/10 - {qualite}]")
-                    
-                    # 📊 AFFICHAGE DÉTAILLÉ (expander)
-                    with st.expander("📈 Détails du scoring IA"):
-                        col_scores1, col_scores2, col_scores3 = st.columns(3)
-                        
-                        # Adaptation du message selon la saison
-                        if saison == "printemps":
-                            col_scores1.metric("Score Printemps 🌱", f"{spring_score:.2f}")
-                            col_scores2.metric("Score Hiver ❄️", f"{base_score:.2f}")
-                            col_scores3.metric("Score Final 🎯", f"{hybrid_score:.2f}")
-                            st.caption("🌸 **Mode printemps actif** : Privilégie regel/dégel avec faible neige récente")
-                        
-                        elif saison == "transition":
-                            col_scores1.metric("Score Hiver ❄️", f"{base_score:.2f}")
-                            col_scores2.metric("Score Printemps 🌱", f"{spring_score:.2f}")
-                            col_scores3.metric("Score Final 🎯", f"{hybrid_score:.2f}")
-                            st.caption("🔄 **Transition mars** : Combinaison progressive hiver → printemps")
-                        
-                        else:  # hiver
-                            col_scores1.metric("Score Hiver ❄️", f"{base_score:.2f}")
-                            col_scores2.metric("Score Final 🎯", f"{hybrid_score:.2f}")
-                            col_scores3.metric("Spring (ref)", f"{spring_score:.2f}")
-                            st.caption("❄️ **Mode hiver** : Privilégie poudreuse et conditions froides")
-                        
-                        # Conditions détaillées
-                        st.markdown("**📊 Conditions détaillées (7 derniers jours) :**")
-                        col_feat1, col_feat2, col_feat3 = st.columns(3)
-                        col_feat1.text(f"🌡️ Tmin: {features_meteo['temp_min_7d_avg']:.1f}°C")
-                        col_feat2.text(f"🌡️ Tmax: {features_meteo['temp_max_7d_avg']:.1f}°C")
-                        col_feat3.text(f"📊 Amplitude: {features_meteo['temp_amp_7d_avg']:.1f}°C")
-                        
-                        col_feat4, col_feat5, col_feat6 = st.columns(3)
-                        col_feat4.text(f"❄️ Neige: {features_meteo['snowfall_7d_sum']:.0f} cm")
-                        col_feat5.text(f"💨 Vent max: {features_meteo['wind_max_7d']:.0f} km/h")
-                        col_feat6.text(f"🔄 Cycles gel/dégel: {features_meteo['freeze_thaw_cycles_7d']}")
+                # --- MODELE IA AVEC SPRING SCORE (rempli après le premier affichage) ---
+                snow_slot = st.empty()
+                snow_slot.caption("🎿 Qualité de neige : calcul en cours…")
+                snow_slots.append(snow_slot)
             
             
             with col2:
@@ -1014,30 +800,163 @@ if "topN" in st.session_state:
         
         st.markdown("---")
     
-    # Carte interactive
+    # Détail IA des itinéraires affichés : un seul lot, une fois la liste
+    # à l'écran (mémoïsé par itinéraire et par date)
+    for snow_slot, details in zip(snow_slots, scoring_details(recommendation.idx, date_sortie)):
+        with snow_slot.container():
+            render_snow_details(details)
+
+
+SKIABILITY_LAYERS = 2
+
+@st.cache_resource
+def get_skiability_layers():
+    """Couches construites par skiability_layer, pour les mesurer sans les recalculer"""
+    return {}
+
+
+@st.cache_resource(max_entries=SKIABILITY_LAYERS, show_spinner="❄️ Calcul de la carte de skiabilité...")
+def skiability_layer(data_version):
+    """
+    Score neige de chaque maille météo pour chaque jour (un predict par
+    jour), une fois par version de données. Réutilise le résultat persisté
+    par scripts/build_skiability_raster.py s'il existe.
+    """
+    raster = load_derived(data_version, RASTER_TAG)
+    if raster is None:
+        raster = skiability_raster(cube, model_registry, grid_massifs(cube, catalogue, route_grids))
+        try:
+            save_derived(data_version, RASTER_TAG, raster)
+        except OSError:
+            pass
+    layers = get_skiability_layers()
+    layers[data_version] = raster
+    while len(layers) > SKIABILITY_LAYERS:
+        layers.pop(next(iter(layers)))
+    return raster
+
+
+def clear_skiability_layers():
+    skiability_layer.clear()
+    get_skiability_layers().clear()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def skiability_overlay(data_version, date):
+    """Image RGBA de la skiabilité d'un jour (None si jour hors prévision)"""
+    raster = skiability_layer(data_version)
+    if date not in raster["dates"]:
+        return None
+    values = raster["values"][raster["dates"].index(date)]
+    image, bounds = rasterize(raster["grid_lat"], raster["grid_lon"], values)
+    return {"rgba": to_rgba(image), "bounds": bounds, "date": date}
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_catalogue_geojson(data_version, score_key, _scores):
+    """
+    GeoJSON du catalogue coloré par score, par (version, date, niveau, D+).
+    Les scores sont passés par l'appelant (cache de session) : la fonction
+    cachée ne lit pas st.session_state.
+    """
+    return catalogue_geojson(catalogue, _scores)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_results_map(data_version, result_key, score_key, _topN, _scores):
+    """
+    Carte folium des résultats, construite une fois par (version des
+    données, itinéraires affichés, paramètres de score) et partagée entre
+    les reruns et les sessions.
+    """
+    return results_map(
+        _topN,
+        catalogue_layer=cached_catalogue_geojson(data_version, score_key, _scores),
+        skiability=skiability_overlay(data_version, score_key[0]),
+    )
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def default_map_html(data_version, date):
+    """HTML de la carte par défaut (identique pour tous : généré une fois par jour et version)"""
+    return map_html(default_map(skiability=skiability_overlay(data_version, date)))
+
+
+@contextmanager
+def fragment_span(name, fragment):
+    """
+    Étape chronométrée dans un fragment. Rerun complet : comptée dans les
+    Timings du rerun. Rerun du fragment seul : ceux du dernier rerun
+    complet sont déjà journalisés, l'étape a donc ses propres Timings et
+    sa propre ligne de log.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not ctx.fragment_ids_this_run:
+        with timings.span(name):
+            yield
+        return
+    fragment_timings = Timings("app.fragment")
+    with fragment_timings.span(name):
+        yield
+    fragment_timings.log(data_version=data_version, fragment=fragment)
+
+
+@st.fragment
+def render_results_map(topN):
+    """
+    Carte des résultats. Fragment : déplacer ou zoomer ne relance que la
+    carte (la zone visible est mémorisée pour le mode « Vue de la carte »).
+    """
     st.subheader("🗺️ Carte des itinéraires")
+    st.caption("💡 Calques « Tout le catalogue » et « Skiabilité » dans le sélecteur en haut à droite")
+    
+    with fragment_span("map", "render_results_map"):
+        score_key = st.session_state.score_key
+        scores, _ = catalogue_scores(*score_key)
+        m = cached_results_map(
+            data_version,
+            tuple(int(i) for i in st.session_state.recommendation.idx),
+            score_key,
+            topN,
+            scores,
+        )
+        map_state = st_folium(m, height=500, use_container_width=True, returned_objects=["bounds"])
+    if bounds_to_bbox(map_state):
+        st.session_state.map_bbox = bounds_to_bbox(map_state)
+
+
+@st.fragment
+def render_default_map():
+    """
+    Carte par défaut des Alpes. HTML statique mis en cache, sauf en mode
+    « Vue de la carte » où il faut récupérer la zone visible via st_folium.
+    """
+    st.subheader("🗺️ Zone couverte : Alpes françaises")
+    # Widgets du fragment de la sidebar : prefs date du dernier rerun complet
+    date = st.session_state.get("date_selector_radio", prefs["date_sortie"])
+    st.caption(f"❄️ Skiabilité prédite du {date.strftime('%d/%m')} (vert = bonnes conditions)")
+    interactive = st.session_state.get("zone_mode_radio") == "Vue de la carte"
+    st.session_state.landing_map = (interactive, date)
+    if not interactive:
+        with fragment_span("map", "render_default_map"):
+            components.html(default_map_html(data_version, date), height=400)
+        return
+    with fragment_span("map", "render_default_map"):
+        skiability = skiability_overlay(data_version, date)
+        map_state = st_folium(
+            default_map(skiability=skiability), height=400,
+            use_container_width=True, returned_objects=["bounds"]
+        )
+    if bounds_to_bbox(map_state):
+        st.session_state.map_bbox = bounds_to_bbox(map_state)
+
+
+# Affichage des résultats
+if "topN" in st.session_state:
+    render_results()
     
-    # Centre la carte sur le premier itinéraire
-    center_lat = topN.iloc[0]["lat"]
-    center_lon = topN.iloc[0]["lon"]
-    
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=10)
-    
-    # Ajoute les marqueurs (couleurs variées pour mieux distinguer)
-    colors = ["red", "orange", "green", "blue", "purple", "darkred", "lightred", 
-              "beige", "darkblue", "darkgreen", "cadetblue", "darkpurple", "pink", 
-              "lightblue", "lightgreen", "gray", "black", "lightgray"]
-    
-    for i, (_, row) in enumerate(topN.iterrows()):
-        color = colors[i % len(colors)]
-        folium.Marker(
-            [row["lat"], row["lon"]], 
-            popup=f"{i+1}. {row['name']}<br>Score: {row['score']:.2f}",
-            tooltip=f"{i+1}. {row['name']}",
-            icon=folium.Icon(color=color, icon="info-sign")
-        ).add_to(m)
-    
-    st_folium(m, height=500, use_container_width=True)
+    # Carte interactive
+    render_results_map(st.session_state.topN)
     
     # Bouton nouvelle recherche
     if st.button("🔄 Nouvelle recherche"): 
@@ -1049,9 +968,7 @@ else:
     st.info("👆 Choisis ton niveau et le dénivelé souhaité, puis clique sur le bouton pour trouver les meilleures sorties !")
     
     # Carte par défaut des Alpes
-    st.subheader("🗺️ Zone couverte : Alpes françaises")
-    m_default = folium.Map(location=[45.5, 6.5], zoom_start=8)
-    st_folium(m_default, height=400, use_container_width=True)
+    render_default_map()
 
 # Footer
 st.markdown("---")
@@ -1060,4 +977,120 @@ st.markdown("""
     ⚠️ <strong>Avertissement sécurité</strong> : Cet outil est une aide à la décision, pas un substitut au jugement humain.<br>
     Consulte TOUJOURS le bulletin avalanche officiel avant de partir. La sécurité est ta responsabilité.
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+# ============================================================================
+# CHRONOMÉTRAGE DU RERUN
+# ============================================================================
+
+with timings_slot.container():
+    if not timings.enabled:
+        st.caption(f"⏱️ Chronométrage désactivé ({ENV_ENABLED}=0)")
+    else:
+        st.caption("⏱️ Étapes de ce rerun")
+        for stage, entry in timings.summary().items():
+            count = f" ({entry['count']}×)" if entry["count"] > 1 else ""
+            st.text(f"⏱️ {stage}: {entry['ms']:.1f} ms{count}")
+timings.log(data_version=data_version, search="topN" in st.session_state)
+
+if "profile" in st.session_state:
+    profile_state = st.session_state.profile
+    with profile_slot.container():
+        st.caption(
+            f"🔬 Profil de la dernière recherche : {profile_state['elapsed'] * 1000:.0f} ms "
+            f"(sous profilage) · pic mémoire {profile_state['memory_peak'] / 1e6:.1f} Mo"
+        )
+        col_prof, col_txt = st.columns(2)
+        col_prof.download_button(
+            "📥 .prof", profile_state["stats"], file_name=profile_state["name"] + ".prof",
+            mime="application/octet-stream", key="download_profile_stats"
+        )
+        col_txt.download_button(
+            "📥 Rapport", profile_state["report"], file_name=profile_state["name"] + ".txt",
+            mime="text/plain", key="download_profile_report"
+        )
+        st.code(profile_state["hot"], language=None)
+elif profiling:
+    profile_slot.caption("🔬 Profilage actif : lance une recherche pour obtenir le profil")
+
+
+# ============================================================================
+# MÉMOIRE (PANNEAU DEBUG + MODE BUDGET)
+# ============================================================================
+
+@st.cache_resource
+def get_session_memory():
+    """Taille de session_state de chaque session : {id: (octets, vu le)}"""
+    return {}
+
+SESSION_MEMORY_TTL = 3600  # Session oubliée après 1 h sans rerun
+
+
+def record_session_memory():
+    """Met à jour la taille de la session courante et oublie les sessions inactives"""
+    sessions = get_session_memory()
+    ctx = get_script_run_ctx()
+    now = datetime.now().timestamp()
+    if ctx is not None:
+        state = {key: st.session_state[key] for key in st.session_state}
+        sessions[ctx.session_id] = (deep_size(state), now)
+    for session_id, (_, seen) in list(sessions.items()):
+        if now - seen > SESSION_MEMORY_TTL:
+            sessions.pop(session_id, None)
+    return sessions
+
+
+def trim_session_scores():
+    """Ne garde que les derniers scores de chaque session active"""
+    for cache in list(get_score_caches().values()):
+        for key in list(cache)[:-1]:
+            cache.pop(key, None)
+
+
+def clear_map_caches():
+    cached_results_map.clear()
+    cached_catalogue_geojson.clear()
+    default_map_html.clear()
+    skiability_overlay.clear()
+
+
+# Du moins utile au plus utile : cartes (reconstruites à la demande), puis
+# moitiés les moins récemment utilisées des caches, enfin la couche de
+# skiabilité (relue depuis data/.derived au prochain affichage)
+MEMORY_EVICTIONS = [
+    ("cartes", clear_map_caches),
+    ("scores des sessions", trim_session_scores),
+    ("détail IA", lambda: details_cache.evict_oldest(0.5)),
+    ("résultats", lambda: result_cache.evict_oldest(0.5)),
+    ("couche de skiabilité", clear_skiability_layers),
+]
+
+memory_budget = budget_bytes()
+evicted = evict_until(memory_budget, MEMORY_EVICTIONS) if memory_budget else []
+session_memory = record_session_memory()
+
+with memory_slot.container():
+    rss = process_rss()
+    budget_label = f" / budget {format_bytes(memory_budget)}" if memory_budget else f" (pas de budget, {ENV_BUDGET})"
+    st.text(f"🧠 Mémoire résidente: {format_bytes(rss)}{budget_label}")
+    if evicted:
+        st.warning("🧹 Budget dépassé, caches vidés : " + ", ".join(evicted))
+    if st.session_state.get("memory_details"):
+        cached_objects = {f"données · {name}": value for name, value in zip(DATA_FIELDS, data_state.data)}
+        cached_objects.update({
+            "cache de résultats": result_cache,
+            "cache détail IA": details_cache,
+            "modèles (hors pages mappées)": model_registry,
+        })
+        # Mesurée seulement si déjà construite : ne pas recalculer ce que l'éviction vient de vider
+        layer = get_skiability_layers().get(data_version)
+        if layer is not None:
+            cached_objects["couche de skiabilité"] = layer
+        for name, size in memory_report(cached_objects):
+            st.caption(f"{name}: {format_bytes(size)}")
+        st.caption(
+            f"👥 {len(session_memory)} session(s) : "
+            f"{format_bytes(sum(size for size, _ in session_memory.values()))} au total"
+        )
+        ctx = get_script_run_ctx()
+        if ctx is not None and ctx.session_id in session_memory:
+            st.caption(f"Cette session : {format_bytes(session_memory[ctx.session_id][0])}")
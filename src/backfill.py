@@ -0,0 +1,251 @@
+"""
+Features physiques de toute une saison, pour chaque (grille ou itinéraire,
+date), en une passe glissante sur l'historique horaire du cube météo.
+
+get_physical_features (et WeatherCube.grid_window_features) recalcule la
+fenêtre ]date - 7j, date] à chaque appel. Ici les pas horaires sont d'abord
+réduits en jours-fenêtre ]J-1 0h, J 0h] (min, max, somme, lignes présentes),
+puis chaque agrégat 7 jours s'obtient en combinant 7 colonnes décalées :
+une saison entière coûte à peine plus qu'une seule date.
+
+Cycles gel/dégel : l'app hérite d'un indicateur 0/1 (la fenêtre passe par
+0°C). Le backfill compte par défaut les vrais cycles journaliers (jours où
+le max dépasse 0°C et le min passe sous 0°C, 0 à 7) ; cycles="window"
+reproduit l'indicateur de l'app pour réévaluer les modèles actuels.
+
+Sortie : table longue (entité, date) au schéma du registre de modèles
+(PHYSICAL_FEATURES, SPRING_FEATURES et colonnes météo de FULL_FEATURES),
+massif catégoriel, prête pour un lgb.Dataset.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scoring import route_topo_features
+from snow_quality import spring_scores
+from weather import SMOOTH_MAX, SMOOTH_ROUND, smooth_route_features
+
+WINDOW_DAYS = 7
+SNOW_DAY_CM = 1.0  # Chute journalière comptée comme « jour de neige »
+
+# Vraies mesures du jour de sortie, rangées sous le nom des prévisions du modèle complet
+FORECAST_FEATURES = {
+    "temp_max_forecast": "t_max",
+    "temp_min_forecast": "t_min",
+    "wind_forecast": "wind_max",
+    "snowfall_forecast": "snow",
+}
+
+# ============================================================================
+# JOURS-FENÊTRE
+# ============================================================================
+
+def window_days(times):
+    """Jour-fenêtre de chaque pas horaire : ]J-1 0h, J 0h] → J (datetime64[D])"""
+    floor = times.astype("datetime64[D]")
+    return floor + (times > floor).astype(np.int64).astype("timedelta64[D]")
+
+
+def daily_bins(cube):
+    """
+    Agrégats de chaque grille par jour-fenêtre, sur une plage de jours
+    continue (jours sans aucun pas horaire : NaN / 0).
+
+    Returns:
+        (jours datetime64[D] (n_days,), dict de tableaux (n_grid, n_days) :
+         t_min, t_max, wind_max, snow, rows)
+    """
+    day = window_days(cube.times)
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    days = np.arange(day[0], day[-1] + np.timedelta64(1, "D"))
+    pos = (day[starts] - days[0]).astype(np.int64)
+
+    temp = cube.hourly["temperature_2m"]
+    reduced = {
+        # fmin / fmax ignorent les NaN (pas absents) comme nanmin / nanmax
+        "t_min": np.fmin.reduceat(temp, starts, axis=1),
+        "t_max": np.fmax.reduceat(temp, starts, axis=1),
+        "wind_max": np.fmax.reduceat(cube.hourly["wind_speed_10m"], starts, axis=1),
+        "snow": np.add.reduceat(np.nan_to_num(cube.hourly["snowfall"]), starts, axis=1),
+        "rows": np.add.reduceat(cube.hourly_present.astype(np.int32), starts, axis=1),
+    }
+    bins = {}
+    for name, values in reduced.items():
+        fill = 0 if name in ("snow", "rows") else np.nan
+        dense = np.full((cube.n_grid, len(days)), fill, dtype=values.dtype)
+        dense[:, pos] = values
+        bins[name] = dense
+    return days, bins
+
+
+def rolling(values, op, days=WINDOW_DAYS):
+    """Agrégat glissant sur les `days` dernières colonnes (op : np.fmin, np.fmax, np.add)"""
+    out = values.copy()
+    for shift in range(1, days):
+        out[:, shift:] = op(out[:, shift:], values[:, :-shift])
+    return out
+
+
+# ============================================================================
+# FEATURES PAR GRILLE
+# ============================================================================
+
+def grid_season_features(cube, start=None, end=None, days=WINDOW_DAYS, cycles="daily"):
+    """
+    Features de chaque grille pour chaque date de [start, end] (défaut :
+    tout l'historique horaire), mêmes fenêtres que grid_window_features.
+
+    Args:
+        cycles : "daily" (nombre de jours gel/dégel) ou "window" (indicateur de l'app)
+
+    Returns:
+        (dates datetime64[D] (n_dates,), dict de tableaux (n_grid, n_dates),
+         bool (n_grid, n_dates) fenêtre non vide)
+    """
+    if cycles not in ("daily", "window"):
+        raise ValueError(f"cycles inconnu : {cycles}")
+    all_days, bins = daily_bins(cube)
+
+    t_min = rolling(bins["t_min"], np.fmin, days)
+    t_max = rolling(bins["t_max"], np.fmax, days)
+    if cycles == "daily":
+        day_cycle = (bins["t_max"] > 0) & (bins["t_min"] < 0)
+        freeze_thaw = rolling(day_cycle.astype(float), np.add, days)
+    else:
+        freeze_thaw = ((t_max > 0) & (t_min < 0)).astype(float)
+
+    # Jours depuis la dernière chute notable (NaN si aucune dans l'historique)
+    col = np.arange(len(all_days))
+    last_snow = np.maximum.accumulate(
+        np.where(bins["snow"] >= SNOW_DAY_CM, col, -1), axis=1
+    )
+
+    features = {
+        "temp_min_7d_avg": t_min,
+        "temp_max_7d_avg": t_max,
+        "temp_amp_7d_avg": t_max - t_min,
+        "snowfall_7d_sum": rolling(bins["snow"], np.add, days),
+        "wind_max_7d": rolling(bins["wind_max"], np.fmax, days),
+        "freeze_thaw_cycles_7d": freeze_thaw,
+        "days_since_last_snow": np.where(last_snow >= 0, col - last_snow, np.nan),
+    }
+    # Jour de sortie J = jour-fenêtre J+1 (]J 0h, J+1 0h])
+    for name, source in FORECAST_FEATURES.items():
+        ahead = np.full_like(bins[source], np.nan, dtype=float)
+        ahead[:, :-1] = bins[source][:, 1:]
+        features[name] = ahead
+    has_window = rolling(bins["rows"], np.add, days) > 0
+
+    keep = np.ones(len(all_days), dtype=bool)
+    if start is not None:
+        keep &= all_days >= np.datetime64(pd.Timestamp(start).date())
+    if end is not None:
+        keep &= all_days <= np.datetime64(pd.Timestamp(end).date())
+    features = {name: values[:, keep] for name, values in features.items()}
+    return all_days[keep], features, has_window[:, keep]
+
+
+# ============================================================================
+# FEATURES PAR ITINÉRAIRE
+# ============================================================================
+
+def route_season_features(grid_features, has_window, neighbor_idx, neighbor_dist,
+                          n_neighbors=5, chunk=512):
+    """
+    Lissage inverse-distance de route_physical_features sur toutes les
+    dates d'un coup, par paquets de `chunk` itinéraires (mémoire bornée).
+
+    Returns:
+        (dict de tableaux (n_routes, n_dates), bool (n_routes, n_dates))
+    """
+    parts, available = [], []
+    for s in range(0, len(neighbor_idx), chunk):
+        out, any_data = smooth_route_features(
+            grid_features, has_window, neighbor_idx[s:s + chunk], neighbor_dist[s:s + chunk],
+            n_neighbors, max_features=SMOOTH_MAX | {"wind_forecast"},
+            round_features=SMOOTH_ROUND,
+        )
+        parts.append(out)
+        available.append(any_data)
+    features = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+    return features, np.concatenate(available)
+
+
+# ============================================================================
+# TABLE D'ENTRAÎNEMENT
+# ============================================================================
+
+def feature_table(keys, dates, features, available, dropna=True):
+    """
+    Table longue (entité, date) : clés de l'entité, features météo, features
+    calendaires et score printemps. Les lignes sans données météo sont
+    retirées (dropna) ou gardées avec meteo_available = 0.
+
+    Args:
+        keys      : DataFrame, une ligne par entité (grille ou itinéraire)
+        dates     : datetime64[D] (n_dates,)
+        features  : dict de tableaux (n_entities, n_dates)
+        available : bool (n_entities, n_dates)
+    """
+    n_entities, n_dates = available.shape
+    entity = np.repeat(np.arange(n_entities), n_dates)
+    day = np.tile(np.arange(n_dates), n_entities)
+    mask = available.ravel() if dropna else np.ones(len(entity), dtype=bool)
+
+    table = keys.iloc[entity[mask]].reset_index(drop=True)
+    when = pd.DatetimeIndex(dates[day[mask]])
+    table["date"] = when
+    for name, values in features.items():
+        table[name] = values.ravel()[mask]
+
+    return derived_features(table, available.ravel()[mask])
+
+
+def derived_features(table, available):
+    """
+    Colonnes dérivées d'une table qui a déjà date et features météo :
+    neige récente, score printemps, calendrier, massif catégoriel.
+    """
+    when = pd.DatetimeIndex(table["date"])
+    available = np.asarray(available, dtype=bool)
+    recent_snow = (table["snowfall_7d_sum"] >= SNOW_DAY_CM).astype(int)
+    if available.all():
+        table["freeze_thaw_cycles_7d"] = table["freeze_thaw_cycles_7d"].astype(int)
+        table["recent_snow_7d"] = recent_snow
+    else:
+        # Lignes sans météo gardées (dropna=False) : entiers nullables, NA sur ces lignes
+        table["freeze_thaw_cycles_7d"] = table["freeze_thaw_cycles_7d"].where(available).astype("Int16")
+        table["recent_snow_7d"] = recent_snow.where(available).astype("Int8")
+    table["meteo_available"] = available.astype(int)
+    table["spring_snow_score"] = np.where(available, spring_scores(table), np.nan)
+    table["month"] = when.month
+    table["day_of_week"] = when.dayofweek
+    table["is_weekend"] = (when.dayofweek >= 5).astype(int)
+    if "massif" in table:
+        table["massif"] = table["massif"].astype("category")
+    return table
+
+
+def grid_table(cube, start=None, end=None, cycles="daily", dropna=True):
+    """Table (grille, date) : même forme que spring_score_validation_dataset.csv, par grille"""
+    dates, features, has_window = grid_season_features(cube, start, end, cycles=cycles)
+    keys = pd.DataFrame({"latitude": cube.grid_lat, "longitude": cube.grid_lon})
+    return feature_table(keys, dates, features, has_window, dropna)
+
+
+def route_table(cube, catalogue, start=None, end=None, cycles="daily", dropna=True,
+                route_grids=None):
+    """Table (itinéraire, date) avec les infos topo de snow_details"""
+    dates, features, has_window = grid_season_features(cube, start, end, cycles=cycles)
+    neighbor_idx, neighbor_dist = route_grids or cube.nearest_grids(
+        catalogue.lat, catalogue.lon, k=5
+    )
+    route_features, available = route_season_features(
+        features, has_window, neighbor_idx, neighbor_dist
+    )
+    all_routes = np.arange(catalogue.n)
+    keys = catalogue.frame[[c for c in ("name", "url") if c in catalogue.frame]].copy()
+    keys.insert(0, "route", all_routes)
+    for name, values in route_topo_features(catalogue, all_routes).items():
+        keys[name] = values
+    return feature_table(keys, dates, route_features, available, dropna)
@@ -0,0 +1,363 @@
+"""
+Rejeu « à date » d'une saison passée : pour chaque jour, la météo, le
+BERA et le catalogue tels qu'ils étaient connus ce jour-là, le scoring
+complet pour une grille de profils utilisateurs, puis la comparaison des
+classements avec les sorties réellement faites et le ressenti de leurs
+récits (data/recit_sentiment_analysis.csv).
+
+Tout est rangé en tableaux (n_jours, n_itinéraires) : score_routes
+s'applique tel quel à une saison entière (les colonnes itinéraire se
+diffusent sur l'axe des jours), un classement est un argsort par ligne.
+Seul le score neige (un predict par jour) garde une boucle sur les jours.
+
+À date :
+    météo    : agrégats du jour et fenêtre 7 jours du cube (archive, cf.
+               meteo_archive.py), le jour de sortie étant pris observé
+               (prévision parfaite)
+    BERA     : bulletin en vigueur le matin de la sortie (date_validite =
+               fin de validité), sinon le dernier paru dans les
+               BERA_MAX_AGE précédents ; au-delà, risque inconnu (NaN,
+               DEFAULT_AVY_RISK au scoring)
+    catalogue: itinéraires dont first_seen (si la colonne existe) précède
+               le jour rejoué, sinon catalogue complet
+"""
+
+import glob
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from backfill import grid_season_features, route_season_features
+from catalogue import EXPOSITIONS
+from data_version import ARTEFACTS
+from scoring import DEFAULT_AVY_RISK, route_topo_features, score_routes
+from snapshots import SNAPSHOT_ROOT
+from snow_quality import hybrid_scores
+
+UserProfile = namedtuple("UserProfile", ["name", "niveau", "dplus_min", "dplus_max", "expositions"])
+
+PROFILE_NIVEAUX = ["S2", "S3", "S4"]
+PROFILE_DPLUS = [(400, 900), (800, 1500), (1200, 2500)]
+PROFILE_EXPOSITIONS = {
+    "toutes": list(EXPOSITIONS),
+    "froides": ["N", "NE", "E", "O", "NO"],
+    "sud": ["SE", "S", "SO"],
+}
+
+BERA_MORNING = pd.Timedelta(hours=8)  # Bulletin consulté le matin de la sortie
+BERA_MAX_AGE = pd.Timedelta(days=2)   # Bulletin plus ancien : pas le risque du jour
+BERA_MIN_COVERAGE = 0.5               # En dessous : historique BERA insuffisant (avertissement)
+SENTIMENT_LABELS = {"positive": 1, "neutral": 0, "negative": -1}
+SENTIMENT_FILE = "data/recit_sentiment_analysis.csv"
+C2C_ROUTE_URL = "https://www.camptocamp.org/routes/{}"
+
+
+def profile_grid(niveaux=PROFILE_NIVEAUX, dplus_ranges=PROFILE_DPLUS,
+                 expositions=PROFILE_EXPOSITIONS):
+    """Produit cartésien niveau x plage de D+ x jeu d'expositions"""
+    return [
+        UserProfile(f"{niveau} {lo}-{hi} {expo_name}", niveau, lo, hi, tuple(expos))
+        for niveau in niveaux
+        for lo, hi in dplus_ranges
+        for expo_name, expos in expositions.items()
+    ]
+
+
+# ============================================================================
+# DONNÉES À DATE
+# ============================================================================
+
+def default_bera_files():
+    """Bulletin courant + ceux des instantanés publiés localement"""
+    files = [ARTEFACTS["bera"]] + sorted(glob.glob(f"{SNAPSHOT_ROOT}/*/bera_latest.csv"))
+    return [f for f in files if os.path.exists(f)]
+
+
+def bera_history(frames):
+    """Bulletins de plusieurs fichiers (instantanés, historique) réunis et dédoublonnés"""
+    history = pd.concat(frames, ignore_index=True)
+    history["massif"] = history["massif"].astype(str).str.strip().str.upper()
+    history["date_validite"] = pd.to_datetime(
+        history["date_validite"], format="ISO8601", errors="coerce", utc=True
+    ).dt.tz_localize(None)
+    history["risque_actuel"] = pd.to_numeric(history["risque_actuel"], errors="coerce")
+    return (
+        history.dropna(subset=["date_validite", "risque_actuel"])
+        .drop_duplicates(["massif", "date_validite"], keep="last")
+        .sort_values("date_validite")
+        .reset_index(drop=True)
+    )
+
+
+def bera_as_of(history, massifs, days):
+    """
+    Niveau de risque (1-5) de chaque massif le matin de chaque jour :
+    bulletin encore valide (au plus un jour d'avance), sinon le dernier paru
+    s'il a moins de BERA_MAX_AGE.
+
+    Returns:
+        float (n_days, n_massifs), NaN si aucun bulletin récent
+    """
+    n_days, n_massifs = len(days), len(massifs)
+    query = pd.DataFrame({
+        "massif": np.repeat(np.asarray(massifs, dtype=object), n_days),
+        "at": np.tile(pd.DatetimeIndex(days) + BERA_MORNING, n_massifs),
+        "row": np.tile(np.arange(n_days), n_massifs),
+        "col": np.repeat(np.arange(n_massifs), n_days),
+    }).sort_values("at", kind="stable")
+    bulletins = history[["massif", "date_validite", "risque_actuel"]]
+    merged = {}
+    for direction, tolerance in (("forward", pd.Timedelta(days=1)), ("backward", BERA_MAX_AGE)):
+        merged[direction] = pd.merge_asof(
+            query, bulletins, left_on="at", right_on="date_validite", by="massif",
+            direction=direction, tolerance=tolerance,
+        )["risque_actuel"].to_numpy()
+    level = np.where(np.isnan(merged["forward"]), merged["backward"], merged["forward"])
+
+    out = np.full((n_days, n_massifs), np.nan)
+    out[query["row"].to_numpy(), query["col"].to_numpy()] = level
+    return out
+
+
+def season_route_meteo(cube, neighbor_idx, neighbor_dist, days):
+    """Météo du jour de tous les itinéraires pour chaque jour : tableaux (n_days, n_routes)"""
+    per_day = [cube.route_meteo(neighbor_idx, neighbor_dist, day) for day in days]
+    return {name: np.stack([m[name] for m in per_day]) for name in per_day[0]}
+
+
+def catalogue_as_of(catalogue, days):
+    """bool (n_days, n_routes) : itinéraire déjà publié ce jour-là (None = tous)"""
+    if "first_seen" not in catalogue.frame:
+        return None
+    first_seen = pd.to_datetime(catalogue.frame["first_seen"], errors="coerce").to_numpy()
+    known = np.isnat(first_seen)
+    return known[None, :] | (first_seen[None, :] <= pd.DatetimeIndex(days).to_numpy()[:, None])
+
+
+# ============================================================================
+# REJEU
+# ============================================================================
+
+def rank_matrix(scores, mask):
+    """
+    Rang (0 = meilleur) de chaque itinéraire filtré, par jour ; ordre de
+    select_top_n (score décroissant, égalités par ordre du catalogue).
+
+    Returns:
+        (ordre (n_days, n_routes), rangs int (n_days, n_routes), -1 hors filtre)
+    """
+    masked = np.where(mask, scores, -np.inf)
+    order = np.argsort(-masked, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(order.shape[1]), order.shape), axis=1)
+    return order, np.where(mask, rank, -1)
+
+
+class SeasonReplay:
+    """
+    Saison rejouée : météo, risque et catalogue à date précalculés une
+    fois, puis classements par profil (cf. run).
+
+    Args:
+        cube        : WeatherCube couvrant la saison (+ 7 jours avant)
+        catalogue   : RouteCatalogue
+        bera        : bera_history(...)
+        days        : dates (datetime.date) à rejouer
+        route_grids : nearest_grids du catalogue (calculé si None)
+        models      : ModelRegistry pour le score neige (None = pas de score neige)
+    """
+
+    def __init__(self, cube, catalogue, bera, days, route_grids=None, models=None):
+        self.cube = cube
+        self.catalogue = catalogue
+        self.days = list(days)
+        self.models = models
+        self.route_grids = route_grids or cube.nearest_grids(catalogue.lat, catalogue.lon, k=5)
+
+        self.meteo = season_route_meteo(self.cube, *self.route_grids, self.days)
+        level = bera_as_of(bera, catalogue.massifs, self.days)[:, catalogue.massif_code]
+        self.risk = np.where(np.isnan(level), DEFAULT_AVY_RISK, level / 5.0)
+        self.bera_coverage = float(np.mean(~np.isnan(level))) if level.size else 0.0
+        self.published = catalogue_as_of(catalogue, self.days)
+        self._features = None
+
+    def scores(self, profile):
+        """Scores (n_days, n_routes) : score_routes sur toute la saison d'un coup"""
+        return score_routes(self.catalogue, self.meteo, self.risk,
+                            profile.niveau, profile.dplus_min, profile.dplus_max)
+
+    def mask(self, profile):
+        """Itinéraires proposables (n_days, n_routes) : filtres du profil + catalogue à date"""
+        idx = self.catalogue.filter(dplus_min=profile.dplus_min, dplus_max=profile.dplus_max,
+                                    expositions=list(profile.expositions))
+        mask = np.zeros(self.catalogue.n, dtype=bool)
+        mask[idx] = True
+        mask = np.broadcast_to(mask, (len(self.days), self.catalogue.n))
+        return mask if self.published is None else mask & self.published
+
+    def run(self, profiles, top_n=10, outings=None):
+        """
+        Classements de chaque profil pour chaque jour, et position des
+        sorties réelles dans ces classements.
+
+        Args:
+            outings : resolve_outings(...) (None = classements seuls)
+
+        Returns:
+            (rankings, outcomes) : DataFrames longs
+            rankings : profile, date, rank, route, score, n_filtered
+            outcomes : profile, id_sortie, date, route, label, in_filter,
+                       rank, rank_score (1 = premier, 0 = dernier), in_top
+        """
+        day_values = pd.DatetimeIndex(self.days)
+        score_memo = {}
+        rankings, outcomes = [], []
+        for profile in profiles:
+            key = (profile.niveau, profile.dplus_min, profile.dplus_max)
+            if key not in score_memo:
+                score_memo[key] = self.scores(profile)
+            scores = score_memo[key]
+            mask = self.mask(profile)
+            order, rank = rank_matrix(scores, mask)
+            n_filtered = mask.sum(axis=1)
+
+            # Top N de chaque jour
+            top = order[:, :top_n]
+            positions = np.broadcast_to(np.arange(top.shape[1]), top.shape)
+            keep = positions < n_filtered[:, None]
+            day_of = np.broadcast_to(np.arange(len(self.days))[:, None], top.shape)
+            rankings.append(pd.DataFrame({
+                "profile": profile.name,
+                "date": day_values[day_of[keep]],
+                "rank": positions[keep] + 1,
+                "route": top[keep],
+                "score": scores[day_of[keep], top[keep]],
+                "n_filtered": n_filtered[day_of[keep]],
+            }))
+
+            if outings is not None and len(outings):
+                d, r = outings["day"].to_numpy(), outings["route"].to_numpy()
+                route_rank = rank[d, r]
+                in_filter = route_rank >= 0
+                span = np.maximum(n_filtered[d] - 1, 1)
+                outcomes.append(pd.DataFrame({
+                    "profile": profile.name,
+                    "id_sortie": outings["id_sortie"].to_numpy(),
+                    "date": day_values[d],
+                    "route": r,
+                    "label": outings["label"].to_numpy(),
+                    "in_filter": in_filter,
+                    "rank": np.where(in_filter, route_rank + 1, -1),
+                    "rank_score": np.where(in_filter, 1.0 - route_rank / span, np.nan),
+                    "in_top": in_filter & (route_rank < top_n),
+                }))
+
+        rankings = pd.concat(rankings, ignore_index=True)
+        if self.models is not None:
+            rankings["snow"] = self.snow_scores(rankings["date"], rankings["route"])
+        outcomes = pd.concat(outcomes, ignore_index=True) if outcomes else None
+        return rankings, outcomes
+
+    # ------------------------------------------------------------------
+    # Score neige (features 7 jours de backfill.py, un predict par jour)
+    # ------------------------------------------------------------------
+
+    def snow_scores(self, dates, routes):
+        """Score neige hybride de couples (date, itinéraire), NaN sans météo"""
+        if self._features is None:
+            # Indicateur gel/dégel 0/1 de l'app : celui des modèles actuels
+            feature_days, grid_features, has_window = grid_season_features(
+                self.cube, self.days[0], self.days[-1], cycles="window"
+            )
+            features, available = route_season_features(grid_features, has_window, *self.route_grids)
+            self._features = (pd.DatetimeIndex(feature_days), features, available)
+        feature_days, features, available = self._features
+
+        dates = pd.DatetimeIndex(dates)
+        routes = np.asarray(routes)
+        col = feature_days.get_indexer(dates)
+        out = np.full(len(routes), np.nan)
+        pairs = pd.DataFrame({"col": col, "route": routes})
+        for c, group in pairs[col >= 0].groupby("col"):
+            unique_routes, inverse = np.unique(group["route"].to_numpy(), return_inverse=True)
+            ok = available[unique_routes, c]
+            if not ok.any():
+                continue
+            batch = {name: values[unique_routes[ok], c] for name, values in features.items()}
+            batch.update(route_topo_features(self.catalogue, unique_routes[ok]))
+            snow, _ = hybrid_scores(self.models, batch, feature_days[c].date())
+            per_route = np.full(len(unique_routes), np.nan)
+            per_route[ok] = snow["hybrid"]
+            out[group.index.to_numpy()] = per_route[inverse]
+        return out
+
+
+# ============================================================================
+# SORTIES ET RESSENTI
+# ============================================================================
+
+def resolve_outings(outings, sentiment, catalogue, days):
+    """
+    Sorties rattachées au catalogue et aux jours rejoués, avec leur ressenti.
+
+    Args:
+        outings   : DataFrame id_sortie, date, et route_url ou route_id (Camptocamp)
+        sentiment : DataFrame id_sortie, sentiment, confidence
+
+    Returns:
+        (DataFrame id_sortie, date, day, route, sentiment, confidence, label,
+         dict de comptes pour le rapport)
+    """
+    df = outings.merge(sentiment, on="id_sortie", how="inner")
+    counts = {"outings": len(outings), "with_sentiment": len(df)}
+    if "route_url" not in df and "route_id" in df:
+        df["route_url"] = df["route_id"].map(lambda r: C2C_ROUTE_URL.format(int(r)))
+    url_index = pd.Series(np.arange(catalogue.n), index=catalogue.frame["url"].to_numpy())
+    url_index = url_index[~url_index.index.duplicated()]
+    df["route"] = df["route_url"].map(url_index)
+    df = df.dropna(subset=["route"])
+    counts["in_catalogue"] = len(df)
+
+    day_index = pd.DatetimeIndex(days)
+    df["day"] = day_index.get_indexer(pd.to_datetime(df["date"]).dt.normalize())
+    df = df[df["day"] >= 0].copy()
+    counts["in_season"] = len(df)
+
+    df["route"] = df["route"].astype(np.int64)
+    df["label"] = df["sentiment"].map(SENTIMENT_LABELS).fillna(0).astype(int)
+    columns = ["id_sortie", "date", "day", "route", "sentiment", "confidence", "label"]
+    return df[columns].reset_index(drop=True), counts
+
+
+def auc(scores, positive):
+    """Aire sous la courbe ROC (Mann-Whitney) : P(score positif > score négatif)"""
+    scores, positive = np.asarray(scores, dtype=float), np.asarray(positive, dtype=bool)
+    n_pos, n_neg = positive.sum(), (~positive).sum()
+    if n_pos == 0 or n_neg == 0:
+        return np.nan
+    ranks = pd.Series(scores).rank().to_numpy()
+    return (ranks[positive].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def profile_metrics(outcomes, top_n):
+    """
+    Par profil : sorties classées, part dans le top N, rang moyen (1 =
+    premier) par ressenti, et AUC ressenti positif vs autres.
+    """
+    ranked = outcomes[outcomes["in_filter"]]
+    rows = []
+    for name, group in ranked.groupby("profile", sort=False):
+        by_label = group.groupby("label")["rank_score"].mean()
+        rows.append({
+            "profile": name,
+            "outings": len(group),
+            f"hit_rate@{top_n}": group["in_top"].mean(),
+            "rank_score": group["rank_score"].mean(),
+            "rank_score_positive": by_label.get(1, np.nan),
+            "rank_score_neutral": by_label.get(0, np.nan),
+            "rank_score_negative": by_label.get(-1, np.nan),
+            "auc_positive": auc(group["rank_score"], group["label"] > 0),
+        })
+    return pd.DataFrame(rows)
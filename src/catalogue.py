@@ -0,0 +1,171 @@
+"""
+Catalogue d'itinéraires en colonnes, construit une seule fois au chargement.
+
+Les chaînes (massif, exposition, cotation) sont converties en codes int8 et
+en bitmaps par catégorie : une combinaison de filtres se résout en quelques
+ET bit à bit au lieu de `isin` répétés sur des colonnes texte.
+"""
+
+import numpy as np
+
+from spatial import GridIndex
+
+EXPOSITIONS = ["N", "NE", "E", "SE", "S", "SO", "O", "NO"]
+NIVEAUX = ["S1", "S2", "S3", "S4", "S5"]
+
+# Pénalité d'exposition (chaleur / soleil) utilisée par le scoring
+EXPO_PENALTY = {
+    "N": 0.1, "NE": 0.2, "E": 0.4, "SE": 0.7,
+    "S": 1.0, "SO": 0.8, "O": 0.6, "NO": 0.3, "NW": 0.2
+}
+DEFAULT_EXPO_PENALTY = 0.5
+DEFAULT_LEVEL = 3
+
+
+def parse_level(difficulty):
+    """Cotation 'S3', 'S4+'... → niveau entier 1-5 (3 par défaut)"""
+    diff = str(difficulty).strip().upper()
+    for i, niveau in enumerate(NIVEAUX, 1):
+        if diff.startswith(niveau):
+            return i
+    return DEFAULT_LEVEL
+
+
+def parse_expo_penalty(exposition):
+    """Exposition texte → pénalité [0-1] (0.5 si inconnue)"""
+    return EXPO_PENALTY.get(str(exposition).strip().upper()[:2], DEFAULT_EXPO_PENALTY)
+
+
+class RouteCatalogue:
+    """
+    Vue colonnaire immuable des itinéraires.
+
+    Attributs principaux :
+        frame        : DataFrame d'origine (index 0..n-1)
+        massif_code  : int8, index dans `massifs` (-1 si absent)
+        expo_code    : int8, index dans EXPOSITIONS (-1 si hors liste, ex: 'T')
+        level        : int8, niveau 1-5 déduit de difficulty_ski
+        expo_penalty : float, pénalité d'exposition précalculée
+        dplus        : float, dénivelé positif
+        lat, lon     : float, coordonnées du sommet
+    """
+
+    def __init__(self, df):
+        self.frame = df.reset_index(drop=True)
+        self.n = len(self.frame)
+
+        # --- Codes entiers ---
+        self.massifs = sorted(self.frame["massif"].unique())
+        if len(self.massifs) > np.iinfo(np.int8).max:
+            raise ValueError(f"Trop de massifs pour un code int8 : {len(self.massifs)}")
+        massif_index = {m: i for i, m in enumerate(self.massifs)}
+        self.massif_code = self.frame["massif"].map(massif_index).to_numpy(dtype=np.int8)
+
+        expo_clean = self.frame["exposition"].astype(str).str.strip().str.upper()
+        expo_index = {e: i for i, e in enumerate(EXPOSITIONS)}
+        self.expo_code = expo_clean.map(expo_index).fillna(-1).to_numpy(dtype=np.int8)
+        self.expo_penalty = self.frame["exposition"].map(parse_expo_penalty).to_numpy(dtype=float)
+
+        self.level = self.frame["difficulty_ski"].map(parse_level).to_numpy(dtype=np.int8)
+
+        # Colonnes précalculées exposées au scoring (évite de reparser les chaînes)
+        self.frame["route_level"] = self.level
+        self.frame["expo_penalty"] = self.expo_penalty
+
+        self.dplus = self.frame["denivele_positif"].to_numpy(dtype=float)
+        self.lat = self.frame["lat"].to_numpy(dtype=float)
+        self.lon = self.frame["lon"].to_numpy(dtype=float)
+
+        # --- D+ trié pour les requêtes par intervalle (searchsorted) ---
+        self._dplus_order = np.argsort(self.dplus, kind="stable")
+        self._dplus_sorted = self.dplus[self._dplus_order]
+
+        # --- Bitmaps par catégorie (bits compactés, 1 bit par itinéraire) ---
+        self._massif_bits = {
+            m: self._pack(self.massif_code == i) for i, m in enumerate(self.massifs)
+        }
+        self._expo_bits = {
+            e: self._pack(self.expo_code == i) for i, e in enumerate(EXPOSITIONS)
+        }
+        self._level_bits = {
+            niveau: self._pack(self.level == i) for i, niveau in enumerate(NIVEAUX, 1)
+        }
+        # --- Index spatial (rayon / bbox) ---
+        self.spatial = GridIndex(self.lat, self.lon)
+
+        self._all_bits = self._pack(np.ones(self.n, dtype=bool))
+        self._no_bits = np.zeros_like(self._all_bits)
+
+    # ------------------------------------------------------------------
+    # Bitmaps
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pack(mask):
+        return np.packbits(mask)
+
+    def _unpack(self, bits):
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    def _union(self, table, keys):
+        """OU bit à bit des bitmaps des catégories demandées"""
+        bits = self._no_bits.copy()
+        for key in keys:
+            if key in table:
+                bits |= table[key]
+        return bits
+
+    def dplus_bits(self, dplus_min, dplus_max):
+        """Bitmap des itinéraires avec dplus_min <= D+ <= dplus_max"""
+        lo = np.searchsorted(self._dplus_sorted, dplus_min, side="left")
+        hi = np.searchsorted(self._dplus_sorted, dplus_max, side="right")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self._dplus_order[lo:hi]] = True
+        return self._pack(mask)
+
+    def _index_bits(self, idx):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[idx] = True
+        return self._pack(mask)
+
+    def filter_bits(self, massifs=None, dplus_min=None, dplus_max=None,
+                    expositions=None, niveaux=None, near=None, bbox=None):
+        """
+        Combine les filtres en un seul bitmap. Un argument à None
+        n'applique pas de filtre sur ce critère.
+
+        near : (lat, lon, rayon_km)
+        bbox : (sud, ouest, nord, est) en degrés
+        """
+        bits = self._all_bits.copy()
+        if massifs is not None:
+            bits &= self._union(self._massif_bits, massifs)
+        if expositions is not None:
+            bits &= self._union(self._expo_bits, expositions)
+        if niveaux is not None:
+            bits &= self._union(self._level_bits, niveaux)
+        if dplus_min is not None or dplus_max is not None:
+            bits &= self.dplus_bits(
+                -np.inf if dplus_min is None else dplus_min,
+                np.inf if dplus_max is None else dplus_max,
+            )
+        if near is not None:
+            bits &= self._index_bits(self.spatial.radius(*near))
+        if bbox is not None:
+            bits &= self._index_bits(self.spatial.bbox(*bbox))
+        return bits
+
+    def filter(self, massifs=None, dplus_min=None, dplus_max=None,
+               expositions=None, niveaux=None, near=None, bbox=None):
+        """Indices (triés) des itinéraires satisfaisant tous les filtres"""
+        bits = self.filter_bits(
+            massifs, dplus_min, dplus_max, expositions, niveaux, near, bbox
+        )
+        return np.flatnonzero(self._unpack(bits))
+
+    def take(self, idx):
+        """Sous-DataFrame des itinéraires aux indices donnés"""
+        return self.frame.iloc[idx]
+
+    def __len__(self):
+        return self.n
@@ -0,0 +1,204 @@
+"""
+Chargement et normalisation des données d'un instantané, sans Streamlit
+(appelé par l'app, le rechargement à chaud et les benchmarks).
+
+Produit les tableaux et précalculs servis par l'app : catalogue colonnaire,
+cube météo, voisinage itinéraire → grilles, risque BERA par itinéraire et
+prévisions du jour (icône + alertes) par massif.
+"""
+
+import numpy as np
+import pandas as pd
+
+from catalogue import RouteCatalogue
+from data_version import load_derived, save_derived
+from memory import apply_budget, budget_bytes
+from scoring import risk_by_route, risk_level_by_route
+from weather import WeatherCube
+
+# ============================================================================
+# ICÔNES ET ALERTES MÉTÉO
+# ============================================================================
+
+def get_weather_icon(meteo):
+    """
+    Retourne un emoji météo selon les conditions.
+    Basé sur température, neige, précipitations, vent.
+    """
+    snow = meteo.get('total_snow', 0)
+    temp = meteo.get('mean_temp', 0)
+    precip = meteo.get('total_precip', 0)
+    wind = meteo.get('max_wind', 0)
+    
+    # Vent dominant
+    if wind > 40:
+        return "💨"  # Vent fort
+    
+    # Neige
+    if snow > 20:
+        return "🌨️"  # Neige forte
+    elif snow > 5:
+        return "🌨"   # Neige modérée
+    
+    # Pluie (temp positive + précip)
+    if temp > 0 and precip > 5:
+        return "🌧️"
+    
+    # Conditions spéciales (danger)
+    if temp > 0 and snow > 10:
+        return "⚠️"  # Neige + chaleur = transformation
+    
+    # Temps sec et froid (ciel clair probable)
+    if temp < -5 and snow < 2:
+        return "☀️"  # Beau temps froid
+    
+    # Temps doux
+    if temp > 0:
+        return "🌤️"  # Partiellement nuageux
+    
+    # Par défaut
+    return "⛅"  # Nuageux
+
+
+# Alertes conditions du jour : (message détaillé, libellé court)
+WEATHER_ALERTS = {
+    "neige": ("❄️ **Neige fraîche abondante** (20+ cm) → Risque plaques à vent", "❄️ Neige fraîche"),
+    "chaleur": ("☀️ **Températures positives** → Éviter expositions Sud (coulées)", "☀️ Redoux"),
+    "vent": ("💨 **Vent fort** (40+ km/h) → Attention aux crêtes", "💨 Vent fort"),
+}
+
+
+def weather_alerts(meteo):
+    """Clés de WEATHER_ALERTS déclenchées par un résumé météo"""
+    alerts = []
+    if meteo["total_snow"] > 20:
+        alerts.append("neige")
+    if meteo["mean_temp"] > 0:
+        alerts.append("chaleur")
+    if meteo["max_wind"] > 40:
+        alerts.append("vent")
+    return alerts
+
+
+# ============================================================================
+# CHARGEMENT DES DONNÉES (Optimisé pour Streamlit Cloud)
+# ============================================================================
+
+def build_outlook(cube, catalogue, route_grids, n_neighbors=3):
+    """
+    Résumé météo, icône et alertes de chaque jour, pour toutes les Alpes
+    puis par massif (grilles voisines de ses itinéraires). Calculé une fois
+    par version de données : l'en-tête des résultats n'est qu'une lecture.
+
+    Returns:
+        {"days": {date: jour}, "massifs": {massif: {date: jour}}}
+        avec jour = {"meteo": dict, "icon": str, "alerts": [clés]}
+    """
+    def by_day(summary):
+        days = {}
+        for i, date in enumerate(cube.dates):
+            if np.isnan(summary["mean_temp"][i]):
+                continue
+            meteo = {name: float(values[i]) for name, values in summary.items()}
+            days[date] = {
+                "meteo": meteo,
+                "icon": get_weather_icon(meteo),
+                "alerts": weather_alerts(meteo),
+            }
+        return days
+
+    outlook = {"days": by_day(cube.day_summary()), "massifs": {}}
+    neighbor_idx = route_grids[0][:, :n_neighbors]
+    for code, massif in enumerate(catalogue.massifs):
+        grid_mask = np.zeros(cube.n_grid, dtype=bool)
+        grid_mask[neighbor_idx[catalogue.massif_code == code].ravel()] = True
+        outlook["massifs"][massif] = by_day(cube.day_summary(grid_mask))
+    return outlook
+
+def load_routes(path):
+    """Catalogue CSV normalisé : massif en majuscules, coordonnées et D+ numériques"""
+    try:
+        df = pd.read_csv(path, encoding="utf-8")
+    except UnicodeDecodeError:
+        df = pd.read_csv(path, encoding="cp1252")
+
+    df["massif"] = df["massif"].astype(str).str.strip().str.upper()
+    
+    numeric_cols = ["lat", "lon", "denivele_positif"]
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df.dropna(subset=["lat", "lon", "denivele_positif"])
+
+
+# Incrémenter quand la structure des objets dérivés change (invalide data/.derived)
+DERIVED_TAG = "load_data-v3"
+
+# Noms des éléments du tuple renvoyé par load_data (panneau mémoire)
+DATA_FIELDS = [
+    "df", "df_bera", "dict_bera", "df_meteo", "unique_grids", "catalogue", "cube",
+    "route_grids", "route_risk", "route_risk_level", "outlook",
+]
+
+def load_data(paths, data_version):
+    """
+    Charge et normalise les données d'un instantané (cf. snapshots.py).
+    Appelée au démarrage puis en tâche de fond par SnapshotWatcher quand
+    une nouvelle version est publiée : aucun appel Streamlit ici.
+    Les précalculs (catalogue, cube météo) sont persistés par version
+    pour être réutilisés après un redémarrage. En mode budget
+    (SKI_MEMORY_BUDGET_MB), la copie renvoyée est allégée (memory.apply_budget).
+    """
+    derived = load_derived(data_version, DERIVED_TAG)
+    if derived is not None:
+        return apply_budget(derived) if budget_bytes() else derived
+
+    # ------------------------
+    # BERA
+    # ------------------------
+    df_bera = pd.read_csv(paths["bera"])
+    df_bera["massif"] = df_bera["massif"].astype(str).str.strip().str.upper()
+    df_bera["date_validite"] = pd.to_datetime(
+            df_bera["date_validite"], 
+            format="ISO8601",
+            errors="coerce"
+    )
+    
+    dict_bera = dict(
+        zip(df_bera["massif"], df_bera["risque_actuel"].astype(float) / 5.0)
+    )
+
+    # ------------------------
+    # MÉTÉO
+    # ------------------------
+    df_meteo = pd.read_parquet(paths["meteo"])
+
+    unique_grids = (
+        df_meteo[["latitude", "longitude"]]
+        .dropna()
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+
+    # ------------------------
+    # ITINÉRAIRES
+    # ------------------------
+    # Catalogue colonnaire (codes int8 + bitmaps) construit une seule fois
+    catalogue = RouteCatalogue(load_routes(paths["routes"]))
+    df = catalogue.frame
+
+    # Cube météo + voisinage itinéraire → grilles pour le scoring vectorisé
+    cube = WeatherCube(df_meteo)
+    route_grids = cube.nearest_grids(catalogue.lat, catalogue.lon, k=5)
+    route_risk = risk_by_route(catalogue, dict_bera)
+    route_risk_level = risk_level_by_route(catalogue, df_bera)
+    outlook = build_outlook(cube, catalogue, route_grids)
+
+    result = (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+              route_grids, route_risk, route_risk_level, outlook)
+    try:
+        save_derived(data_version, DERIVED_TAG, result)
+    except OSError:
+        pass  # Disque en lecture seule : on garde seulement le cache mémoire
+    # Mode budget : le précalcul persisté reste complet, seule la copie servie est allégée
+    return apply_budget(result) if budget_bytes() else result
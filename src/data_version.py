@@ -0,0 +1,210 @@
+"""
+Empreinte de version des données (hash du contenu des fichiers).
+
+Sert de clé aux caches : elle change exactement quand le contenu change,
+pas quand un checkout git modifie seulement les dates de fichiers.
+
+Chaque script de récupération enregistre ses artefacts dans
+`data/manifest.json` (hash, nombre de lignes, plage temporelle), écrit de
+façon atomique. Le manifeste est versionné : il ne contient rien de propre
+à une copie de travail (pas de mtime). Les hash déjà calculés sur une
+machine sont gardés dans un cache local hors git (cf. artefact_hashes).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime, timezone
+
+MANIFEST_PATH = "data/manifest.json"
+
+# Artefacts lus par l'app (nom logique → chemin)
+ARTEFACTS = {
+    "bera": "data/bera_latest.csv",
+    "meteo": "data/meteo_cache.parquet",
+    "routes": "data/raw/itineraires_alpes_camptocamp.csv",
+}
+
+_HASH_MEMO = {}
+
+
+def content_hash(path, chunk_size=1 << 20):
+    """
+    SHA-256 du contenu d'un fichier. Mémoïsé par (chemin, mtime, taille)
+    pour ne pas relire le fichier à chaque rerun Streamlit.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key in _HASH_MEMO:
+        return _HASH_MEMO[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    _HASH_MEMO[memo_key] = digest
+    return digest
+
+
+# ============================================================================
+# MANIFESTE
+# ============================================================================
+
+def atomic_write_bytes(path, data):
+    """Écrit via un fichier temporaire du même dossier puis os.replace"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp crée en 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, obj):
+    atomic_write_bytes(path, json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8"))
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    """Manifeste courant ({} si absent ou illisible)"""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _iso(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def update_manifest(name, path, rows=None, time_range=None, manifest_path=MANIFEST_PATH):
+    """
+    Enregistre (ou met à jour) l'artefact `name` dans le manifeste.
+
+    Args:
+        name       : nom logique ('bera', 'meteo', 'routes')
+        path       : chemin du fichier écrit
+        rows       : nombre de lignes
+        time_range : (début, fin) couverts par les données, si pertinent
+    """
+    manifest = read_manifest(manifest_path)
+    artefacts = manifest.setdefault("artefacts", {})
+    artefacts[name] = manifest_entry(path, rows, time_range)
+    manifest["version"] = manifest_version(artefacts)
+    atomic_write_json(manifest_path, manifest)
+    return manifest
+
+
+def manifest_entry(path, rows=None, time_range=None, record_path=None):
+    """Entrée de manifeste d'un fichier (record_path = chemin à inscrire)"""
+    stat = os.stat(path)
+    return {
+        "path": path if record_path is None else record_path,
+        "sha256": content_hash(path),
+        "bytes": stat.st_size,
+        "rows": None if rows is None else int(rows),
+        "time_range": None if time_range is None else [_iso(t) for t in time_range],
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def manifest_version(artefacts):
+    """Version combinée d'un dictionnaire d'entrées de manifeste"""
+    return version_from_hashes({n: a["sha256"] for n, a in artefacts.items()})
+
+
+def version_from_hashes(hashes):
+    h = hashlib.sha256()
+    for name in sorted(hashes):
+        h.update(name.encode("utf-8"))
+        h.update(hashes[name].encode("ascii"))
+    return h.hexdigest()[:16]
+
+
+def artefact_hashes(artefacts=None, cache_path=None):
+    """
+    Hash du contenu de chaque artefact.
+
+    Repris du cache local (data/.derived, hors git) si le fichier n'a pas
+    bougé depuis (taille et mtime identiques) ; sinon (clone, checkout git,
+    modification à la main) le contenu est rehaché et le cache mis à jour.
+    """
+    artefacts = ARTEFACTS if artefacts is None else artefacts
+    cache_path = cache_path or os.path.join(DERIVED_DIR, HASH_CACHE_NAME)
+    cache = read_manifest(cache_path)
+    hashes, changed = {}, False
+    for name, path in artefacts.items():
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = cache.get(key)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            hashes[name] = entry[2]
+        else:
+            hashes[name] = content_hash(path)
+            cache[key] = [stat.st_size, stat.st_mtime_ns, hashes[name]]
+            changed = True
+    if changed:
+        try:
+            atomic_write_json(cache_path, cache)
+        except OSError:
+            pass  # Cache seulement : rehaché au prochain démarrage
+    return hashes
+
+
+def current_version(artefacts=None):
+    """Version des données lues par l'app : ne dépend que du contenu"""
+    return version_from_hashes(artefact_hashes(artefacts))
+
+
+# ============================================================================
+# PRÉCALCULS DÉRIVÉS PERSISTÉS (réutilisés entre redémarrages)
+# ============================================================================
+
+DERIVED_DIR = "data/.derived"
+HASH_CACHE_NAME = "file_hashes.json"  # chemin absolu → [taille, mtime_ns, sha256]
+
+
+def _derived_path(version, tag, derived_dir):
+    return os.path.join(derived_dir, f"{tag}-{version}.pkl")
+
+
+def load_derived(version, tag, derived_dir=DERIVED_DIR):
+    """Objet dérivé persisté pour cette version de données (None si absent/illisible)"""
+    path = _derived_path(version, tag, derived_dir)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Absent, tronqué ou format de classe obsolète : on recalculera
+        return None
+
+
+def save_derived(version, tag, obj, keep=2, derived_dir=DERIVED_DIR):
+    """Persiste `obj` pour cette version et ne garde que les `keep` plus récents"""
+    path = _derived_path(version, tag, derived_dir)
+    atomic_write_bytes(path, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+    olds = sorted(
+        (os.path.join(derived_dir, f) for f in os.listdir(derived_dir)
+         if f.startswith(f"{tag}-") and f.endswith(".pkl")),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for old in olds[keep:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
@@ -0,0 +1,108 @@
+"""
+Requêtes HTTP JSON des scripts de récupération par lots parallèles
+(fetch_meteo_archive.py, fetch_camptocamp_outings.py) :
+
+- RateLimiter : débit maximal partagé par tous les threads
+- get_session : une session requests par thread (connexions réutilisées)
+- request_json : GET avec reprises et attente croissante sur 429 / 5xx
+- run_chunks : lots en parallèle, progression et interruption propre
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRIES = 4       # Tentatives par requête (429 / 5xx / coupure réseau)
+USER_AGENT = "SkiTouringLive/1.0 (Educational Project)"
+
+
+class RateLimiter:
+    """Espace les départs de requêtes d'au moins 1/rate seconde (partagé entre threads)"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_local = threading.local()
+
+
+def get_session(workers):
+    """Session HTTP du thread courant (connexions réutilisées d'un lot à l'autre)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=workers))
+        session.mount("https://", HTTPAdapter(pool_maxsize=workers))
+        session.headers["User-Agent"] = USER_AGENT
+        _local.session = session
+    return session
+
+
+def request_json(url, params, limiter, workers, retries=RETRIES, timer=None):
+    """
+    GET JSON via la session du thread, au rythme du limiteur partagé.
+    Réessaie avec attente croissante sur 429 / 5xx / erreur réseau.
+    timer : Timings du script appelant où compter le réseau (optionnel).
+    """
+    session = get_session(workers)
+    for attempt in range(retries):
+        limiter.wait()
+        try:
+            with timer.span("network") if timer is not None else nullcontext():
+                response = session.get(url, params=params, timeout=60)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            last_error = e
+            if isinstance(e, requests.exceptions.HTTPError) and e.response is not None \
+                    and 400 <= e.response.status_code < 500 and e.response.status_code != 429:
+                break  # Requête invalide : inutile d'insister
+            time.sleep(min(2 ** attempt, 30))
+    raise RuntimeError(f"{last_error} après {attempt + 1} tentative(s)")
+
+
+def run_chunks(label, fetch, writer, todo, base_url, workers, rate):
+    """
+    Lots en parallèle au rythme d'un limiteur partagé ; renvoie (lignes, lots en échec).
+    todo : [(chunk, *args)], chaque lot appelle
+           fetch(writer, chunk, *args, base_url, limiter, workers) → nombre de lignes
+    """
+    limiter = RateLimiter(rate)
+    rows, failed = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch, writer, chunk, *args, base_url, limiter, workers): chunk
+            for chunk, *args in todo
+        }
+        try:
+            for n, future in enumerate(as_completed(futures), 1):
+                chunk = futures[future]
+                try:
+                    n_rows = future.result()
+                    rows += n_rows
+                    print(f"📡 {label} [{n}/{len(todo)}] {chunk} ✅ {n_rows} lignes")
+                except Exception as e:
+                    failed.append(chunk)
+                    print(f"📡 {label} [{n}/{len(todo)}] {chunk} ❌ {e}")
+        except KeyboardInterrupt:
+            # Les lots en cours se terminent (écriture atomique), les autres sont abandonnés
+            for future in futures:
+                future.cancel()
+            raise
+    return rows, failed
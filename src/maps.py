@@ -0,0 +1,177 @@
+"""
+Construction des cartes folium (résultats, catalogue complet, carte par défaut).
+
+Fonctions pures, sans Streamlit : l'app met leurs sorties en cache par
+(résultats, version des données). Le catalogue complet (1 700+ points) est
+un seul calque GeoJSON dessiné sur canvas, pas 1 700 objets Marker.
+"""
+
+import folium
+import numpy as np
+from branca.colormap import LinearColormap
+
+from raster import RASTER_COLORS
+
+ALPS_CENTER = (45.5, 6.5)
+
+# Couleurs des marqueurs du top N (variées pour mieux distinguer)
+MARKER_COLORS = [
+    "red", "orange", "green", "blue", "purple", "darkred", "lightred",
+    "beige", "darkblue", "darkgreen", "cadetblue", "darkpurple", "pink",
+    "lightblue", "lightgreen", "gray", "black", "lightgray",
+]
+
+SCORE_COLORS = ["#d73027", "#fee08b", "#1a9850"]  # mauvais → bon
+
+
+def score_colormap(scores):
+    """Échelle rouge → vert calée sur les 5e-95e percentiles des scores"""
+    scores = np.asarray(scores, dtype=float)
+    finite = scores[np.isfinite(scores)]
+    if len(finite) == 0:
+        vmin, vmax = 0.0, 1.0
+    else:
+        vmin, vmax = np.percentile(finite, [5, 95])
+        if vmax <= vmin:
+            vmax = vmin + 1e-6
+    return _colormap(float(vmin), float(vmax))
+
+
+def _colormap(vmin, vmax):
+    colormap = LinearColormap(SCORE_COLORS, vmin=vmin, vmax=vmax)
+    colormap.caption = "Score (tout le catalogue)"
+    return colormap
+
+
+# ============================================================================
+# CALQUE CATALOGUE (GEOJSON)
+# ============================================================================
+
+def catalogue_geojson(catalogue, scores):
+    """
+    FeatureCollection de tout le catalogue, couleur précalculée par score.
+
+    Args:
+        catalogue : RouteCatalogue
+        scores    : tableau (n_routes,) de scores
+    """
+    colormap = score_colormap(scores)
+    frame = catalogue.frame
+    names = frame["name"].astype(str).to_numpy()
+    massifs = frame["massif"].astype(str).str.title().to_numpy()
+    features = []
+    for i in range(catalogue.n):
+        score = float(scores[i])
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [round(float(catalogue.lon[i]), 5), round(float(catalogue.lat[i]), 5)],
+            },
+            "properties": {
+                "name": names[i],
+                "massif": massifs[i],
+                "score": round(score, 2),
+                "color": colormap(min(max(score, colormap.vmin), colormap.vmax)),
+            },
+        })
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "vmin": colormap.vmin,
+        "vmax": colormap.vmax,
+    }
+
+
+def add_catalogue_layer(m, geojson, show=False):
+    """Ajoute le calque « tout le catalogue » (cercles canvas + légende)"""
+    layer = folium.GeoJson(
+        {"type": "FeatureCollection", "features": geojson["features"]},
+        name="🗺️ Tout le catalogue (score)",
+        show=show,
+        marker=folium.CircleMarker(radius=4, weight=0.5, fill_opacity=0.8),
+        style_function=lambda f: {
+            "color": "#333333",
+            "fillColor": f["properties"]["color"],
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=["name", "massif", "score"],
+            aliases=["Itinéraire", "Massif", "Score"],
+        ),
+        embed=True,
+    )
+    layer.add_to(m)
+    _colormap(geojson["vmin"], geojson["vmax"]).add_to(m)
+    return layer
+
+
+# ============================================================================
+# CALQUE SKIABILITÉ (IMAGE)
+# ============================================================================
+
+def add_skiability_overlay(m, overlay, show=False):
+    """
+    Superpose l'image de skiabilité du jour (cf. raster.py).
+
+    Args:
+        overlay : dict {"rgba": uint8 (H, W, 4), "bounds": [[s, o], [n, e]], "date": date}
+    """
+    folium.raster_layers.ImageOverlay(
+        image=overlay["rgba"],
+        bounds=overlay["bounds"],
+        name=f"❄️ Skiabilité du {overlay['date'].strftime('%d/%m')} (modèle neige)",
+        mercator_project=True,
+        show=show,
+    ).add_to(m)
+    legend = LinearColormap(
+        ["#%02x%02x%02x" % c for c in RASTER_COLORS], vmin=0, vmax=10
+    )
+    legend.caption = "Qualité de neige prédite (/10)"
+    legend.add_to(m)
+
+
+# ============================================================================
+# CARTES
+# ============================================================================
+
+def results_map(top, catalogue_layer=None, skiability=None):
+    """
+    Carte du top N, centrée sur le premier itinéraire.
+
+    Args:
+        top             : DataFrame du top N (lat, lon, name, score)
+        catalogue_layer : GeoJSON de catalogue_geojson (calque masqué par défaut)
+        skiability      : image de skiabilité du jour (calque masqué par défaut)
+    """
+    first = top.iloc[0]
+    m = folium.Map(location=[first["lat"], first["lon"]], zoom_start=10, prefer_canvas=True)
+
+    for i, (_, row) in enumerate(top.iterrows()):
+        folium.Marker(
+            [row["lat"], row["lon"]],
+            popup=f"{i+1}. {row['name']}<br>Score: {row['score']:.2f}",
+            tooltip=f"{i+1}. {row['name']}",
+            icon=folium.Icon(color=MARKER_COLORS[i % len(MARKER_COLORS)], icon="info-sign"),
+        ).add_to(m)
+
+    if catalogue_layer is not None:
+        add_catalogue_layer(m, catalogue_layer)
+    if skiability is not None:
+        add_skiability_overlay(m, skiability)
+    if catalogue_layer is not None or skiability is not None:
+        folium.LayerControl(collapsed=True).add_to(m)
+    return m
+
+
+def default_map(zoom_start=8, skiability=None):
+    """Carte par défaut des Alpes (skiabilité du jour affichée si fournie)"""
+    m = folium.Map(location=list(ALPS_CENTER), zoom_start=zoom_start)
+    if skiability is not None:
+        add_skiability_overlay(m, skiability, show=True)
+        folium.LayerControl(collapsed=True).add_to(m)
+    return m
+
+
+def map_html(m):
+    """HTML autonome d'une carte (chemin statique, sans aller-retour st_folium)"""
+    return m.get_root().render()
@@ -0,0 +1,185 @@
+"""
+Empreinte mémoire : taille estimée des objets en cache et des sessions,
+mémoire résidente du processus, et mode budget pour les hébergements
+contraints (Streamlit Cloud coupe le conteneur vers 1 Go).
+
+Mode budget (SKI_MEMORY_BUDGET_MB=800) :
+    - df_meteo brut abandonné une fois le cube construit (seules les
+      fonctions de référence ligne à ligne le lisent)
+    - cube météo en float32 au lieu de float64
+    - historique horaire réduit à la fenêtre des features 7 jours
+    - au-delà du budget (mémoire résidente), caches vidés du moins utile
+      au plus utile (cf. evict_until)
+"""
+
+import gc
+import mmap
+import os
+import sys
+import types
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+ENV_BUDGET = "SKI_MEMORY_BUDGET_MB"
+HISTORY_DAYS = 7  # Fenêtre de WeatherCube.grid_window_features
+
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+           types.MethodType, str, bytes, int, float, bool, type(None))
+
+
+def budget_bytes():
+    """Budget mémoire configuré (octets), None hors mode budget"""
+    value = os.environ.get(ENV_BUDGET, "").strip()
+    try:
+        return int(float(value) * 1024 * 1024) if value else None
+    except ValueError:
+        return None
+
+
+def format_bytes(n):
+    if n is None:
+        return "?"
+    for unit in ("o", "Ko", "Mo"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "o" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} Go"
+
+
+# ============================================================================
+# MESURES
+# ============================================================================
+
+def process_rss():
+    """Mémoire résidente actuelle du processus (octets), None si inconnue"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource  # Pic et non valeur courante hors Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _is_mapped(arr):
+    """Tableau adossé à un fichier (np.load(mmap_mode=...)) : pages partagées"""
+    while arr is not None:
+        if isinstance(arr, (np.memmap, mmap.mmap)):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def deep_size(obj, seen=None):
+    """
+    Taille estimée (octets) d'un objet et de ce qu'il référence : DataFrame
+    via memory_usage(deep=True), tableaux NumPy via nbytes (0 si mappés
+    depuis un fichier), conteneurs et instances parcourus récursivement.
+    Un objet partagé n'est compté qu'une fois par `seen`.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        if _is_mapped(obj):
+            return 0
+        if obj.base is not None and isinstance(obj.base, np.ndarray):
+            return deep_size(obj.base, seen)  # Vue : on compte le tableau d'origine
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(deep_size(v, seen) for v in obj.ravel())
+        return size
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, _OPAQUE):
+        return sys.getsizeof(obj) if not isinstance(obj, (type, types.ModuleType)) else 0
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, s, None), seen) for s in obj.__slots__)
+    return size
+
+
+def memory_report(objects):
+    """
+    [(nom, octets)] triés du plus gros au plus petit. Les objets partagés
+    entre plusieurs entrées sont attribués à la première rencontrée.
+    """
+    seen = set()
+    sizes = [(name, deep_size(obj, seen)) for name, obj in objects.items()]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)
+
+
+# ============================================================================
+# MODE BUDGET
+# ============================================================================
+
+def history_start(cube, today=None):
+    """Premier jour horaire utile : fenêtre 7 jours avant le premier jour proposable"""
+    today = today or date.today()
+    anchor = min(today, cube.dates[-1]) if cube.dates else today
+    return anchor - timedelta(days=HISTORY_DAYS)
+
+
+def apply_budget(data, today=None):
+    """
+    Version allégée du tuple de load_data : df_meteo vidé (colonnes
+    conservées), cube en float32 et historique horaire réduit.
+    """
+    (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+     route_grids, route_risk, route_risk_level, outlook) = data
+    cube.trim_hourly(history_start(cube, today))
+    cube.narrow(np.float32)
+    df_meteo = df_meteo.iloc[:0].copy()
+    return (df, df_bera, dict_bera, df_meteo, unique_grids, catalogue, cube,
+            route_grids, route_risk, route_risk_level, outlook)
+
+
+def release_memory():
+    """Rend au système la mémoire libérée (glibc : malloc_trim), au mieux"""
+    gc.collect()
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def evict_until(limit, evictions):
+    """
+    Appelle les évictions dans l'ordre (la moins utile d'abord) jusqu'à
+    repasser sous `limit` octets de mémoire résidente.
+
+    Args:
+        limit     : budget en octets
+        evictions : [(nom, fonction sans argument)]
+
+    Returns:
+        noms des évictions effectuées
+    """
+    done = []
+    for name, evict in evictions:
+        rss = process_rss()
+        if rss is None or rss <= limit:
+            break
+        evict()
+        release_memory()
+        done.append(name)
+    return done
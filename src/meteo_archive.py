@@ -0,0 +1,166 @@
+"""
+Archive météo horaire historique, partitionnée par mois.
+
+    data/meteo_archive/
+        month=2025-01/batch-<clé>.parquet   un fichier par (lot de points, mois)
+        _chunks.json                        points de reprise : lots terminés
+
+Même schéma de colonnes que data/meteo_cache.parquet : un extrait de
+l'archive se charge dans WeatherCube comme la météo courante (features
+d'entraînement, rejeu de saison). Chaque fichier est écrit de façon
+atomique puis enregistré dans _chunks.json avec sa plage de dates : un lot
+interrompu est refait en entier à la reprise, un lot dont la plage couvre
+la demande n'est jamais redemandé, un lot partiel (mois en cours, début
+de mois ajouté) est redemandé sur l'union des deux plages.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from data_version import atomic_write_bytes, atomic_write_json, read_manifest
+
+ARCHIVE_ROOT = "data/meteo_archive"
+CHECKPOINT_NAME = "_chunks.json"
+
+METEO_COLUMNS = [
+    "time", "latitude", "longitude", "temperature_2m", "relative_humidity_2m",
+    "wind_speed_10m", "precipitation", "snowfall", "cloudcover",
+]
+
+
+def month_chunks(start, end):
+    """Découpe [start, end] en mois calendaires : [(premier jour, dernier jour)]"""
+    chunks = []
+    first = date(start.year, start.month, 1)
+    while first <= end:
+        following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        chunks.append((max(first, start), min(following - timedelta(days=1), end)))
+        first = following
+    return chunks
+
+
+def batch_key(points):
+    """Identifiant stable d'un lot de points (indépendant de sa position dans la grille)"""
+    text = ";".join(f"{lat:.4f},{lon:.4f}" for lat, lon in points)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def chunk_id(month_start, points):
+    return f"month={month_start:%Y-%m}/batch-{batch_key(points)}"
+
+
+# ============================================================================
+# ÉCRITURE (POINTS DE REPRISE)
+# ============================================================================
+
+class ArchiveWriter:
+    """
+    Écrit les lots terminés et tient _chunks.json à jour. Thread-safe :
+    plusieurs requêtes concurrentes peuvent terminer en même temps.
+    Sert aussi aux sorties Camptocamp (cf. outings.py) via columns.
+    """
+
+    def __init__(self, root=ARCHIVE_ROOT, columns=METEO_COLUMNS, compression="snappy"):
+        self.root = root
+        self.columns = columns
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._checkpoint_path = os.path.join(root, CHECKPOINT_NAME)
+        self.chunks = read_manifest(self._checkpoint_path).get("chunks", {})
+
+    def coverage(self, chunk):
+        """(premier jour, dernier jour) archivés pour ce lot, None si absent"""
+        entry = self.chunks.get(chunk)
+        if entry is None or not os.path.exists(os.path.join(self.root, entry["path"])):
+            return None
+        if "start" not in entry or "end" not in entry:
+            return date.min, date.max  # Lot sans plage (sorties Camptocamp) : tout ou rien
+        return date.fromisoformat(entry["start"]), date.fromisoformat(entry["end"])
+
+    def is_done(self, chunk, start=None, end=None):
+        """
+        Lot enregistré, fichier toujours présent et, si start/end sont
+        donnés, plage archivée couvrant [start, end]
+        """
+        covered = self.coverage(chunk)
+        if covered is None:
+            return False
+        return (start is None or covered[0] <= start) and (end is None or covered[1] >= end)
+
+    def write(self, chunk, df, **meta):
+        """Écrit un lot (fichier atomique) puis le marque terminé (meta : start, end...)"""
+        path = f"{chunk}.parquet"
+        buffer = io.BytesIO()
+        df[self.columns].to_parquet(buffer, index=False, compression=self.compression)
+        atomic_write_bytes(os.path.join(self.root, path), buffer.getvalue())
+        with self._lock:
+            self.chunks[chunk] = {
+                "path": path,
+                "rows": len(df),
+                **{k: str(v) for k, v in meta.items()},
+            }
+            atomic_write_json(self._checkpoint_path, {"chunks": self.chunks})
+
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+def archive_files(root=ARCHIVE_ROOT, start=None, end=None):
+    """Fichiers des partitions mensuelles qui recoupent [start, end]"""
+    if not os.path.isdir(root):
+        return []
+    first = None if start is None else f"{start:%Y-%m}"
+    last = None if end is None else f"{end:%Y-%m}"
+    files = []
+    for name in sorted(os.listdir(root)):
+        if not name.startswith("month="):
+            continue
+        month = name[len("month="):]
+        if (first and month < first) or (last and month > last):
+            continue
+        directory = os.path.join(root, name)
+        files += [os.path.join(directory, f) for f in sorted(os.listdir(directory))
+                  if f.endswith(".parquet") and not f.startswith(".tmp_")]
+    return files
+
+
+def read_archive(root=ARCHIVE_ROOT, start=None, end=None):
+    """
+    Météo horaire de l'archive entre start et end (dates incluses), triée et
+    dédoublonnée, au format de meteo_cache.parquet.
+    """
+    files = archive_files(root, start, end)
+    if not files:
+        return pd.DataFrame({c: pd.Series(dtype="datetime64[ns]" if c == "time" else float)
+                             for c in METEO_COLUMNS})
+    df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    df["time"] = pd.to_datetime(df["time"])
+    if start is not None:
+        df = df[df["time"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["time"] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    return (
+        df.drop_duplicates(["latitude", "longitude", "time"], keep="last")
+        .sort_values(["latitude", "longitude", "time"])
+        .reset_index(drop=True)
+    )
+
+
+def load_meteo(path, start=None, end=None, history_days=7):
+    """
+    Météo horaire d'un parquet unique (meteo_cache.parquet) ou de l'archive
+    partitionnée, lue alors sur [start - history_days, end + 1 j] : fenêtre
+    des features 7 jours et mesures du jour de sortie comprises.
+    """
+    if not Path(path).is_dir():
+        return pd.read_parquet(path)
+    first = None if start is None else pd.Timestamp(start).date() - timedelta(days=history_days)
+    last = None if end is None else pd.Timestamp(end).date() + timedelta(days=1)
+    return read_archive(path, first, last)
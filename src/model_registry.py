@@ -0,0 +1,98 @@
+"""
+Registre des modèles de models/ : chemin, type de sortie et schéma des
+features de chacun, chargement paresseux au premier usage.
+
+Les quatre fichiers sont des dumps texte LightGBM (skiability_model.cbm
+aussi, malgré son extension) évalués par tree_model.TreeEnsemble ; aucun
+n'est chargé tant qu'un score ne le demande pas.
+"""
+
+import os
+import threading
+from collections import namedtuple
+
+from tree_model import load_model
+
+ModelSpec = namedtuple("ModelSpec", ["path", "kind", "features", "description"])
+
+# Features météo 7 jours + topo (cf. WeatherCube.route_physical_features)
+PHYSICAL_FEATURES = [
+    "temp_min_7d_avg", "temp_max_7d_avg", "temp_amp_7d_avg",
+    "snowfall_7d_sum", "wind_max_7d", "freeze_thaw_cycles_7d",
+    "summit_altitude_clean", "topo_denivele", "topo_difficulty",
+    "massif", "day_of_week",
+]
+
+SPRING_FEATURES = PHYSICAL_FEATURES[:6] + ["spring_snow_score"] + PHYSICAL_FEATURES[6:]
+
+# Exposition, pente et prévisions en plus (non calculées par l'app aujourd'hui)
+FULL_FEATURES = [
+    "summit_altitude_clean", "north_facing", "south_facing", "east_facing",
+    "west_facing", "low_angle", "mid_angle", "steep", "topo_denivele",
+    "topo_difficulty", "massif", "snowfall_7d_sum", "days_since_last_snow",
+    "recent_snow_7d", "temp_max_7d_avg", "temp_min_7d_avg", "temp_amp_7d_avg",
+    "freeze_thaw_cycles_7d", "wind_max_7d", "meteo_available",
+    "temp_max_forecast", "temp_min_forecast", "wind_forecast",
+    "snowfall_forecast", "month", "day_of_week", "is_weekend",
+]
+
+MODEL_SPECS = {
+    "physical": ModelSpec(
+        "models/skiability_regression_physical.txt", "regression", PHYSICAL_FEATURES,
+        "Qualité de neige hiver (régression [-1, 1])",
+    ),
+    "spring": ModelSpec(
+        "models/skiability_regression_spring.txt", "regression", SPRING_FEATURES,
+        "Qualité de neige avec le score printemps en entrée (régression [-1, 1])",
+    ),
+    "full": ModelSpec(
+        "models/skiability_regression.txt", "regression", FULL_FEATURES,
+        "Qualité de neige, exposition/pente/prévisions (régression [-1, 1])",
+    ),
+    "classes": ModelSpec(
+        "models/skiability_model.cbm", "multiclass", FULL_FEATURES,
+        "Classes de skiabilité (3 probabilités)",
+    ),
+}
+
+
+class ModelRegistry:
+    """
+    Modèles chargés à la demande, une seule fois par processus.
+
+    get(name) renvoie None si le fichier du modèle est absent (les scores
+    retombent alors sur leur valeur de repli) ; un fichier dont les features
+    ne correspondent pas au schéma déclaré lève ValueError.
+    """
+
+    def __init__(self, specs=None):
+        self.specs = dict(MODEL_SPECS if specs is None else specs)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        if name in self._models:
+            return self._models[name]
+        spec = self.specs[name]
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name, spec)
+        return self._models[name]
+
+    def _load(self, name, spec):
+        if not os.path.exists(spec.path):
+            return None
+        model = load_model(spec.path)
+        if model.feature_names != spec.features:
+            raise ValueError(f"Modèle '{name}' : features différentes du schéma déclaré")
+        if (model.num_class > 1) != (spec.kind == "multiclass"):
+            raise ValueError(f"Modèle '{name}' : sortie {model.num_class} classe(s), attendu {spec.kind}")
+        return model
+
+    def loaded(self):
+        """Noms des modèles déjà chargés (None si fichier absent)"""
+        return {name: model is not None for name, model in self._models.items()}
+
+    def missing_features(self, name, available):
+        """Features du schéma `name` absentes de `available`"""
+        return [f for f in self.specs[name].features if f not in available]
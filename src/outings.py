@@ -0,0 +1,236 @@
+"""
+Sorties Camptocamp : stockage compact et table d'entraînement étiquetée.
+
+    data/outings/
+        routes/<route_id>.parquet    sorties d'un itinéraire (sans texte)
+        recits/batch-<clé>.parquet   récits d'un lot de sorties
+        _chunks.json                 points de reprise (cf. meteo_archive.ArchiveWriter)
+        outings.parquet              sorties consolidées (id_sortie, route_id, date...)
+        recits.parquet               récits consolidés (id_sortie, lang, title...)
+
+Chiffres et textes sont séparés : la table des sorties reste petite
+(entiers 32 bits, catégories, zstd) et se lit d'un bloc (rejeu de saison,
+entraînement) ; les récits ne servent qu'à l'analyse de ressenti.
+
+training_table rattache chaque sortie à son itinéraire du catalogue, aux
+features météo 7 jours de sa date (backfill.py) et au BERA du matin
+(backtest.bera_as_of) par indexation directe (itinéraire, jour) : pas de
+jointure ligne à ligne.
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from backfill import derived_features, grid_season_features, route_season_features
+from backtest import SENTIMENT_LABELS, bera_as_of
+from scoring import route_topo_features
+
+OUTINGS_ROOT = "data/outings"
+OUTINGS_FILE = f"{OUTINGS_ROOT}/outings.parquet"
+RECITS_FILE = f"{OUTINGS_ROOT}/recits.parquet"
+TRAINING_FILE = "data/features/outings_training.parquet"
+
+OUTING_COLUMNS = [
+    "id_sortie", "route_id", "date", "date_end", "condition_rating",
+    "quality", "elevation_max", "height_diff_up",
+]
+RECIT_COLUMNS = ["id_sortie", "lang", "title", "summary", "conditions", "description"]
+
+# Appréciation des conditions par l'auteur de la sortie (Camptocamp)
+CONDITION_SCORES = {"awful": 0, "poor": 1, "average": 2, "good": 3, "excellent": 4}
+QUALITIES = ["empty", "draft", "medium", "fine", "great"]
+
+C2C_ROUTE_ID = r"camptocamp\.org/routes/(\d+)"
+
+
+def ids_key(ids):
+    """Identifiant stable d'un lot d'identifiants Camptocamp"""
+    text = ",".join(str(int(i)) for i in sorted(ids))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def catalogue_route_ids(catalogue):
+    """document_id Camptocamp de chaque itinéraire du catalogue (-1 si autre source)"""
+    ids = catalogue.frame["url"].astype(str).str.extract(C2C_ROUTE_ID, expand=False)
+    return pd.to_numeric(ids, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+
+
+# ============================================================================
+# PARSING API
+# ============================================================================
+
+def parse_outing(doc, route_id):
+    """Document sortie (liste /outings) → ligne compacte, None hors ski de rando"""
+    outing_id = doc.get("document_id")
+    date_start = doc.get("date_start")
+    if not outing_id or not date_start:
+        return None
+    if "skitouring" not in (doc.get("activities") or ["skitouring"]):
+        return None
+    return {
+        "id_sortie": outing_id,
+        "route_id": route_id,
+        "date": date_start,
+        "date_end": doc.get("date_end") or date_start,
+        "condition_rating": doc.get("condition_rating"),
+        "quality": doc.get("quality"),
+        "elevation_max": doc.get("elevation_max"),
+        "height_diff_up": doc.get("height_diff_up"),
+    }
+
+
+def parse_recit(doc):
+    """Document sortie complet (/outings/<id>) → textes de la première langue"""
+    locales = doc.get("locales") or [{}]
+    locale = locales[0]
+    return {
+        "id_sortie": doc.get("document_id"),
+        **{c: locale.get(c) or "" for c in RECIT_COLUMNS[1:]},
+    }
+
+
+def compact_outings(rows):
+    """Lignes parse_outing → DataFrame aux types compacts"""
+    df = pd.DataFrame(rows, columns=OUTING_COLUMNS)
+    df["id_sortie"] = df["id_sortie"].astype(np.int32)
+    df["route_id"] = df["route_id"].astype(np.int32)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["date_end"] = pd.to_datetime(df["date_end"], errors="coerce")
+    df["condition_rating"] = pd.Categorical(df["condition_rating"], categories=list(CONDITION_SCORES))
+    df["quality"] = pd.Categorical(df["quality"], categories=QUALITIES)
+    for column in ("elevation_max", "height_diff_up"):
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int16")
+    return df.dropna(subset=["date"])
+
+
+def compact_recits(rows):
+    df = pd.DataFrame(rows, columns=RECIT_COLUMNS)
+    df["id_sortie"] = df["id_sortie"].astype(np.int32)
+    df["lang"] = df["lang"].astype("category")
+    return df
+
+
+# ============================================================================
+# LECTURE / CONSOLIDATION
+# ============================================================================
+
+def read_parts(root, kind, columns=None):
+    """Lots écrits d'un type ("routes" ou "recits") réunis en un DataFrame"""
+    files = sorted(f for f in glob.glob(os.path.join(root, kind, "*.parquet"))
+                   if not os.path.basename(f).startswith(".tmp_"))
+    if not files:
+        return None
+    parts = [pd.read_parquet(f, columns=columns) for f in files]
+    # Lots vides (itinéraire sans sortie) : schéma seul, sans effet sur les types
+    return pd.concat([p for p in parts if len(p)] or parts[:1], ignore_index=True)
+
+
+def consolidate(root=OUTINGS_ROOT):
+    """
+    Réécrit outings.parquet et recits.parquet à partir des lots (une
+    sortie liée à plusieurs itinéraires garde une ligne par itinéraire).
+
+    Returns:
+        (sorties, récits) : DataFrames, None si aucun lot
+    """
+    outings = read_parts(root, "routes")
+    if outings is not None:
+        outings = (
+            outings.drop_duplicates(["id_sortie", "route_id"], keep="last")
+            .sort_values(["date", "id_sortie"])
+            .reset_index(drop=True)
+        )
+        # Catégories perdues par la concaténation de lots vides
+        outings = compact_outings(outings)
+        outings.to_parquet(os.path.join(root, "outings.parquet"), index=False, compression="zstd")
+    recits = read_parts(root, "recits")
+    if recits is not None:
+        recits = compact_recits(recits.drop_duplicates("id_sortie", keep="last"))
+        recits.to_parquet(os.path.join(root, "recits.parquet"), index=False, compression="zstd")
+    return outings, recits
+
+
+# ============================================================================
+# TABLE D'ENTRAÎNEMENT
+# ============================================================================
+
+def outing_routes(outings, catalogue):
+    """Indice catalogue de l'itinéraire de chaque sortie (-1 si absent)"""
+    ids = catalogue_route_ids(catalogue)
+    index = pd.Series(np.arange(catalogue.n), index=ids)
+    index = index[(index.index >= 0) & ~index.index.duplicated()]
+    return outings["route_id"].map(index).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def weather_at(cube, catalogue, routes, dates, cycles="daily"):
+    """
+    Features météo 7 jours des couples (itinéraire, date) : une passe
+    backfill sur la plage de dates, lissée sur les seuls itinéraires cités.
+
+    Returns:
+        (dict de tableaux (n,), bool (n,) météo disponible)
+    """
+    dates = pd.DatetimeIndex(dates).normalize()
+    feature_days, grid_features, has_window = grid_season_features(
+        cube, dates.min().date(), dates.max().date(), cycles=cycles
+    )
+    unique_routes, inverse = np.unique(routes, return_inverse=True)
+    neighbors = cube.nearest_grids(catalogue.lat[unique_routes], catalogue.lon[unique_routes], k=5)
+    features, available = route_season_features(grid_features, has_window, *neighbors)
+
+    col = pd.DatetimeIndex(feature_days).get_indexer(dates)
+    known = col >= 0
+    col = np.where(known, col, 0)
+    ok = known & available[inverse, col]
+    return {name: np.where(ok, values[inverse, col], np.nan) for name, values in features.items()}, ok
+
+
+def training_table(outings, catalogue, cube, bera, sentiment=None, cycles="daily", dropna=True):
+    """
+    Une ligne par sortie rattachée au catalogue : features du registre de
+    modèles (météo 7 jours, mesures du jour, topo, calendrier), risque
+    BERA du matin et étiquettes (conditions Camptocamp, ressenti du récit).
+
+    Args:
+        outings   : sorties (OUTING_COLUMNS) dont les dates sont couvertes par cube
+        bera      : backtest.bera_history(...)
+        sentiment : DataFrame id_sortie, sentiment, confidence (optionnel)
+    """
+    routes = outing_routes(outings, catalogue)
+    df = outings[routes >= 0].reset_index(drop=True)
+    routes = routes[routes >= 0]
+    if df.empty:
+        return df
+
+    features, available = weather_at(cube, catalogue, routes, df["date"], cycles)
+    keep = available if dropna else np.ones(len(df), dtype=bool)
+    df, routes = df[keep].reset_index(drop=True), routes[keep]
+
+    table = df[["id_sortie", "route_id", "date"]].copy()
+    table["date"] = pd.DatetimeIndex(table["date"]).normalize()
+    table["route"] = routes
+    for column in ("name", "url"):
+        if column in catalogue.frame:
+            table[column] = catalogue.frame[column].to_numpy()[routes]
+    for name, values in route_topo_features(catalogue, routes).items():
+        table[name] = values
+    for name, values in features.items():
+        table[name] = values[keep]
+    table = derived_features(table, available[keep])
+
+    # BERA du matin : (jour, massif) indexé directement
+    days, day_of = np.unique(table["date"].to_numpy(), return_inverse=True)
+    level = bera_as_of(bera, catalogue.massifs, pd.DatetimeIndex(days))
+    table["bera_risk"] = level[day_of, catalogue.massif_code[routes]]
+
+    table["condition_rating"] = df["condition_rating"].to_numpy()
+    table["condition_score"] = df["condition_rating"].astype(object).map(CONDITION_SCORES).astype(float)
+    if sentiment is not None:
+        labels = sentiment[["id_sortie", "sentiment", "confidence"]].drop_duplicates("id_sortie", keep="last")
+        table = table.merge(labels, on="id_sortie", how="left")
+        table["sentiment_label"] = table["sentiment"].map(SENTIMENT_LABELS)
+    return table
@@ -0,0 +1,130 @@
+"""
+Profilage à la demande (cProfile + tracemalloc) d'un chemin de code : la
+recherche dans l'app (?profile=1 dans l'URL ou SKI_PROFILE=1), ou un
+script de récupération entier (option --profile).
+
+    with Profile("recommend") as profile:
+        ...
+    profile.stats_bytes()  # fichier .prof (pstats / snakeviz)
+    profile.report()       # fonctions les plus coûteuses + allocations
+
+Profile(enabled=False) est un contexte vide : sans demande explicite,
+ni cProfile ni tracemalloc ne sont activés.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+ENV_PROFILE = "SKI_PROFILE"
+QUERY_PARAM = "profile"
+TOP_N = 25
+PROFILE_DIR = "profiles"
+
+
+def profiling_requested(query_params=None):
+    """Profilage demandé par SKI_PROFILE=1 ou ?profile=1"""
+    truthy = ("1", "true", "yes", "on")
+    if os.environ.get(ENV_PROFILE, "").strip().lower() in truthy:
+        return True
+    value = (query_params or {}).get(QUERY_PARAM)
+    return str(value).strip().lower() in truthy if value is not None else False
+
+
+class Profile:
+    """
+    cProfile (temps par fonction) et tracemalloc (pic mémoire, lignes qui
+    allouent le plus) sur un bloc. tracemalloc ralentit nettement le code
+    profilé : les durées servent à comparer les fonctions entre elles.
+    """
+
+    def __init__(self, scope, enabled=True, top_n=TOP_N):
+        self.scope = scope
+        self.enabled = enabled
+        self.top_n = top_n
+        self.created_at = datetime.now()
+        self.elapsed = None
+        self.memory_peak = None
+        self.allocations = []
+        self._profiler = None
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._t0 = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is None or self.elapsed is not None:
+            return
+        self._profiler.disable()
+        self.elapsed = time.perf_counter() - self._t0
+        self.memory_peak = tracemalloc.get_traced_memory()[1]
+        stats = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+        ]).statistics("lineno")
+        self.allocations = [(str(s.traceback[0]), s.size, s.count) for s in stats[:self.top_n]]
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    @property
+    def done(self):
+        return self.elapsed is not None
+
+    def stats_bytes(self):
+        """Contenu d'un fichier .prof (format de cProfile.Profile.dump_stats)"""
+        self._profiler.create_stats()
+        return marshal.dumps(self._profiler.stats)
+
+    def top_functions(self, sort="tottime"):
+        """Texte pstats des top_n fonctions, triées par `sort`"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(self.top_n)
+        return stream.getvalue()
+
+    def report(self):
+        """Rapport texte : durée, pic mémoire, fonctions chaudes, allocations"""
+        lines = [
+            f"Profil « {self.scope} » du {self.created_at:%Y-%m-%d %H:%M:%S}",
+            f"Durée (sous profilage) : {self.elapsed:.3f} s",
+            f"Pic mémoire Python : {self.memory_peak / 1e6:.1f} Mo",
+            "",
+            f"=== {self.top_n} fonctions les plus coûteuses (temps propre) ===",
+            self.top_functions("tottime"),
+            f"=== {self.top_n} fonctions les plus coûteuses (temps cumulé) ===",
+            self.top_functions("cumulative"),
+            f"=== {self.top_n} lignes qui allouent le plus (encore en mémoire) ===",
+        ]
+        lines += [f"{size / 1e3:10.1f} Ko  {count:8d} blocs  {where}" for where, size, count in self.allocations]
+        return "\n".join(lines)
+
+    def save(self, directory=PROFILE_DIR):
+        """Écrit <scope>-<date>.prof et .txt dans `directory` ; renvoie les deux chemins"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{self.scope}-{self.created_at:%Y%m%d-%H%M%S}")
+        with open(stem + ".prof", "wb") as f:
+            f.write(self.stats_bytes())
+        with open(stem + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return stem + ".prof", stem + ".txt"
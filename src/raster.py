@@ -0,0 +1,141 @@
+"""
+Carte de « skiabilité » des Alpes : score neige du modèle sur chaque point
+de la grille météo, pour chaque jour de prévision.
+
+Mêmes features que pour un itinéraire (fenêtre 7 jours de
+WeatherCube.grid_window_features) avec un itinéraire type pour les
+variables topo, et le massif de l'itinéraire du catalogue le plus proche. Un seul predict par jour pour toute la grille ; le
+résultat tient dans un petit tableau (n_days, n_grid).
+"""
+
+import numpy as np
+
+from snow_quality import hybrid_scores
+
+# Itinéraire type appliqué à chaque maille (valeurs par défaut de l'app)
+REPRESENTATIVE_ROUTE = {
+    "summit_altitude_clean": 2500.0,
+    "topo_denivele": 1200.0,
+    "topo_difficulty": 3,
+}
+
+RASTER_COLORS = [(215, 48, 39), (254, 224, 139), (26, 152, 80)]  # mauvais → bon
+
+# Clé du résultat persisté dans data/.derived (app et build_skiability_raster.py) :
+# incrémenter si le calcul de la carte change
+RASTER_TAG = "skiability-v2"
+
+
+def grid_massifs(cube, catalogue, route_grids, chunk=2 ** 22):
+    """
+    Massif de l'itinéraire du catalogue le plus proche de chaque maille.
+
+    Les mailles voisines d'itinéraires (route_grids, déjà calculé pour le
+    scoring) prennent celui du plus proche de ces itinéraires ; seules les
+    autres sont comparées à tout le catalogue, par blocs de `chunk` distances.
+
+    Returns:
+        tableau object (n_grid,) de noms de massif (None si catalogue vide)
+    """
+    neighbor_idx, neighbor_dist = route_grids
+    cells, dist = neighbor_idx.ravel(), neighbor_dist.ravel()
+    routes = np.repeat(np.arange(len(neighbor_idx)), neighbor_idx.shape[1])
+
+    # Par maille, l'itinéraire voisin le plus proche en premier
+    order = np.lexsort((dist, cells))
+    first = order[np.r_[True, cells[order][1:] != cells[order][:-1]]] if len(order) else order
+    code = np.full(cube.n_grid, -1, dtype=np.int64)
+    code[cells[first]] = catalogue.massif_code[routes[first]]
+
+    missing = np.flatnonzero(code < 0)
+    step = max(1, chunk // max(catalogue.n, 1))
+    for start in range(0, len(missing) if catalogue.n else 0, step):
+        sl = missing[start:start + step]
+        d2 = (cube.grid_lat[sl, None] - catalogue.lat[None, :]) ** 2 + \
+             (cube.grid_lon[sl, None] - catalogue.lon[None, :]) ** 2
+        code[sl] = catalogue.massif_code[np.argmin(d2, axis=1)]
+
+    names = np.array(list(catalogue.massifs) + [None], dtype=object)
+    return names[code]
+
+
+def skiability_raster(cube, models, massifs=None, dates=None):
+    """
+    Score neige hybride [0-1] de chaque maille pour chaque jour.
+
+    Args:
+        cube  : WeatherCube
+        models : ModelRegistry (None = score hiver de repli 0.5)
+        massifs : massif de chaque maille (grid_massifs), inconnu du modèle si None
+        dates : jours à évaluer (tous les jours du cube par défaut)
+
+    Returns:
+        dict : dates, values float32 (n_days, n_grid) NaN sans données,
+               grid_lat, grid_lon
+    """
+    dates = list(cube.dates if dates is None else dates)
+    if massifs is None:
+        massifs = np.full(cube.n_grid, None, dtype=object)
+    values = np.full((len(dates), cube.n_grid), np.nan, dtype=np.float32)
+
+    for d, date in enumerate(dates):
+        features, has_window = cube.grid_window_features(date)
+        if not has_window.any():
+            continue
+        batch = {name: v[has_window] for name, v in features.items()}
+        n = int(has_window.sum())
+        for name, value in REPRESENTATIVE_ROUTE.items():
+            batch[name] = np.full(n, value, dtype=float)
+        batch["massif"] = massifs[has_window]
+        scores, _ = hybrid_scores(models, batch, date)
+        values[d, has_window] = scores["hybrid"]
+
+    return {
+        "dates": dates,
+        "values": values,
+        "grid_lat": cube.grid_lat.copy(),
+        "grid_lon": cube.grid_lon.copy(),
+    }
+
+
+# ============================================================================
+# IMAGE (SUPERPOSITION FOLIUM)
+# ============================================================================
+
+def rasterize(grid_lat, grid_lon, values, resolution=0.05, max_dist=0.25):
+    """
+    Projette les valeurs des mailles sur une grille régulière lat/lon
+    (plus proche maille, transparent au-delà de `max_dist` degrés).
+
+    Returns:
+        (image float (H, W) ligne 0 = nord, bounds [[sud, ouest], [nord, est]])
+    """
+    south, north = grid_lat.min() - max_dist / 2, grid_lat.max() + max_dist / 2
+    west, east = grid_lon.min() - max_dist / 2, grid_lon.max() + max_dist / 2
+    lats = np.arange(north, south, -resolution)
+    lons = np.arange(west, east, resolution)
+
+    plat, plon = np.meshgrid(lats, lons, indexing="ij")
+    d2 = (plat.ravel()[:, None] - grid_lat[None, :]) ** 2 + (plon.ravel()[:, None] - grid_lon[None, :]) ** 2
+    nearest = np.argmin(d2, axis=1)
+    image = np.asarray(values, dtype=float)[nearest]
+    image[d2[np.arange(len(nearest)), nearest] > max_dist ** 2] = np.nan
+
+    bounds = [[float(lats[-1] - resolution / 2), float(west - resolution / 2)],
+              [float(north + resolution / 2), float(lons[-1] + resolution / 2)]]
+    return image.reshape(len(lats), len(lons)), bounds
+
+
+def to_rgba(image, alpha=170):
+    """Image [0-1] → RGBA uint8 (rouge → jaune → vert, NaN transparent)"""
+    valid = np.isfinite(image)
+    x = np.clip(np.where(valid, image, 0.0), 0.0, 1.0) * (len(RASTER_COLORS) - 1)
+    low = np.minimum(x.astype(int), len(RASTER_COLORS) - 2)
+    frac = (x - low)[..., None]
+    palette = np.array(RASTER_COLORS, dtype=float)
+    rgb = palette[low] * (1 - frac) + palette[low + 1] * frac
+
+    rgba = np.zeros(image.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = np.round(rgb).astype(np.uint8)
+    rgba[..., 3] = np.where(valid, alpha, 0)
+    return rgba
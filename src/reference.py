@@ -0,0 +1,465 @@
+"""
+Implémentations de référence ligne à ligne (scoring_v3 et ses briques),
+telles qu'avant la vectorisation.
+
+L'app utilise les versions par lot (scoring.score_routes,
+WeatherCube.route_meteo / route_physical_features,
+snow_quality.hybrid_scores) ; celles-ci servent de référence pour vérifier
+qu'elles donnent les mêmes résultats et mesurer les gains. Les données sont
+passées explicitement :
+    df_meteo    : météo horaire (latitude, longitude, time, ...)
+    grid_lookup : points de grille uniques (latitude, longitude), index 0..n-1
+    dict_bera   : massif → risque normalisé [0-1]
+    ski_model   : modèle physique (Booster LightGBM ou TreeEnsemble), ou None
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from catalogue import parse_level
+from data_loading import get_weather_icon
+
+
+def build_grid_lookup(unique_grids):
+    return unique_grids.reset_index(drop=True)
+
+
+# ============================================================================
+# SCORE NEIGE (PRINTEMPS / HIVER / HYBRIDE)
+# ============================================================================
+
+def spring_activation_factor(snowfall_7d):
+    """Facteur d'activation du score de printemps selon la neige récente"""
+    if snowfall_7d <= 3:
+        return 1.0
+    elif snowfall_7d <= 10:
+        return 0.5
+    else:
+        return 0.0
+
+
+def freeze_quality(temp_min):
+    """Qualité du regel nocturne"""
+    if temp_min <= -6:
+        return 1.0
+    elif temp_min <= -3:
+        return 0.8
+    elif temp_min <= -1:
+        return 0.6
+    else:
+        return 0.2
+
+
+def thermal_amplitude_quality(temp_amp):
+    """Qualité de l'amplitude thermique jour/nuit"""
+    if temp_amp >= 12:
+        return 1.0
+    elif temp_amp >= 8:
+        return 0.8
+    elif temp_amp >= 5:
+        return 0.6
+    else:
+        return 0.3
+
+
+def wind_penalty_spring(wind_max):
+    """Pénalité vent pour conditions de printemps"""
+    if wind_max <= 15:
+        return 1.0
+    elif wind_max <= 30:
+        return 0.7
+    else:
+        return 0.4
+
+
+def compute_spring_snow_score(features):
+    """
+    Calcule le score de qualité neige pour conditions de printemps.
+    Privilégie regel/dégel avec faible neige récente.
+    
+    Returns: float [0-1]
+    """
+    activation = spring_activation_factor(features["snowfall_7d_sum"])
+    if activation == 0:
+        return 0.0
+
+    freeze = freeze_quality(features["temp_min_7d_avg"])
+    amp = thermal_amplitude_quality(features["temp_amp_7d_avg"])
+    wind = wind_penalty_spring(features["wind_max_7d"])
+
+    raw_score = (
+        0.45 * freeze +
+        0.35 * amp +
+        0.20 * wind
+    )
+
+    return round(raw_score * activation, 3)
+
+
+def compute_base_snow_score_boosted(features, date_sortie, ski_model):
+    """
+    Score hiver avec correction du biais avalanche via power boost.
+    
+    Le modèle ML sous-estime les bonnes conditions de poudreuse car 
+    les gens sortent moins quand il y a risque d'avalanche.
+    On applique un boost pour corriger ce biais.
+    
+    Returns: float [0-1]
+    """
+    if not ski_model:
+        return 0.5  # Fallback si pas de modèle
+    
+    # Préparation du vecteur pour LightGBM
+    input_data = pd.DataFrame([{
+        "temp_min_7d_avg": features["temp_min_7d_avg"],
+        "temp_max_7d_avg": features["temp_max_7d_avg"],
+        "temp_amp_7d_avg": features["temp_amp_7d_avg"],
+        "snowfall_7d_sum": features["snowfall_7d_sum"],
+        "wind_max_7d": features["wind_max_7d"],
+        "freeze_thaw_cycles_7d": features["freeze_thaw_cycles_7d"],
+        "summit_altitude_clean": features.get("summit_altitude_clean", 2400),
+        "topo_denivele": features.get("topo_denivele", 1200),
+        "topo_difficulty": features.get("topo_difficulty", 3),
+        "massif": features.get("massif", "MONT-BLANC"),
+        "day_of_week": date_sortie.weekday()
+    }])
+    
+    # Conversion catégorielle
+    input_data["massif"] = input_data["massif"].astype("category")
+    
+    # Prédiction
+    score = ski_model.predict(input_data)[0]
+    
+    # Normalisation [-1, 1] → [0, 1]
+    normalized = np.clip((score + 1) / 2, 0, 1)
+    ml_boosted = 1 - (1 - normalized) ** 1.5
+    final_score = winter_exception_boost(ml_boosted, features)
+    
+    # Exposant 0.65 rehausse les scores moyens sans dénaturer
+    final_score = final_score ** 0.65
+    
+    
+    return round(final_score, 3)
+
+
+def compute_hybrid_snow_score(features, date_sortie, ski_model):
+    """
+    Implémentation de référence par itinéraire (l'app utilise la version
+    par lot snow_quality.hybrid_scores, un seul predict pour le top N).
+
+    Score hybride intelligent qui combine base et spring selon la saison.
+    
+    Logique :
+    - Jan-Fév : 100% base (hiver pur)
+    - Mars : transition progressive (100% base → 60% spring)
+    - Avr-Juin : max(spring, base*0.7) - priorité printemps
+    - Reste : 100% base
+    
+    Returns: float [0-1]
+    """
+    month = date_sortie.month
+    
+    # Calcul des deux scores
+    spring_score = compute_spring_snow_score(features)
+    base_score = compute_base_snow_score_boosted(features, date_sortie, ski_model)
+    
+    # Hiver pur (janvier-février)
+    if month <= 2:
+        return base_score, base_score, spring_score, "hiver"
+    
+    # Transition hiver → printemps (mars)
+    elif month == 3:
+        day = date_sortie.day
+        spring_weight = min(day / 31 * 0.6, 0.6)  # 0 → 0.6 progressif
+        hybrid = (1 - spring_weight) * base_score + spring_weight * spring_score
+        return hybrid, base_score, spring_score, "transition"
+    
+    # Saison de printemps (avril-juin)
+    elif 4 <= month <= 6:
+        hybrid = max(spring_score, base_score * 0.7)
+        return hybrid, base_score, spring_score, "printemps"
+    
+    # Reste de l'année
+    else:
+        return base_score, base_score, spring_score, "hiver"
+
+# ============================================================================
+# BOOST HIVER MÉTIER (JOURNÉES EXCEPTIONNELLES)
+# ============================================================================
+
+def is_exceptional_winter_day(features):
+    """
+    Détecte une journée de ski hivernal exceptionnelle (poudreuse froide, calme).
+    """
+    return (
+        features["snowfall_7d_sum"] >= 25 and
+        features["temp_min_7d_avg"] <= -6 and
+        features["wind_max_7d"] <= 35
+    )
+
+
+def winter_exception_boost(base_score, features):
+    """
+    Déplafonne volontairement les très bonnes journées d'hiver,
+    sans casser la hiérarchie du score.
+    """
+    if not is_exceptional_winter_day(features):
+        return base_score
+
+    headroom = 1.0 - base_score
+    boosted = base_score + 0.5 * headroom
+
+    return round(min(boosted, 1.0), 3)
+
+
+# ============================================================================
+# FEATURES PHYSIQUES 7 JOURS
+# ============================================================================
+
+def get_physical_features(df_meteo, grid_lookup, lat, lon, target_date, n_neighbors=5):
+    """
+    Implémentation de référence ligne à ligne (l'app utilise la version
+    vectorisée WeatherCube.route_physical_features, mêmes règles).
+
+    Version améliorée avec lissage spatial sur les N grilles les plus proches.
+    
+    Args:
+        lat, lon: Coordonnées du sommet
+        target_date: Date cible
+        n_neighbors: Nombre de grilles voisines à moyenner (3-5 recommandé)
+    
+    Returns:
+        dict: Features météo lissées ou None si pas de données
+    """
+    # 1. Trouve les N grilles les plus proches
+    coords = grid_lookup[['latitude', 'longitude']].to_numpy()
+    dists = np.sqrt((coords[:, 0] - lat)**2 + (coords[:, 1] - lon)**2)
+    
+    # Indices des N plus proches
+    closest_indices = np.argsort(dists)[:n_neighbors]
+    closest_grids = grid_lookup.iloc[closest_indices]
+    closest_dists = dists[closest_indices]
+    
+    # 2. Définit la fenêtre temporelle
+    start_date = pd.to_datetime(target_date) - pd.Timedelta(days=7)
+    end_date = pd.to_datetime(target_date)
+    
+    # 3. Collecte les données de chaque grille avec pondération inverse distance
+    all_features = []
+    weights = []
+    
+    for idx, (_, grid) in enumerate(closest_grids.iterrows()):
+        mask = (
+            (df_meteo['latitude'] == grid['latitude']) & 
+            (df_meteo['longitude'] == grid['longitude']) &
+            (df_meteo['time'] > start_date) &
+            (df_meteo['time'] <= end_date)
+        )
+        df_hist = df_meteo[mask]
+        
+        if not df_hist.empty:
+            # Calcul des features pour cette grille
+            t_min = df_hist['temperature_2m'].min()
+            t_max = df_hist['temperature_2m'].max()
+            
+            features = {
+                "temp_min_7d_avg": t_min,
+                "temp_max_7d_avg": t_max,
+                "temp_amp_7d_avg": t_max - t_min,
+                "snowfall_7d_sum": df_hist['snowfall'].sum(),
+                "wind_max_7d": df_hist['wind_speed_10m'].max(),
+                "freeze_thaw_cycles_7d": ((df_hist['temperature_2m'].max() > 0) & 
+                                           (df_hist['temperature_2m'].min() < 0)).sum()
+            }
+            all_features.append(features)
+            
+            # Poids inversement proportionnel à la distance (+ epsilon pour éviter division par 0)
+            weight = 1.0 / (closest_dists[idx] + 0.01)
+            weights.append(weight)
+    
+    if not all_features:
+        return None
+    
+    # 4. Moyenne pondérée des features
+    weights = np.array(weights)
+    weights = weights / weights.sum()  # Normalisation
+    
+    smoothed_features = {
+        # Moyennes pondérées pour variables continues
+        "temp_min_7d_avg": sum(f["temp_min_7d_avg"] * w for f, w in zip(all_features, weights)),
+        "temp_max_7d_avg": sum(f["temp_max_7d_avg"] * w for f, w in zip(all_features, weights)),
+        "temp_amp_7d_avg": sum(f["temp_amp_7d_avg"] * w for f, w in zip(all_features, weights)),
+        "snowfall_7d_sum": sum(f["snowfall_7d_sum"] * w for f, w in zip(all_features, weights)),
+        
+        # MAX pour le vent (approche conservatrice pour la sécurité)
+        "wind_max_7d": max(f["wind_max_7d"] for f in all_features),
+        
+        # Round pour variable discrète
+        "freeze_thaw_cycles_7d": int(round(sum(f["freeze_thaw_cycles_7d"] * w for f, w in zip(all_features, weights))))
+    }
+    return smoothed_features
+
+
+# ============================================================================
+# FONCTION MÉTÉO AMÉLIORÉE
+# ============================================================================
+
+def get_meteo_agg(df_meteo, grid_lookup, lat, lon, target_date=None, n_neighbors=3):
+    """
+    Implémentation de référence (l'app utilise WeatherCube.route_meteo).
+
+    Météo agrégée avec lissage spatial sur N grilles proches.
+    Version améliorée pour réduire les artefacts.
+    """
+    if target_date is None:
+        target_date = datetime.today().date()
+    
+    # 1. Trouve les N grilles les plus proches
+    coords = grid_lookup[['latitude', 'longitude']].to_numpy()
+    dists = np.sqrt((coords[:, 0] - lat)**2 + (coords[:, 1] - lon)**2)
+    
+    closest_indices = np.argsort(dists)[:n_neighbors]
+    closest_grids = grid_lookup.iloc[closest_indices]
+    closest_dists = dists[closest_indices]
+    
+    # 2. Collecte les données de chaque grille
+    all_meteo = []
+    weights = []
+    
+    for idx, (_, grid) in enumerate(closest_grids.iterrows()):
+        df_day = df_meteo[
+            (df_meteo['latitude'] == grid['latitude']) & 
+            (df_meteo['longitude'] == grid['longitude']) & 
+            (df_meteo['time'].dt.date == target_date)
+        ]
+        
+        # Fallback si pas de données pour cette date
+        if df_day.empty:
+            df_grid = df_meteo[
+                (df_meteo['latitude'] == grid['latitude']) & 
+                (df_meteo['longitude'] == grid['longitude'])
+            ]
+            if not df_grid.empty:
+                df_grid_copy = df_grid.copy()
+                df_grid_copy['date_diff'] = abs((df_grid_copy['time'].dt.date - target_date).apply(lambda x: x.days))
+                closest_date_idx = df_grid_copy['date_diff'].idxmin()
+                closest_date = df_grid.loc[closest_date_idx, 'time'].date()
+                df_day = df_grid[df_grid['time'].dt.date == closest_date]
+        
+        if not df_day.empty:
+            meteo = {
+                "mean_temp": df_day['temperature_2m'].mean(),
+                "max_wind": df_day['wind_speed_10m'].max(),
+                "total_snow": df_day['snowfall'].sum(),
+                "total_precip": df_day['precipitation'].sum()
+            }
+            all_meteo.append(meteo)
+            
+            # Poids inversement proportionnel à la distance
+            weight = 1.0 / (closest_dists[idx] + 0.01)
+            weights.append(weight)
+    
+    if not all_meteo:
+        return {
+            "mean_temp": 0, 
+            "max_wind": 10, 
+            "total_snow": 0, 
+            "total_precip": 0,
+            "data_available": False,
+            "distance_km": closest_dists[0]
+        }
+    
+    # 3. Moyenne pondérée
+    weights = np.array(weights)
+    weights = weights / weights.sum()
+    
+    smoothed_meteo = {
+        # Moyennes pondérées pour variables continues
+        "mean_temp": sum(m["mean_temp"] * w for m, w in zip(all_meteo, weights)),
+        "total_snow": sum(m["total_snow"] * w for m, w in zip(all_meteo, weights)),
+        "total_precip": sum(m["total_precip"] * w for m, w in zip(all_meteo, weights)),
+        
+        # MAX pour le vent (approche sécuritaire)
+        "max_wind": max(m["max_wind"] for m in all_meteo),
+        
+        "data_available": True,
+        "distance_km": closest_dists[0]
+    }
+    
+    smoothed_meteo["icon"] = get_weather_icon(smoothed_meteo)
+    
+    return smoothed_meteo
+
+
+# ============================================================================
+# FONCTION DE SCORING AMÉLIORÉE
+# ============================================================================
+
+def scoring_v3(row, niveau, dplus_min, dplus_max, target_date, dict_bera, df_meteo, grid_lookup):
+    """
+    Implémentation de référence ligne à ligne (l'app utilise la version
+    vectorisée scoring.score_routes, même formule).
+
+    Version améliorée du scoring avec :
+    - Normalisation massifs
+    - Haversine pour météo
+    - Range D+ au lieu d'idéal
+    - Date de sortie configurable
+    - Gestion robuste des erreurs
+    """
+    
+    # --- BERA (avec normalisation) ---
+    massif_key = row["massif"]
+    avy_risk = dict_bera.get(massif_key, 0.6)  # Défaut 3/5
+    
+    # --- Météo (avec haversine + date) ---
+    meteo = get_meteo_agg(df_meteo, grid_lookup, row["lat"], row["lon"], target_date)
+    
+    fresh_snow_penalty = min(meteo["total_snow"] / 30.0, 1.0)
+    wet_snow_penalty = 1.0 if (meteo["mean_temp"] > 0 and meteo["total_precip"] > 0) else 0.0
+    wind_penalty = min(meteo["max_wind"] / 25.0, 1.0)
+    
+    # --- Exposition & pente (précalculées par le catalogue) ---
+    expo_penalty = row["expo_penalty"]
+    route_level = row["route_level"]
+    
+    slope_penalty = 1.0 if route_level >= 4 else 0.3
+    
+    # --- Danger ---
+    danger = (0.30 * avy_risk +
+              0.20 * wind_penalty +
+              0.15 * fresh_snow_penalty +
+              0.15 * wet_snow_penalty +
+              0.10 * expo_penalty +
+              0.10 * slope_penalty)
+    
+    # --- Fitness ---
+    target_level = parse_level(niveau)
+    
+    level_diff = abs(route_level - target_level)
+    level_bonus = 1.0 / (1 + level_diff)
+    
+    # D+ - Bonus si dans le range, pénalité si hors range
+    try:
+        dplus = float(row["denivele_positif"])
+    except:
+        dplus = 1000
+    
+    if dplus_min <= dplus <= dplus_max:
+        # Dans le range : bonus selon position dans le range
+        range_center = (dplus_min + dplus_max) / 2
+        distance_from_center = abs(dplus - range_center) / (dplus_max - dplus_min)
+        dplus_bonus = 1.0 - (0.3 * distance_from_center)  # 0.7 à 1.0
+    else:
+        # Hors range : forte pénalité
+        if dplus < dplus_min:
+            dplus_bonus = max(0.1, dplus / dplus_min * 0.5)
+        else:
+            dplus_bonus = max(0.1, dplus_max / dplus * 0.5)
+    
+    fitness = dplus_bonus * level_bonus
+    
+    # --- Score final ---
+    return fitness / (1 + danger)
@@ -0,0 +1,171 @@
+"""
+Cache de résultats partagé entre toutes les sessions Streamlit.
+
+LRU borné en taille et en durée de vie (TTL), protégé par un verrou.
+Deux requêtes identiques simultanées ne calculent qu'une fois : la
+seconde attend le résultat de la première (coalescence).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from catalogue import EXPOSITIONS
+
+
+def normalise_query(date_sortie, niveau, dplus_range, massifs, expositions,
+                    n_results, near=None, bbox=None):
+    """
+    Clé canonique d'une recherche : l'ordre de sélection des massifs ou
+    expositions, ou un léger déplacement de carte, ne crée pas de clé distincte.
+    """
+    expo_order = {e: i for i, e in enumerate(EXPOSITIONS)}
+    return (
+        date_sortie.isoformat(),
+        str(niveau).strip().upper(),
+        (int(dplus_range[0]), int(dplus_range[1])),
+        tuple(sorted(set(massifs))),
+        tuple(sorted(set(expositions), key=lambda e: expo_order.get(e, len(expo_order)))),
+        int(n_results),
+        None if near is None else tuple(round(float(v), 3) for v in near),
+        None if bbox is None else tuple(round(float(v), 3) for v in bbox),
+    )
+
+
+class _Pending:
+    """Calcul en cours pour une clé : les autres demandeurs attendent l'événement"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    LRU thread-safe avec TTL et coalescence des calculs concurrents.
+
+    Args:
+        maxsize : nombre maximum d'entrées conservées
+        ttl     : durée de vie d'une entrée en secondes (None = illimitée)
+    """
+
+    def __init__(self, maxsize=256, ttl=600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé → (expiration, valeur)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires is not None and expires <= now:
+            del self._entries[key]
+            self.evictions += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value, now):
+        expires = None if self.ttl is None else now + self.ttl
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Renvoie la valeur en cache, sinon la calcule une seule fois"""
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+            if found:
+                self.hits += 1
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = _Pending()
+                self._inflight[key] = pending
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                # Le calcul partagé a échoué (ou a été interrompu par un rerun) :
+                # on le refait plutôt que de propager l'exception d'une autre session
+                return compute()
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if pending.error is None:
+                    self._store(key, pending.value, self._clock())
+                del self._inflight[key]
+            pending.event.set()
+        return pending.value
+
+    def get_many(self, keys):
+        """Entrées présentes parmi `keys` ({clé: valeur}), sans calcul"""
+        with self._lock:
+            now = self._clock()
+            found = {}
+            for key in keys:
+                hit, value = self._lookup(key, now)
+                if hit:
+                    found[key] = value
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found
+
+    def put_many(self, items):
+        """Stocke des valeurs calculées par lot ({clé: valeur})"""
+        with self._lock:
+            now = self._clock()
+            for key, value in items.items():
+                self._store(key, value, now)
+
+    def evict_oldest(self, fraction=0.5):
+        """Retire la fraction la moins récemment utilisée des entrées (mode budget)"""
+        with self._lock:
+            n = int(round(len(self._entries) * fraction))
+            for _ in range(n):
+                self._entries.popitem(last=False)
+            self.evictions += n
+            return n
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Compteurs pour le panneau de debug"""
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,211 @@
+"""
+Scoring vectorisé de tout le catalogue (successeur de scoring_v3).
+
+Les scores ne dépendent que de (date, niveau, plage de D+) et des données :
+on les calcule une fois pour tous les itinéraires, puis les filtres
+d'affichage (massifs, expositions, zone, N) ne font que re-sélectionner.
+"""
+
+import numpy as np
+
+from catalogue import parse_level
+from snow_quality import hybrid_scores
+
+DEFAULT_AVY_RISK = 0.6  # Défaut 3/5
+
+
+def risk_by_route(catalogue, dict_bera):
+    """Risque avalanche normalisé [0-1] de chaque itinéraire (via son massif)"""
+    risk_massif = np.array(
+        [dict_bera.get(m, DEFAULT_AVY_RISK) for m in catalogue.massifs], dtype=float
+    )
+    return risk_massif[catalogue.massif_code]
+
+
+def risk_level_by_route(catalogue, df_bera):
+    """
+    Niveau BERA affiché (1-5) de chaque itinéraire, première ligne du
+    bulletin pour son massif. 0 si le massif n'a pas de bulletin.
+    """
+    first = df_bera.drop_duplicates("massif").set_index("massif")["risque_actuel"]
+    level_massif = np.array(
+        [first.get(m, np.nan) for m in catalogue.massifs], dtype=float
+    )
+    level_massif = np.where(np.isnan(level_massif), 0, level_massif).astype(np.int8)
+    return level_massif[catalogue.massif_code]
+
+
+def score_routes(catalogue, meteo, avy_risk, niveau, dplus_min, dplus_max):
+    """
+    Même formule que scoring_v3, appliquée à tous les itinéraires.
+
+    Args:
+        catalogue : RouteCatalogue
+        meteo     : dict de tableaux (WeatherCube.route_meteo)
+        avy_risk  : tableau (n_routes,) issu de risk_by_route
+        niveau    : niveau utilisateur 'S1'..'S5'
+        dplus_min, dplus_max : plage de D+ acceptable
+
+    Returns:
+        np.ndarray (n_routes,) de scores
+    """
+    # --- Danger ---
+    fresh_snow_penalty = np.minimum(meteo["total_snow"] / 30.0, 1.0)
+    wet_snow_penalty = ((meteo["mean_temp"] > 0) & (meteo["total_precip"] > 0)).astype(float)
+    wind_penalty = np.minimum(meteo["max_wind"] / 25.0, 1.0)
+    slope_penalty = np.where(catalogue.level >= 4, 1.0, 0.3)
+
+    danger = (0.30 * avy_risk +
+              0.20 * wind_penalty +
+              0.15 * fresh_snow_penalty +
+              0.15 * wet_snow_penalty +
+              0.10 * catalogue.expo_penalty +
+              0.10 * slope_penalty)
+
+    # --- Fitness ---
+    level_diff = np.abs(catalogue.level.astype(int) - parse_level(niveau))
+    level_bonus = 1.0 / (1 + level_diff)
+
+    dplus = catalogue.dplus
+    width = dplus_max - dplus_min
+    range_center = (dplus_min + dplus_max) / 2
+    distance_from_center = np.abs(dplus - range_center) / width if width > 0 else np.zeros_like(dplus)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dplus_bonus = np.select(
+            [
+                (dplus >= dplus_min) & (dplus <= dplus_max),
+                dplus < dplus_min,
+            ],
+            [
+                1.0 - (0.3 * distance_from_center),
+                np.maximum(0.1, dplus / dplus_min * 0.5),
+            ],
+            default=np.maximum(0.1, dplus_max / dplus * 0.5),
+        )
+
+    fitness = dplus_bonus * level_bonus
+
+    # --- Score final ---
+    return fitness / (1 + danger)
+
+
+def select_top_n(scores, idx, n):
+    """
+    Indices des n meilleurs scores parmi `idx`, triés par score décroissant.
+    Sélection partielle (argpartition) puis tri des seuls n retenus.
+    """
+    idx = np.asarray(idx)
+    if len(idx) == 0:
+        return idx
+    sub = scores[idx]
+    if n < len(idx):
+        part = np.argpartition(-sub, n - 1)[:n]
+        # Garde tous les ex aequo du n-ième : argpartition en retient un au hasard
+        part = np.flatnonzero(sub >= sub[part].min())
+    else:
+        part = np.arange(len(idx))
+    # Égalités départagées par ordre du catalogue (résultat déterministe)
+    order = part[np.lexsort((idx[part], -sub[part]))][:n]
+    return idx[order]
+
+
+# ============================================================================
+# RÉSULTAT COMPLET D'UNE RECHERCHE
+# ============================================================================
+
+class Recommendation:
+    """
+    Top N d'une recherche avec ce que la liste affiche d'emblée, calculé en
+    une passe : l'interface ne fait que mettre en forme. Le détail IA
+    (features 7 jours + score neige) est calculé à part, cf. snow_details.
+
+    Attributs (tableaux alignés sur `idx`) :
+        idx, scores : indices catalogue et scores du top N
+        n_filtered  : nombre d'itinéraires passant les filtres
+        meteo       : agrégats du jour (WeatherCube.route_meteo)
+        risk_level  : niveau BERA 1-5 (0 = pas de bulletin)
+    """
+
+    def __init__(self, idx, scores, n_filtered, meteo, risk_level):
+        self.idx = idx
+        self.scores = scores
+        self.n_filtered = n_filtered
+        self.meteo = meteo
+        self.risk_level = risk_level
+
+    def __len__(self):
+        return len(self.idx)
+
+    def route(self, i):
+        """Vue dict du i-ème résultat (valeurs scalaires)"""
+        return {
+            "meteo": {k: v[i] for k, v in self.meteo.items()},
+            "risk_level": int(self.risk_level[i]),
+        }
+
+
+def build_recommendation(meteo, risk_level, scores, top_idx, n_filtered):
+    """
+    Assemble le résultat d'une recherche à partir de la passe de scoring.
+
+    Args:
+        meteo      : météo du jour de tout le catalogue (déjà calculée pour le score)
+        risk_level : tableau risk_level_by_route
+        scores     : scores de tout le catalogue
+        top_idx    : indices retenus (select_top_n)
+    """
+    return Recommendation(
+        idx=top_idx,
+        scores=scores[top_idx],
+        n_filtered=n_filtered,
+        meteo={k: v[top_idx] for k, v in meteo.items()},
+        risk_level=risk_level[top_idx],
+    )
+
+
+def route_topo_features(catalogue, idx):
+    """Infos itinéraire attendues par les modèles (mêmes valeurs à l'entraînement, cf. backfill.py)"""
+    return {
+        "summit_altitude_clean": np.full(len(idx), 2500.0),
+        "topo_denivele": catalogue.dplus[idx],
+        "topo_difficulty": np.full(len(idx), 3),  # À mapper si besoin
+        "massif": catalogue.frame["massif"].to_numpy(dtype=object)[idx],
+    }
+
+
+def snow_details(catalogue, cube, route_grids, idx, date_sortie, models=None):
+    """
+    Détail IA d'un lot d'itinéraires : features physiques 7 jours et score
+    neige hybride, un seul predict par modèle pour tout le lot.
+
+    Args:
+        models : ModelRegistry (None = pas de score neige)
+
+    Returns:
+        liste (alignée sur idx) de {"features": dict | None,
+        "snow": dict | None, "saison": str | None}
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    neighbor_idx, neighbor_dist = route_grids
+    features, available = cube.route_physical_features(
+        neighbor_idx[idx], neighbor_dist[idx], date_sortie
+    )
+    features.update(route_topo_features(catalogue, idx))
+
+    snow, saison = None, None
+    if models is not None and available.any():
+        subset = {k: v[available] for k, v in features.items()}
+        snow, saison = hybrid_scores(models, subset, date_sortie)
+
+    details = []
+    position = np.cumsum(available) - 1  # rang dans le sous-lot scoré
+    for j in range(len(idx)):
+        if not available[j]:
+            details.append({"features": None, "snow": None, "saison": None})
+            continue
+        details.append({
+            "features": {k: v[j] for k, v in features.items()},
+            "snow": None if snow is None else {k: float(v[position[j]]) for k, v in snow.items()},
+            "saison": saison,
+        })
+    return details
@@ -0,0 +1,172 @@
+"""
+Ressenti des récits de sortie, hors ligne : lexique français orienté ski
+de rando (qualité de neige, conditions, plaisir de la descente).
+
+Même échelle que data/recit_sentiment_analysis.csv : polarité moyenne
+des termes reconnus dans [-1, 1], « neutral » si |polarité| <= 0.1,
+confidence = |polarité|. Un récit sans terme reconnu est neutre à 0.0 ;
+un récit vide n'a pas d'étiquette (cf. scripts/label_sentiment.py).
+
+Négations (« pas », « jamais »...) : inversent et atténuent le premier
+terme des NEGATION_SPAN mots suivants, sans franchir la ponctuation
+(« rien à signaler, belle journée » reste positif). Intensifs (« très »,
+« vraiment »...) : multiplient le terme suivant. Les expressions (« neige
+pourrie », « que du bonheur ») priment sur leurs mots pris seuls.
+
+Le résultat ne dépend que du texte et du lexique : il se met en cache par
+empreinte du texte (text_hash), LEXICON_VERSION change avec le lexique.
+"""
+
+import hashlib
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+NEUTRAL_THRESHOLD = 0.1
+NEGATION_SPAN = 3
+NEGATION_FACTOR = -0.5  # « pas terrible » est moins négatif que « terrible » n'est positif
+
+# Termes sans accents, en minuscules (cf. normalize)
+LEXICON = {
+    # Neige : qualité
+    "poudre": 0.8, "poudreuse": 0.8, "pow": 0.8, "fraiche": 0.3, "moquette": 0.7,
+    "velours": 0.8, "transformee": 0.5, "transfo": 0.5, "revenue": 0.3, "souple": 0.4,
+    "soupe": -0.5, "pourrie": -0.8, "lourde": -0.4, "collante": -0.4, "croute": -0.6,
+    "croutee": -0.6, "cartonnee": -0.6, "carton": -0.6, "beton": -0.6, "glace": -0.5,
+    "glacee": -0.5, "verglas": -0.6, "dure": -0.3, "ventee": -0.4, "tolee": -0.5,
+    "pourri": -0.8, "mouillee": -0.3, "sale": -0.4, "cailloux": -0.3, "caillasse": -0.4,
+    "portage": -0.3,
+    # Expressions
+    "bonne neige": 0.7, "neige pourrie": -0.8, "neige dure": -0.4, "neige lourde": -0.5,
+    "neige croutee": -0.7, "neige soufflee": -0.4, "neige fraiche": 0.6,
+    "neige transformee": 0.6, "belle neige": 0.7, "super neige": 0.9,
+    "excellentes conditions": 0.9, "bonnes conditions": 0.6, "mauvaises conditions": -0.6,
+    "conditions difficiles": -0.5, "demi tour": -0.5, "pas terrible": -0.4,
+    "que du bonheur": 1.0, "grand ski": 0.8, "ski de reve": 1.0,
+    # Appréciation générale
+    "super": 0.6, "excellent": 0.9, "excellente": 0.9, "excellentes": 0.9,
+    "top": 0.7, "genial": 0.9, "magnifique": 0.8, "magique": 0.8, "sublime": 0.9,
+    "superbe": 0.8, "beau": 0.5, "belle": 0.5, "bon": 0.4, "bonne": 0.4, "bonnes": 0.4,
+    "parfait": 0.9, "parfaite": 0.9, "ideal": 0.7, "ideales": 0.7, "agreable": 0.5,
+    "plaisir": 0.6, "bonheur": 0.8, "regal": 0.9, "extra": 0.7, "royal": 0.8,
+    "splendide": 0.8, "grandiose": 0.8, "enorme": 0.6, "sympa": 0.5, "chouette": 0.5,
+    "recommande": 0.6, "bravo": 0.5, "content": 0.5, "ravi": 0.7, "ravis": 0.7,
+    "mauvais": -0.6, "mauvaise": -0.6, "mauvaises": -0.6,
+    "terrible": 0.5,  # Familier : « c'était terrible » (« pas terrible » : expression)
+    "horrible": -0.9, "affreux": -0.8, "penible": -0.6, "galere": -0.6, "dommage": -0.4,
+    "decevant": -0.6, "decu": -0.6, "decus": -0.6, "deception": -0.6, "nul": -0.7,
+    "difficile": -0.3, "delicat": -0.3, "dangereux": -0.7, "dangereuse": -0.7,
+    "risque": -0.2, "exposee": -0.2, "epuisant": -0.5, "interminable": -0.5,
+    "regret": -0.5, "regrette": -0.5, "abandon": -0.6, "renonce": -0.5,
+    # Danger et incidents
+    "avalanche": -0.5, "coulee": -0.3, "plaque": -0.4, "woumf": -0.6,
+    "blessure": -0.8, "secours": -0.7,
+}
+
+# « plus » n'y est pas : trop souvent comparatif (« plus haut »)
+NEGATIONS = {"pas", "jamais", "rien", "ni", "aucun", "aucune", "sans"}
+INTENSIFIERS = {
+    "tres": 1.3, "vraiment": 1.3, "trop": 1.3, "hyper": 1.5, "tellement": 1.4,
+    "vachement": 1.4, "franchement": 1.2, "assez": 0.8, "plutot": 0.8, "peu": 0.5,
+}
+
+_TOKEN = re.compile(r"[a-z]+|[.,;:!?()\n]")
+_PUNCTUATION = set(".,;:!?()\n")
+
+LEXICON_VERSION = hashlib.sha1(
+    repr((sorted(LEXICON.items()), sorted(NEGATIONS), sorted(INTENSIFIERS.items()),
+          NEGATION_SPAN, NEGATION_FACTOR, NEUTRAL_THRESHOLD, _TOKEN.pattern)).encode("utf-8")
+).hexdigest()[:8]
+
+# Expressions indexées par leur premier mot, les plus longues d'abord
+_PHRASES = {}
+for _phrase in sorted((k for k in LEXICON if " " in k), key=lambda k: -k.count(" ")):
+    _PHRASES.setdefault(_phrase.split(" ", 1)[0], []).append((_phrase, _phrase.count(" ") + 1))
+
+
+def normalize(text):
+    """Minuscules sans accents, découpées en mots et signes de ponctuation"""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN.findall(text)
+
+
+def text_hash(text):
+    """Empreinte du texte brut (clé de cache)"""
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+
+def polarity(text):
+    """Polarité moyenne des termes reconnus, dans [-1, 1] (0.0 sans terme)"""
+    words = normalize(text)
+    scores = []
+    negated_until, boost = -1, 1.0
+    i = 0
+    while i < len(words):
+        word = words[i]
+        term, step = (word, 1) if word in LEXICON else (None, 1)
+        for phrase, n in _PHRASES.get(word, ()):
+            if " ".join(words[i:i + n]) == phrase:
+                term, step = phrase, n
+                break
+        if term is None:
+            if word in _PUNCTUATION:
+                negated_until = -1  # Fin de proposition : fin de la négation
+            elif word in NEGATIONS:
+                negated_until = i + NEGATION_SPAN
+            elif word in INTENSIFIERS:
+                boost *= INTENSIFIERS[word]
+                i += 1
+                continue
+            boost = 1.0
+            i += 1
+            continue
+
+        score = LEXICON[term] * boost
+        if i <= negated_until:
+            score *= NEGATION_FACTOR
+            negated_until = -1  # La négation porte sur un seul terme
+        scores.append(max(-1.0, min(1.0, score)))
+        boost = 1.0
+        i += step
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def label(text):
+    """(sentiment, confidence) d'un récit"""
+    p = polarity(text)
+    if p > NEUTRAL_THRESHOLD:
+        sentiment = "positive"
+    elif p < -NEUTRAL_THRESHOLD:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    return sentiment, round(abs(p), 3)
+
+
+def label_chunk(texts):
+    """Étiquette un paquet de textes (exécuté dans un processus du pool)"""
+    return [label(text) for text in texts]
+
+
+def label_texts(texts, workers=None, chunk_size=500):
+    """
+    Étiquette des textes par paquets de `chunk_size` dans un
+    ProcessPoolExecutor ; sur place s'il n'y a qu'un paquet (démarrer des
+    processus coûterait plus que le travail).
+
+    Returns:
+        liste de (sentiment, confidence), dans l'ordre des textes
+    """
+    texts = list(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    if len(chunks) <= 1 or workers == 1:
+        return [result for chunk in chunks for result in label_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for part in pool.map(label_chunk, chunks) for result in part]
+
+
+def recit_text(recits):
+    """Texte analysé d'un récit : titre, résumé, conditions et description"""
+    columns = [c for c in ("title", "summary", "conditions", "description") if c in recits]
+    return recits[columns].fillna("").astype(str).agg("\n".join, axis=1).str.strip()
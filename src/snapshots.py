@@ -0,0 +1,238 @@
+"""
+Instantanés de données versionnés et rechargement à chaud.
+
+Chaque rafraîchissement publie un nouveau dossier `data/snapshots/<id>/`
+(BERA, météo, itinéraires + manifest.json) puis bascule atomiquement le
+pointeur `data/snapshots/CURRENT`. Un fichier publié n'est plus jamais
+réécrit : l'app ne lit donc jamais de fichier à moitié écrit.
+
+Les fichiers de `data/` (versionnés dans git) font foi : les instantanés
+sont un état local, hors git, construit à partir d'eux. Un instantané qui
+ne correspond plus à ces fichiers (git pull, catalogue modifié à la main)
+est ignoré jusqu'à la publication suivante, qui les reprend.
+
+Côté app, SnapshotWatcher charge le nouvel instantané en tâche de fond et
+le substitue à l'ancien par une seule affectation de référence.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from data_version import (
+    ARTEFACTS, artefact_hashes, atomic_write_bytes, atomic_write_json, content_hash,
+    manifest_entry, manifest_version, read_manifest, version_from_hashes,
+)
+
+SNAPSHOT_ROOT = "data/snapshots"
+POINTER_NAME = "CURRENT"
+MANIFEST_NAME = "manifest.json"
+
+ResolvedData = namedtuple("ResolvedData", ["snapshot", "paths", "version"])
+LoadedData = namedtuple("LoadedData", ["snapshot", "version", "data", "loaded_at"])
+
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+def read_pointer(root=SNAPSHOT_ROOT):
+    """Nom de l'instantané courant (None si pas encore d'instantané)"""
+    try:
+        with open(os.path.join(root, POINTER_NAME), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def snapshot_paths(name, root=SNAPSHOT_ROOT):
+    """Chemins des artefacts dans un instantané"""
+    directory = os.path.join(root, name)
+    return {a: os.path.join(directory, os.path.basename(p)) for a, p in ARTEFACTS.items()}
+
+
+def is_complete(name, root=SNAPSHOT_ROOT):
+    """Instantané complet : manifeste présent et fichiers de la bonne taille"""
+    manifest = read_manifest(os.path.join(root, name, MANIFEST_NAME))
+    entries = manifest.get("artefacts", {})
+    for artefact, path in snapshot_paths(name, root).items():
+        entry = entries.get(artefact)
+        if entry is None or not os.path.exists(path) or os.path.getsize(path) != entry["bytes"]:
+            return False
+    return True
+
+
+def resolve_data(root=SNAPSHOT_ROOT):
+    """
+    Données à servir : l'instantané pointé par CURRENT s'il est complet et
+    identique aux fichiers de `data/`, sinon ces fichiers eux-mêmes
+    (versionnés par leur contenu).
+    """
+    hashes = artefact_hashes()
+    name = read_pointer(root)
+    if name and is_complete(name, root):
+        manifest = read_manifest(os.path.join(root, name, MANIFEST_NAME))
+        entries = manifest["artefacts"]
+        if all(entries[a]["sha256"] == h for a, h in hashes.items()):
+            return ResolvedData(name, snapshot_paths(name, root), manifest["version"])
+    return ResolvedData(None, dict(ARTEFACTS), version_from_hashes(hashes))
+
+
+# ============================================================================
+# PUBLICATION (scripts de récupération)
+# ============================================================================
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def publish_snapshot(updates, keep=3, root=SNAPSHOT_ROOT):
+    """
+    Publie un nouvel instantané puis bascule le pointeur CURRENT.
+
+    Args:
+        updates : {artefact: {"path": fichier source, "rows": n, "time_range": (début, fin)}}
+                  Les artefacts absents sont repris des fichiers de `data/`
+                  (liés depuis l'instantané courant s'ils n'ont pas changé).
+        keep    : nombre d'instantanés conservés
+
+    Returns:
+        str : nom du nouvel instantané
+    """
+    os.makedirs(root, exist_ok=True)
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + uuid.uuid4().hex[:6]
+    staging = os.path.join(root, f".staging-{name}")
+    os.makedirs(staging)
+
+    previous = read_pointer(root)
+    if previous and not is_complete(previous, root):
+        previous = None
+    previous_entries = (
+        read_manifest(os.path.join(root, previous, MANIFEST_NAME)).get("artefacts", {})
+        if previous else {}
+    )
+    recorded = read_manifest().get("artefacts", {})
+
+    try:
+        entries = {}
+        for artefact, flat_path in ARTEFACTS.items():
+            filename = os.path.basename(flat_path)
+            dst = os.path.join(staging, filename)
+            if artefact in updates:
+                spec = updates[artefact]
+                shutil.copy2(spec["path"], dst)
+                entries[artefact] = manifest_entry(
+                    dst, spec.get("rows"), spec.get("time_range"), record_path=filename
+                )
+                continue
+
+            sha256 = content_hash(flat_path)
+            entry = previous_entries.get(artefact)
+            if entry is not None and entry["sha256"] == sha256:
+                # Inchangé : lien vers le fichier (immuable) de l'instantané courant
+                _link_or_copy(snapshot_paths(previous, root)[artefact], dst)
+                entries[artefact] = dict(entry, path=filename, bytes=os.path.getsize(dst))
+            else:
+                # Copie, pas de lien : le fichier de data/ peut être réécrit sur place
+                shutil.copy2(flat_path, dst)
+                entry = recorded.get(artefact, {})
+                known = entry.get("sha256") == sha256
+                entries[artefact] = manifest_entry(
+                    dst, entry.get("rows") if known else None,
+                    entry.get("time_range") if known else None, record_path=filename,
+                )
+
+        atomic_write_json(os.path.join(staging, MANIFEST_NAME), {
+            "snapshot": name,
+            "version": manifest_version(entries),
+            "artefacts": entries,
+        })
+        os.rename(staging, os.path.join(root, name))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Bascule atomique : les lecteurs voient l'ancien ou le nouveau, jamais un mélange
+    atomic_write_bytes(os.path.join(root, POINTER_NAME), name.encode("utf-8"))
+    prune_snapshots(keep=keep, root=root)
+    return name
+
+
+def prune_snapshots(keep=3, root=SNAPSHOT_ROOT):
+    """Supprime les instantanés les plus anciens (jamais le courant)"""
+    current = read_pointer(root)
+    names = sorted(
+        d for d in os.listdir(root)
+        if not d.startswith(".") and os.path.isdir(os.path.join(root, d))
+    )
+    for name in names[:-keep] if keep > 0 else names:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+# ============================================================================
+# RECHARGEMENT À CHAUD (app)
+# ============================================================================
+
+class SnapshotWatcher:
+    """
+    Garde les données chargées et surveille le pointeur CURRENT.
+
+    `current` est un LoadedData immuable : une requête lit la référence une
+    fois et travaille dessus, pendant qu'un thread de fond prépare la
+    version suivante puis la publie par simple affectation.
+
+    Args:
+        loader        : fonction (paths, version) → données chargées
+        poll_interval : secondes entre deux vérifications du pointeur
+    """
+
+    def __init__(self, loader, poll_interval=30.0, root=SNAPSHOT_ROOT):
+        self._loader = loader
+        self._root = root
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.last_error = None
+        self.last_check = None
+        self._stop = threading.Event()
+
+        # Seul chargement bloquant : le tout premier
+        self.current = self._load(resolve_data(root))
+
+        self._thread = threading.Thread(
+            target=self._run, name="snapshot-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _load(self, resolved):
+        data = self._loader(resolved.paths, resolved.version)
+        return LoadedData(resolved.snapshot, resolved.version, data, time.time())
+
+    def check_now(self):
+        """Recharge si la version a changé. Renvoie True si une bascule a eu lieu."""
+        self.last_check = time.time()
+        resolved = resolve_data(self._root)
+        if resolved.version == self.current.version:
+            return False
+        self.current = self._load(resolved)
+        self.reloads += 1
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_now()
+                self.last_error = None
+            except Exception as e:
+                # Instantané illisible : on garde les données actuelles
+                self.last_error = repr(e)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,205 @@
+"""
+Qualité de neige prédite (score hybride hiver/printemps), version par lot.
+
+Mêmes règles que compute_hybrid_snow_score mais sur des tableaux. Le
+mélange est un ensemble configurable (ENSEMBLES) : chaque rôle ('base',
+'spring') est tenu par un score issu d'un modèle du registre ou d'une
+règle, pondérés selon la saison. La matrice de features est construite une
+fois et chaque modèle n'est appelé qu'une fois pour tout le lot.
+"""
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# ARRONDI
+# ============================================================================
+
+def round3(values):
+    """
+    Arrondi à 3 décimales identique au round() Python des fonctions de
+    référence : np.round arrondit x * 1000 (déjà inexact) au pair, ce qui
+    décale de 0.001 les valeurs en x.xxx5. Ces quasi-égalités sont reprises
+    une à une, le reste passe par np.round.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 3)
+    scaled = values * 1000
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(float(v), 3) for v in values[ties]]
+    return rounded
+
+
+# ============================================================================
+# SCORE PRINTEMPS
+# ============================================================================
+
+def spring_scores(features):
+    """Score printemps [0-1] (regel/dégel avec faible neige récente)"""
+    snowfall = np.asarray(features["snowfall_7d_sum"], dtype=float)
+    temp_min = np.asarray(features["temp_min_7d_avg"], dtype=float)
+    temp_amp = np.asarray(features["temp_amp_7d_avg"], dtype=float)
+    wind_max = np.asarray(features["wind_max_7d"], dtype=float)
+
+    activation = np.select([snowfall <= 3, snowfall <= 10], [1.0, 0.5], default=0.0)
+    freeze = np.select(
+        [temp_min <= -6, temp_min <= -3, temp_min <= -1], [1.0, 0.8, 0.6], default=0.2
+    )
+    amp = np.select(
+        [temp_amp >= 12, temp_amp >= 8, temp_amp >= 5], [1.0, 0.8, 0.6], default=0.3
+    )
+    wind = np.select([wind_max <= 15, wind_max <= 30], [1.0, 0.7], default=0.4)
+
+    raw_score = 0.45 * freeze + 0.35 * amp + 0.20 * wind
+    return round3(raw_score * activation)
+
+
+# ============================================================================
+# MATRICE DE FEATURES
+# ============================================================================
+
+def feature_frame(features, date_sortie):
+    """
+    Matrice de features commune à tous les modèles du registre : massif
+    catégoriel, day_of_week et spring_snow_score dérivés.
+    """
+    n = len(features["temp_min_7d_avg"])
+    frame = pd.DataFrame({name: v for name, v in features.items() if name != "massif"})
+    frame["massif"] = pd.Categorical(np.asarray(features["massif"], dtype=object))
+    frame["day_of_week"] = np.full(n, date_sortie.weekday())
+    frame["spring_snow_score"] = spring_scores(features)
+    return frame
+
+
+# ============================================================================
+# SCORES PAR RÔLE (MODÈLES ML + BOOST MÉTIER, RÈGLES)
+# ============================================================================
+
+def exceptional_winter_days(features):
+    """Poudreuse froide et calme (cf. is_exceptional_winter_day)"""
+    return (
+        (np.asarray(features["snowfall_7d_sum"]) >= 25) &
+        (np.asarray(features["temp_min_7d_avg"]) <= -6) &
+        (np.asarray(features["wind_max_7d"]) <= 35)
+    )
+
+
+def winter_scores(raw, frame):
+    """
+    Score hiver [0-1] depuis la sortie du modèle physique, avec correction
+    du biais avalanche (power boost, cf. compute_base_snow_score_boosted).
+    """
+    # Normalisation [-1, 1] → [0, 1]
+    normalized = np.clip((raw + 1) / 2, 0, 1)
+    ml_boosted = 1 - (1 - normalized) ** 1.5
+
+    exceptional = exceptional_winter_days(frame)
+    boosted = round3(np.minimum(ml_boosted + 0.5 * (1.0 - ml_boosted), 1.0))
+    final_score = np.where(exceptional, boosted, ml_boosted)
+
+    # Exposant 0.65 rehausse les scores moyens sans dénaturer
+    return round3(final_score ** 0.65)
+
+
+def spring_model_scores(raw, frame):
+    """Sortie du modèle printemps ramenée sur [0-1]"""
+    return round3(np.clip((raw + 1) / 2, 0, 1))
+
+
+def spring_rule_scores(raw, frame):
+    """Score printemps à base de règles (déjà dans la matrice de features)"""
+    return frame["spring_snow_score"].to_numpy()
+
+
+# ============================================================================
+# ENSEMBLES
+# ============================================================================
+
+# Score : (modèle du registre ou None pour une règle, sortie brute → [0-1])
+SCORERS = {
+    "winter": ("physical", winter_scores),
+    "spring_model": ("spring", spring_model_scores),
+    "spring_rules": (None, spring_rule_scores),
+}
+
+FALLBACK_SCORE = 0.5  # Modèle absent
+
+
+def _transition_weights(date_sortie):
+    spring_weight = min(date_sortie.day / 31 * 0.6, 0.6)  # 0 → 0.6 progressif
+    return {"base": 1 - spring_weight, "spring": spring_weight}
+
+
+# Par saison : (combinaison 'somme' ou 'max', date → poids par rôle)
+SEASON_BLEND = {
+    "hiver": ("somme", lambda date_sortie: {"base": 1.0}),
+    "transition": ("somme", _transition_weights),
+    "printemps": ("max", lambda date_sortie: {"spring": 1.0, "base": 0.7}),
+}
+
+ENSEMBLES = {
+    # Mélange historique de compute_hybrid_snow_score
+    "hybride": {"roles": {"base": "winter", "spring": "spring_rules"}, "seasons": SEASON_BLEND},
+    # Modèle printemps LightGBM à la place de la règle
+    "hybride_ml": {"roles": {"base": "winter", "spring": "spring_model"}, "seasons": SEASON_BLEND},
+}
+
+DEFAULT_ENSEMBLE = "hybride"
+
+
+def member_scores(models, scorer, frame):
+    """Score [0-1] d'un rôle : un seul predict pour tout le lot"""
+    model_name, transform = SCORERS[scorer]
+    if model_name is None:
+        return transform(None, frame)
+    model = models.get(model_name) if models is not None else None
+    if model is None or len(frame) == 0:
+        return np.full(len(frame), FALLBACK_SCORE)
+    missing = [f for f in model.feature_names if f not in frame.columns]
+    if missing:
+        raise ValueError(f"Features manquantes pour '{model_name}' : {', '.join(missing)}")
+    return transform(model.predict(frame), frame)
+
+
+# ============================================================================
+# SCORE HYBRIDE
+# ============================================================================
+
+def season_of(date_sortie):
+    """'hiver', 'transition' (mars) ou 'printemps' (avril-juin)"""
+    if date_sortie.month == 3:
+        return "transition"
+    if 4 <= date_sortie.month <= 6:
+        return "printemps"
+    return "hiver"
+
+
+def hybrid_scores(models, features, date_sortie, ensemble=DEFAULT_ENSEMBLE):
+    """
+    Combine les rôles de l'ensemble selon la saison (cf. compute_hybrid_snow_score).
+
+    Args:
+        models   : ModelRegistry (None = scores de repli)
+        features : dict de tableaux (features physiques + topo + massif)
+        ensemble : nom dans ENSEMBLES
+
+    Returns:
+        (dict de tableaux 'hybrid' + un par rôle ('base', 'spring'), saison)
+    """
+    config = ENSEMBLES[ensemble]
+    frame = feature_frame(features, date_sortie)
+    scores = {
+        role: member_scores(models, scorer, frame)
+        for role, scorer in config["roles"].items()
+    }
+
+    saison = season_of(date_sortie)
+    combination, weights = config["seasons"][saison]
+    weighted = [w * scores[role] for role, w in weights(date_sortie).items()]
+    if combination == "max":
+        hybrid = np.maximum.reduce(weighted)
+    else:
+        hybrid = sum(weighted)
+
+    return {"hybrid": hybrid, **scores}, saison
@@ -0,0 +1,105 @@
+"""
+Index spatial des itinéraires (hachage sur grille en coordonnées projetées).
+
+Les sommets sont projetés en km (équirectangulaire centrée sur la zone)
+puis rangés par cellule carrée. Une requête rayon / bbox ne regarde que
+les cellules touchées, puis affine avec un test exact.
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distance grand-cercle en km (vectorisée numpy)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    """
+    Hachage spatial sur une grille de `cell_km` km de côté.
+
+    radius(lat, lon, km) et bbox(sud, ouest, nord, est) renvoient les
+    indices (triés) des points concernés.
+    """
+
+    def __init__(self, lat, lon, cell_km=10.0):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_km = float(cell_km)
+        self.lat0 = float(np.mean(self.lat)) if len(self.lat) else 45.0
+        self._kx = EARTH_RADIUS_KM * np.cos(np.radians(self.lat0)) * np.pi / 180
+        self._ky = EARTH_RADIUS_KM * np.pi / 180
+
+        cx, cy = self._cell(self.lat, self.lon)
+
+        # Tri par cellule : chaque cellule occupée = une tranche de `_order`
+        self._order = np.lexsort((cy, cx))
+        keys = np.stack([cx[self._order], cy[self._order]], axis=1)
+        if len(keys):
+            new_cell = np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)]
+            self._starts = np.flatnonzero(new_cell)
+        else:
+            self._starts = np.array([], dtype=int)
+        self._ends = np.r_[self._starts[1:], len(keys)].astype(int)
+        self._cell_x = keys[self._starts, 0] if len(keys) else np.array([], dtype=int)
+        self._cell_y = keys[self._starts, 1] if len(keys) else np.array([], dtype=int)
+
+    def _project(self, lat, lon):
+        return np.asarray(lon) * self._kx, np.asarray(lat) * self._ky
+
+    def _cell(self, lat, lon):
+        x, y = self._project(lat, lon)
+        return (
+            np.floor(x / self.cell_km).astype(np.int64),
+            np.floor(y / self.cell_km).astype(np.int64),
+        )
+
+    def _candidates(self, cx_min, cx_max, cy_min, cy_max):
+        """Indices des points des cellules dans le rectangle de cellules"""
+        hit = (
+            (self._cell_x >= cx_min) & (self._cell_x <= cx_max) &
+            (self._cell_y >= cy_min) & (self._cell_y <= cy_max)
+        )
+        cells = np.flatnonzero(hit)
+        if len(cells) == 0:
+            return np.array([], dtype=int)
+        return np.concatenate(
+            [self._order[self._starts[c]:self._ends[c]] for c in cells]
+        )
+
+    def radius(self, lat, lon, radius_km):
+        """Points à moins de `radius_km` km (haversine) de (lat, lon)"""
+        x, y = self._project(lat, lon)
+        r = float(radius_km)
+        # Au nord de lat0 la projection étire l'axe est-ouest : on élargit la fenêtre
+        lat_far = min(abs(lat) + r / self._ky, 89.0)
+        rx = r * max(1.0, np.cos(np.radians(self.lat0)) / np.cos(np.radians(lat_far)))
+        cand = self._candidates(
+            int(np.floor((x - rx) / self.cell_km)),
+            int(np.floor((x + rx) / self.cell_km)),
+            int(np.floor((y - r) / self.cell_km)),
+            int(np.floor((y + r) / self.cell_km)),
+        )
+        if len(cand) == 0:
+            return cand
+        d = haversine_km(lat, lon, self.lat[cand], self.lon[cand])
+        return np.sort(cand[d <= r])
+
+    def bbox(self, south, west, north, east):
+        """Points dans la boîte [south, north] x [west, east] (degrés)"""
+        cx_min, cy_min = self._cell(south, west)
+        cx_max, cy_max = self._cell(north, east)
+        cand = self._candidates(int(cx_min), int(cx_max), int(cy_min), int(cy_max))
+        if len(cand) == 0:
+            return cand
+        inside = (
+            (self.lat[cand] >= south) & (self.lat[cand] <= north) &
+            (self.lon[cand] >= west) & (self.lon[cand] <= east)
+        )
+        return np.sort(cand[inside])
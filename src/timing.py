@@ -0,0 +1,128 @@
+"""
+Chronométrage léger des étapes : chargement, filtrage, scoring, modèle et
+carte dans l'app ; réseau, parsing et écriture dans les scripts de
+récupération.
+
+    timings = Timings("app")
+    with timings.span("scoring"):
+        ...
+    timings.summary()  # {"scoring": {"ms": 12.3, "count": 1}}
+    timings.log()      # une ligne JSON sur le logger "skitouring.timing"
+
+Désactivé (variable d'environnement SKI_TIMINGS=0), span() renvoie un
+contexte vide partagé : ni lecture d'horloge ni allocation, le coût se
+limite à l'appel. Les lignes JSON partent sur stderr, et aussi dans le
+fichier SKI_TIMINGS_LOG s'il est défini (une ligne par rerun ou par
+exécution de script, à agréger avec pandas.read_json(lines=True)).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+ENV_ENABLED = "SKI_TIMINGS"
+ENV_LOG_FILE = "SKI_TIMINGS_LOG"
+LOGGER_NAME = "skitouring.timing"
+
+_DISABLED_SPAN = nullcontext()
+
+
+def timings_enabled():
+    """Chronométrage actif sauf SKI_TIMINGS=0/false/off"""
+    return os.environ.get(ENV_ENABLED, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_logger():
+    """Logger des lignes JSON (configuré au premier appel)"""
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handlers = [logging.StreamHandler(sys.stderr)]
+        if os.environ.get(ENV_LOG_FILE):
+            handlers.append(logging.FileHandler(os.environ[ENV_LOG_FILE], encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+    return logger
+
+
+class _Span:
+    """Contexte d'une étape : ajoute sa durée à Timings en sortie"""
+
+    __slots__ = ("timings", "name", "t0")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Timings:
+    """
+    Durées cumulées par étape pour un périmètre (un rerun de l'app, une
+    exécution de script). Une étape chronométrée plusieurs fois (un appel
+    réseau par batch) cumule sa durée et compte ses passages.
+    """
+
+    def __init__(self, scope, enabled=None):
+        self.scope = scope
+        self.enabled = timings_enabled() if enabled is None else enabled
+        self.started = time.perf_counter()
+        self._spans = {}  # nom -> [secondes, passages], dans l'ordre d'apparition
+        self._lock = threading.Lock()  # Spans concurrents (requêtes parallèles des scripts)
+
+    def span(self, name):
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name)
+
+    def add(self, name, seconds):
+        with self._lock:
+            entry = self._spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def summary(self):
+        return {
+            name: {"ms": round(seconds * 1000, 2), "count": count}
+            for name, (seconds, count) in self._spans.items()
+        }
+
+    def record(self, **context):
+        """Dictionnaire d'une ligne de log (contexte libre : version, requête…)"""
+        return {
+            "event": "timings",
+            "scope": self.scope,
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            **context,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": self.summary(),
+        }
+
+    def log(self, **context):
+        """Émet une ligne JSON (rien si désactivé ou sans étape)"""
+        if self.enabled and self._spans:
+            get_logger().info(json.dumps(self.record(**context), ensure_ascii=False, default=str))
+
+    def report(self):
+        """Résumé lisible pour la sortie console des scripts"""
+        if not self._spans:
+            return "⏱️  Aucune étape chronométrée"
+        parts = [
+            f"{name} {seconds:.2f} s" + (f" ({count}×)" if count > 1 else "")
+            for name, (seconds, count) in self._spans.items()
+        ]
+        return "⏱️  " + " · ".join(parts)
@@ -0,0 +1,412 @@
+"""
+Évaluateur NumPy des modèles LightGBM (arbres aplatis).
+
+Le dump texte LightGBM est converti une fois en tableaux contigus (feature,
+seuil, fils gauche/droit, type de décision, bitsets catégoriels, valeurs des
+feuilles) pour tous les arbres. La prédiction parcourt ensuite tous les
+arbres pour tout un lot de lignes en NumPy, sans le paquet `lightgbm`.
+
+Forme compilée (`<modèle>.npmodel/`, cf. scripts/build_models.py) : un
+fichier .npy par tableau, ouvert en memory-map, plus meta.json (features,
+catégories des massifs, hash du dump source). `load_model` l'utilise s'il
+correspond au dump texte ; sinon il reparse le texte et compile le résultat
+dans data/.derived/models/ (cache inscriptible, reconstruit au premier
+démarrage d'un déploiement qui n'a pas lancé build_models.py).
+
+Règles de décision reprises de LightGBM (tree.h) :
+- numérique : NaN → 0 si missing_type ≠ NaN ; valeur manquante → côté
+  `default_left`, sinon `x <= seuil` à gauche
+- catégoriel : NaN ou négatif à droite, sinon gauche si le bit de la
+  catégorie est présent dans le bitset du nœud
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_version import DERIVED_DIR, atomic_write_json, content_hash
+
+# Bits de decision_type (LightGBM)
+CATEGORICAL_MASK = 1
+DEFAULT_LEFT_MASK = 2
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+
+K_ZERO_THRESHOLD = 1e-35
+
+COMPILED_SUFFIX = ".npmodel"
+COMPILED_FORMAT = 2
+COMPILED_CACHE = f"{DERIVED_DIR}/models"
+
+
+def _parse_blocks(path):
+    """En-tête, arbres (dict clé → valeur brute) et pandas_categorical"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    header, trees, current = {}, [], None
+    pandas_categorical = None
+    after_trees = False
+    for line in text.splitlines():
+        if line.startswith("Tree="):
+            current = {}
+            trees.append(current)
+            continue
+        if line.startswith("end of trees"):
+            current, after_trees = None, True
+            continue
+        if line.startswith("pandas_categorical:"):
+            pandas_categorical = json.loads(line[len("pandas_categorical:"):])
+            continue
+        if "=" not in line or after_trees:
+            continue  # importances et paramètres d'entraînement
+        key, value = line.split("=", 1)
+        (current if current is not None else header).setdefault(key, value)
+    return header, trees, pandas_categorical
+
+
+class TreeEnsemble:
+    """
+    Ensemble d'arbres aplati, prédiction vectorisée.
+
+    Tous les nœuds (internes et feuilles, tous arbres confondus) partagent
+    une même numérotation où les deux fils d'un nœud sont adjacents :
+        split_feature, threshold, decision_type : test du nœud
+        left_child : fils gauche (le droit est left_child + 1) ; une feuille
+                     pointe sur elle-même
+        cat_start, cat_len : bitset du nœud catégoriel dans `cat_bits`
+        leaf_value : valeur de la feuille (0 pour un nœud interne)
+    Par arbre : root (premier nœud de l'arbre)
+    """
+
+    ARRAYS = [
+        "split_feature", "threshold", "decision_type", "left_child",
+        "cat_start", "cat_len", "cat_bits", "leaf_value", "root",
+    ]
+
+    ROW_CHUNK = 128  # lignes par passe (tableaux (lignes, arbres) en cache)
+
+    def __init__(self, arrays, meta):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.feature_names = meta["feature_names"]
+        self.categorical_features = meta["categorical_features"]
+        self.pandas_categorical = meta.get("pandas_categorical") or []
+        self._category_index = [
+            {value: i for i, value in enumerate(categories)}
+            for categories in self.pandas_categorical
+        ]
+
+        is_leaf = self.left_child == np.arange(len(self.left_child))
+        categorical = ((self.decision_type & CATEGORICAL_MASK) != 0) & ~is_leaf
+        self._numerical = ~is_leaf & ~categorical
+        self._any_zero_missing = bool(
+            (self._numerical & (((self.decision_type >> 2) & 3) == MISSING_ZERO)).any()
+        )
+
+        # Un test catégoriel devient un test numérique sur une colonne
+        # virtuelle 0/1 (1 = à droite), une par bitset distinct, calculée
+        # une fois par lot à partir du code de la catégorie.
+        nodes = np.flatnonzero(categorical)
+        keys = np.stack([self.cat_start[nodes], self.cat_len[nodes], self.split_feature[nodes]], axis=1)
+        _, first, virtual = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        virtual = virtual.ravel()
+        n_codes = 32 * int(self.cat_len[nodes].max()) if len(nodes) else 0
+        codes = np.broadcast_to(np.arange(n_codes, dtype=np.float64), (len(first), n_codes))
+        representative = np.broadcast_to(nodes[first][:, None], codes.shape)
+        self._virtual_feature = self.split_feature[nodes[first]]
+        self._virtual_right = np.ones((len(first), n_codes + 1))
+        self._virtual_right[:, :n_codes] = ~self._categorical_left(codes, representative)
+        self._eval_feature = self.split_feature.astype(np.int64)
+        self._eval_feature[nodes] = len(self.feature_names) + virtual
+        self._eval_threshold = self.threshold.copy()
+        self._eval_threshold[nodes] = 0.5
+
+    @property
+    def num_trees(self):
+        return len(self.root)
+
+    @property
+    def max_depth(self):
+        return self.meta["max_depth"]
+
+    @property
+    def num_class(self):
+        return self.meta.get("num_class", 1)
+
+    # ------------------------------------------------------------------
+    # Conversion depuis le dump texte LightGBM
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_lightgbm_text(cls, path):
+        header, trees, pandas_categorical = _parse_blocks(path)
+        objective = header.get("objective", "regression").split()[0]
+        num_class = int(header.get("num_class", 1))
+        if not (objective.startswith("regression") or objective == "multiclass"):
+            # Pas d'autre transformation de sortie gérée (sigmoid, ova...)
+            raise ValueError(f"Objectif non pris en charge : {header.get('objective')}")
+        if num_class != int(header.get("num_tree_per_iteration", 1)):
+            raise ValueError("Un arbre par classe et par itération attendu")
+
+        feature_names = header["feature_names"].split()
+        feature_infos = header.get("feature_infos", "").split()
+        categorical_features = [
+            i for i, info in enumerate(feature_infos)
+            if info != "none" and not info.startswith("[")
+        ]
+
+        n_nodes = sum(2 * int(tree["num_leaves"]) - 1 for tree in trees)
+        split_feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.full(n_nodes, np.inf)
+        decision_type = np.zeros(n_nodes, dtype=np.int8)
+        left_child = np.arange(n_nodes, dtype=np.int32)
+        cat_start = np.zeros(n_nodes, dtype=np.int32)
+        cat_len = np.zeros(n_nodes, dtype=np.int32)
+        leaf_value = np.zeros(n_nodes)
+        cat_bits, root = [], []
+        max_depth = 0
+
+        position = 0  # prochaine case libre
+        for tree in trees:
+            values = [float(v) for v in tree["leaf_value"].split()]
+            root.append(position)
+            if int(tree["num_leaves"]) <= 1:
+                leaf_value[position] = values[0]
+                position += 1
+                continue
+
+            features = [int(v) for v in tree["split_feature"].split()]
+            thresholds = [float(v) for v in tree["threshold"].split()]
+            decisions = [int(v) for v in tree["decision_type"].split()]
+            lefts = [int(v) for v in tree["left_child"].split()]
+            rights = [int(v) for v in tree["right_child"].split()]
+            boundaries = [int(v) for v in tree.get("cat_boundaries", "").split()]
+            bits_offset = len(cat_bits)
+            cat_bits.extend(int(v) for v in tree.get("cat_threshold", "").split())
+
+            # Parcours de l'arbre : chaque paire de fils reçoit deux cases
+            # consécutives. Nœud LightGBM : i >= 0 interne, ~i feuille.
+            position += 1
+            queue = [(0, root[-1], 1)]
+            while queue:
+                local, at, depth = queue.pop()
+                if local < 0:
+                    leaf_value[at] = values[~local]
+                    continue
+                max_depth = max(max_depth, depth)
+                d = decisions[local]
+                split_feature[at] = features[local]
+                decision_type[at] = d
+                if d & CATEGORICAL_MASK:
+                    k = int(thresholds[local])
+                    cat_start[at] = bits_offset + boundaries[k]
+                    cat_len[at] = boundaries[k + 1] - boundaries[k]
+                else:
+                    threshold[at] = thresholds[local]
+                left_child[at] = position
+                queue.append((lefts[local], position, depth + 1))
+                queue.append((rights[local], position + 1, depth + 1))
+                position += 2
+
+        arrays = {
+            "split_feature": split_feature,
+            "threshold": threshold,
+            "decision_type": decision_type,
+            "left_child": left_child,
+            "cat_start": cat_start,
+            "cat_len": cat_len,
+            "cat_bits": np.array(cat_bits, dtype=np.uint32),
+            "leaf_value": leaf_value,
+            "root": np.array(root, dtype=np.int32),
+        }
+        meta = {
+            "feature_names": feature_names,
+            "categorical_features": categorical_features,
+            "pandas_categorical": pandas_categorical,
+            "objective": objective,
+            "num_class": num_class,
+            "max_depth": max_depth,
+            "feature_infos": feature_infos,
+            # Correspondance catégorie → code, par feature catégorielle
+            "categories": {
+                feature_names[j]: list(categories)
+                for j, categories in zip(categorical_features, pandas_categorical or [])
+            },
+            "source": str(path),
+            "source_sha256": content_hash(path),
+        }
+        return cls(arrays, meta)
+
+    # ------------------------------------------------------------------
+    # Forme compilée (memory-map)
+    # ------------------------------------------------------------------
+
+    def save(self, directory):
+        """
+        Écrit un .npy par tableau et meta.json dans `directory`, remplacé
+        d'un bloc (dossier temporaire puis renommage).
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f".tmp_{directory.name}"))
+        try:
+            for name in self.ARRAYS:
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+            atomic_write_json(str(tmp / "meta.json"), {**self.meta, "format": COMPILED_FORMAT})
+            os.chmod(tmp, 0o755)  # mkdtemp crée en 0700
+            if directory.exists():
+                shutil.rmtree(directory)
+            os.replace(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Ensemble compilé ; tableaux en lecture seule mappés en mémoire"""
+        directory = Path(directory)
+        with open(directory / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != COMPILED_FORMAT:
+            raise ValueError(f"Format de modèle compilé inattendu : {meta.get('format')}")
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+            for name in cls.ARRAYS
+        }
+        return cls(arrays, meta)
+
+    # ------------------------------------------------------------------
+    # Prédiction
+    # ------------------------------------------------------------------
+
+    def encode(self, data):
+        """
+        Matrice float64 (n, n_features) dans l'ordre du modèle. Les colonnes
+        catégorielles (texte ou category) sont codées comme LightGBM le fait
+        avec pandas_categorical : index dans la liste d'entraînement, NaN sinon.
+        """
+        if not isinstance(data, pd.DataFrame):
+            return np.asarray(data, dtype=np.float64)
+
+        X = np.empty((len(data), len(self.feature_names)), dtype=np.float64)
+        for j, name in enumerate(self.feature_names):
+            column = data[name]
+            if j in self.categorical_features:
+                k = self.categorical_features.index(j)
+                if k < len(self._category_index) and not pd.api.types.is_numeric_dtype(column):
+                    index = self._category_index[k]
+                    X[:, j] = [index.get(v, np.nan) for v in column.astype(object)]
+                    continue
+            X[:, j] = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+        return X
+
+    def predict(self, data):
+        """
+        Comme Booster.predict : somme des feuilles atteintes (régression),
+        ou probabilités (n, num_class) après softmax (multiclass, l'arbre t
+        appartenant à la classe t % num_class).
+        """
+        X = self.encode(data)
+        out = np.zeros((len(X), self.num_class))
+        for start in range(0, len(X), self.ROW_CHUNK):
+            out[start:start + self.ROW_CHUNK] = self._predict_rows(X[start:start + self.ROW_CHUNK])
+        if self.num_class == 1:
+            return out[:, 0]
+        out = np.exp(out - out.max(axis=1, keepdims=True))
+        return out / out.sum(axis=1, keepdims=True)
+
+    def _predict_rows(self, X):
+        """
+        Parcours niveau par niveau de la matrice (lignes, arbres) sans masque :
+        les feuilles bouclent sur elles-mêmes, max_depth itérations suffisent.
+        Seules les cases numériques manquantes passent par le cas général.
+        """
+        n = len(X)
+        numeric = [j for j in range(X.shape[1]) if j not in self.categorical_features]
+        check_missing = self._any_zero_missing or np.isnan(X[:, numeric]).any()
+        Xt = np.concatenate([X.T.ravel(), self._virtual_columns(X).ravel()])
+        feature_offset = self._eval_feature * n
+
+        node = np.broadcast_to(self.root, (n, self.num_trees)).copy()
+        rows = np.arange(n, dtype=np.int64)[:, None]
+        for _ in range(self.max_depth):
+            x = Xt[feature_offset[node] + rows]
+            go_right = x > self._eval_threshold[node]
+
+            if check_missing:
+                special = self._numerical[node] & (np.isnan(x) | (np.abs(x) <= K_ZERO_THRESHOLD))
+                if special.any():
+                    nd = node[special]
+                    go_right[special] = ~self._numerical_left(x[special], nd, self.decision_type[nd])
+
+            node = self.left_child[node] + go_right
+
+        leaves = self.leaf_value[node]
+        return leaves.reshape(n, -1, self.num_class).sum(axis=1)
+
+    def _virtual_columns(self, X):
+        """(n_bitsets, n) : 1 si la catégorie de la ligne part à droite"""
+        n_codes = self._virtual_right.shape[1] - 1
+        x = X[:, self._virtual_feature].T
+        valid = ~np.isnan(x) & (x >= 0) & (x < n_codes)
+        code = np.where(valid, x, n_codes).astype(np.int64)  # n_codes = à droite
+        return np.take_along_axis(self._virtual_right, code, axis=1)
+
+    def _numerical_left(self, x, nd, decision):
+        missing_type = (decision >> 2) & 3
+        x = np.where(np.isnan(x) & (missing_type != MISSING_NAN), 0.0, x)
+        is_missing = (
+            ((missing_type == MISSING_ZERO) & (np.abs(x) <= K_ZERO_THRESHOLD)) |
+            ((missing_type == MISSING_NAN) & np.isnan(x))
+        )
+        default_left = (decision & DEFAULT_LEFT_MASK) != 0
+        with np.errstate(invalid="ignore"):
+            return np.where(is_missing, default_left, x <= self.threshold[nd])
+
+    def _categorical_left(self, x, nd):
+        valid = ~np.isnan(x) & (x >= 0)
+        category = np.where(valid, x, 0).astype(np.int64)
+        word = category // 32
+        in_range = valid & (word < self.cat_len[nd])
+        bits = self.cat_bits[self.cat_start[nd] + np.where(in_range, word, 0)]
+        return in_range & (((bits >> (category % 32).astype(np.uint32)) & 1) == 1)
+
+
+def compiled_path(text_path):
+    """Dossier de la forme compilée d'un dump texte (models/x.txt → models/x.npmodel)"""
+    return Path(text_path).with_suffix(COMPILED_SUFFIX)
+
+
+def cached_compiled_path(text_path, cache_dir=COMPILED_CACHE):
+    """Forme compilée à la demande, hors de models/ (models/x.txt → <cache>/x.npmodel)"""
+    return Path(cache_dir) / Path(text_path).with_suffix(COMPILED_SUFFIX).name
+
+
+def load_model(text_path, cache_dir=COMPILED_CACHE):
+    """
+    Modèle prêt à prédire : forme compilée si elle a été construite à partir
+    de ce dump texte (même hash), à côté du dump (build_models.py) ou dans
+    le cache ; sinon conversion du texte, compilée dans le cache pour les
+    démarrages suivants (ignoré si le dossier n'est pas inscriptible).
+    """
+    source_hash = content_hash(text_path)
+    cached = cached_compiled_path(text_path, cache_dir)
+    for compiled in (compiled_path(text_path), cached):
+        try:
+            model = TreeEnsemble.load(compiled)
+            if model.meta.get("source_sha256") == source_hash:
+                return model
+        except (OSError, ValueError, KeyError):
+            pass  # Absente, incomplète ou d'un autre format
+    model = TreeEnsemble.from_lightgbm_text(text_path)
+    try:
+        model.save(cached)
+    except OSError:
+        pass  # Système de fichiers en lecture seule : le texte sera reparsé
+    return model
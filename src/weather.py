@@ -0,0 +1,329 @@
+"""
+Météo rangée en cube (grille x jour) pour les calculs vectorisés.
+
+Reproduit `get_meteo_agg` (lissage inverse-distance sur les N grilles les
+plus proches) pour tous les itinéraires d'un coup au lieu d'un masque
+pandas par itinéraire et par grille.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DAILY_COLUMNS = {
+    "mean_temp": ("temperature_2m", "mean"),
+    "max_wind": ("wind_speed_10m", "max"),
+    "total_snow": ("snowfall", "sum"),
+    "total_precip": ("precipitation", "sum"),
+}
+
+HOURLY_COLUMNS = ["temperature_2m", "snowfall", "wind_speed_10m"]
+
+PHYSICAL_FEATURES = [
+    "temp_min_7d_avg", "temp_max_7d_avg", "temp_amp_7d_avg",
+    "snowfall_7d_sum", "wind_max_7d", "freeze_thaw_cycles_7d",
+]
+
+# Valeurs renvoyées quand aucune grille n'a de données
+METEO_DEFAULTS = {
+    "mean_temp": 0.0,
+    "max_wind": 10.0,
+    "total_snow": 0.0,
+    "total_precip": 0.0,
+}
+
+
+class WeatherCube:
+    """
+    Agrégats météo journaliers par point de grille.
+
+    Attributs :
+        grid_lat, grid_lon : coordonnées des points (ordre de première apparition)
+        dates              : jours couverts (datetime.date, triés)
+        daily[var]         : tableau (n_grid, n_days), NaN si pas de données
+        rows               : int (n_grid, n_days), lignes horaires par grille et jour
+        has_data           : bool (n_grid, n_days), au moins une ligne horaire
+        times, hourly[var] : pas horaires triés et tableaux (n_grid, n_times)
+        hourly_present     : bool (n_grid, n_times), ligne présente dans le parquet
+    """
+
+    def __init__(self, df_meteo):
+        grids = (
+            df_meteo[["latitude", "longitude"]]
+            .dropna()
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+        self.grid_lat = grids["latitude"].to_numpy(dtype=float)
+        self.grid_lon = grids["longitude"].to_numpy(dtype=float)
+        self.n_grid = len(grids)
+
+        grid_id = pd.MultiIndex.from_frame(grids).get_indexer(
+            pd.MultiIndex.from_frame(df_meteo[["latitude", "longitude"]])
+        )
+        day = df_meteo["time"].dt.date
+        self.dates = sorted(day.dropna().unique())
+        self._date_pos = {d: i for i, d in enumerate(self.dates)}
+        n_days = len(self.dates)
+
+        valid = (grid_id >= 0) & day.notna().to_numpy()
+        keyed = df_meteo.loc[valid, [c for c, _ in DAILY_COLUMNS.values()]].copy()
+        keyed["_grid"] = grid_id[valid]
+        keyed["_day"] = day[valid].map(self._date_pos).to_numpy()
+
+        agg = keyed.groupby(["_grid", "_day"]).agg(
+            **{name: spec for name, spec in DAILY_COLUMNS.items()},
+            _rows=("_grid", "size"),
+        )
+        gi = agg.index.get_level_values("_grid").to_numpy()
+        di = agg.index.get_level_values("_day").to_numpy()
+
+        self.daily = {}
+        for name in DAILY_COLUMNS:
+            arr = np.full((self.n_grid, n_days), np.nan)
+            arr[gi, di] = agg[name].to_numpy(dtype=float)
+            self.daily[name] = arr
+        self.rows = np.zeros((self.n_grid, n_days), dtype=np.int32)
+        self.rows[gi, di] = agg["_rows"].to_numpy()
+        self.has_data = self.rows > 0
+
+        # --- Cube horaire (features physiques sur 7 jours) ---
+        times = df_meteo["time"]
+        valid_t = valid & times.notna().to_numpy()
+        self.times = np.sort(times[valid_t].unique())
+        ti = np.searchsorted(self.times, times[valid_t].to_numpy())
+        gt = grid_id[valid_t]
+        self.hourly = {}
+        for col in HOURLY_COLUMNS:
+            arr = np.full((self.n_grid, len(self.times)), np.nan)
+            arr[gt, ti] = df_meteo.loc[valid_t, col].to_numpy(dtype=float)
+            self.hourly[col] = arr
+        self.hourly_present = np.zeros((self.n_grid, len(self.times)), dtype=bool)
+        self.hourly_present[gt, ti] = True
+
+    # ------------------------------------------------------------------
+    # Mode budget mémoire (cf. memory.apply_budget)
+    # ------------------------------------------------------------------
+
+    def trim_hourly(self, start_date):
+        """
+        Ne garde (en place) que les pas horaires postérieurs à `start_date`
+        à minuit : les fenêtres 7 jours des dates ultérieures sont intactes,
+        celles des dates antérieures deviennent vides. Cube journalier inchangé.
+        """
+        keep = self.times > np.datetime64(pd.Timestamp(start_date))
+        if keep.all():
+            return
+        self.times = self.times[keep]
+        self.hourly = {col: np.ascontiguousarray(arr[:, keep]) for col, arr in self.hourly.items()}
+        self.hourly_present = np.ascontiguousarray(self.hourly_present[:, keep])
+
+    def narrow(self, dtype=np.float32):
+        """Convertit (en place) les tableaux météo journaliers et horaires en `dtype`"""
+        self.daily = {name: arr.astype(dtype, copy=False) for name, arr in self.daily.items()}
+        self.hourly = {col: arr.astype(dtype, copy=False) for col, arr in self.hourly.items()}
+
+    # ------------------------------------------------------------------
+    # Voisinage itinéraire → grilles
+    # ------------------------------------------------------------------
+
+    def nearest_grids(self, lat, lon, k=5, chunk=4096):
+        """
+        Indices et distances (degrés) des k grilles les plus proches de
+        chaque point, dans l'ordre de `np.argsort` (comme get_meteo_agg).
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        k = min(k, self.n_grid)
+        idx = np.empty((len(lat), k), dtype=np.int64)
+        dist = np.empty((len(lat), k))
+        for start in range(0, len(lat), chunk):
+            sl = slice(start, start + chunk)
+            d = np.sqrt(
+                (self.grid_lat[None, :] - lat[sl, None]) ** 2 +
+                (self.grid_lon[None, :] - lon[sl, None]) ** 2
+            )
+            order = np.argsort(d, axis=1)[:, :k]
+            idx[sl] = order
+            dist[sl] = np.take_along_axis(d, order, axis=1)
+        return idx, dist
+
+    # ------------------------------------------------------------------
+    # Météo du jour
+    # ------------------------------------------------------------------
+
+    def day_index(self, target_date):
+        """
+        Colonne jour à utiliser pour chaque grille : le jour demandé s'il a
+        des données, sinon le jour disponible le plus proche (le plus ancien
+        en cas d'égalité). -1 si la grille n'a aucune donnée.
+        """
+        n_days = len(self.dates)
+        if n_days == 0:
+            return np.full(self.n_grid, -1)
+        offsets = np.array([(d - target_date).days for d in self.dates])
+        gap = np.where(self.has_data, np.abs(offsets)[None, :], np.iinfo(np.int64).max)
+        best = np.argmin(gap, axis=1)
+        best[~self.has_data.any(axis=1)] = -1
+        return best
+
+    def route_meteo(self, neighbor_idx, neighbor_dist, target_date, n_neighbors=3):
+        """
+        Équivalent vectorisé de get_meteo_agg pour tous les itinéraires.
+
+        Args:
+            neighbor_idx, neighbor_dist : sortie de nearest_grids
+            target_date                 : datetime.date
+            n_neighbors                 : grilles moyennées (3 comme get_meteo_agg)
+
+        Returns:
+            dict de tableaux (n_routes,) : mean_temp, max_wind, total_snow,
+            total_precip, data_available, distance_km
+        """
+        idx = neighbor_idx[:, :n_neighbors]
+        dist = neighbor_dist[:, :n_neighbors]
+
+        day = self.day_index(target_date)[idx]
+        available = day >= 0
+        day_safe = np.where(available, day, 0)
+
+        weights = np.where(available, 1.0 / (dist + 0.01), 0.0)
+        total = weights.sum(axis=1)
+        any_data = total > 0
+        weights = weights / np.where(any_data, total, 1.0)[:, None]
+
+        out = {}
+        for name in ("mean_temp", "total_snow", "total_precip"):
+            values = np.where(available, self.daily[name][idx, day_safe], 0.0)
+            out[name] = np.where(any_data, (values * weights).sum(axis=1), METEO_DEFAULTS[name])
+
+        wind = np.where(available, self.daily["max_wind"][idx, day_safe], -np.inf)
+        out["max_wind"] = np.where(any_data, wind.max(axis=1), METEO_DEFAULTS["max_wind"])
+
+        out["data_available"] = any_data
+        out["distance_km"] = dist[:, 0]
+        return out
+
+    def day_summary(self, grid_mask=None):
+        """
+        Résumé journalier d'une zone (toutes les grilles par défaut), avec
+        les mêmes agrégats que l'en-tête de l'app : moyenne des lignes
+        horaires pour neige, température et précipitations, max du vent.
+
+        Returns:
+            dict de tableaux (n_days,), NaN les jours sans données
+        """
+        if grid_mask is None:
+            grid_mask = np.ones(self.n_grid, dtype=bool)
+        rows = self.rows[grid_mask]
+        n_rows = rows.sum(axis=0)
+        has_rows = n_rows > 0
+        safe_rows = np.where(has_rows, n_rows, 1)
+
+        # Sommes journalières → moyenne des lignes horaires de la zone
+        sums = {
+            name: np.where(rows > 0, self.daily[name][grid_mask], 0.0)
+            for name in ("total_snow", "total_precip")
+        }
+        sums["mean_temp"] = np.where(rows > 0, self.daily["mean_temp"][grid_mask] * rows, 0.0)
+
+        summary = {
+            name: np.where(has_rows, values.sum(axis=0) / safe_rows, np.nan)
+            for name, values in sums.items()
+        }
+        wind = np.where(rows > 0, self.daily["max_wind"][grid_mask], -np.inf)
+        summary["max_wind"] = np.where(has_rows, wind.max(axis=0, initial=-np.inf), np.nan)
+        return summary
+
+    # ------------------------------------------------------------------
+    # Features physiques (7 jours glissants)
+    # ------------------------------------------------------------------
+
+    def grid_window_features(self, target_date, days=7):
+        """
+        Features de chaque grille sur la fenêtre ]target - 7j, target]
+        (même fenêtre que get_physical_features).
+
+        Returns:
+            (dict de tableaux (n_grid,), bool (n_grid,) fenêtre non vide)
+        """
+        end = np.datetime64(pd.Timestamp(target_date))
+        start = end - np.timedelta64(days, "D")
+        cols = (self.times > start) & (self.times <= end)
+
+        present = self.hourly_present[:, cols]
+        has_window = present.any(axis=1)
+        if not cols.any():
+            empty = np.full(self.n_grid, np.nan)
+            t_min, t_max, wind_max, snow = empty, empty, empty, np.zeros(self.n_grid)
+        else:
+            temp = self.hourly["temperature_2m"][:, cols]
+            with warnings.catch_warnings():
+                # Grilles sans données sur la fenêtre : NaN, écartées par has_window
+                warnings.simplefilter("ignore", RuntimeWarning)
+                t_min = np.nanmin(temp, axis=1)
+                t_max = np.nanmax(temp, axis=1)
+                wind_max = np.nanmax(self.hourly["wind_speed_10m"][:, cols], axis=1)
+            snow = np.nansum(self.hourly["snowfall"][:, cols], axis=1)
+
+        features = {
+            "temp_min_7d_avg": t_min,
+            "temp_max_7d_avg": t_max,
+            "temp_amp_7d_avg": t_max - t_min,
+            "snowfall_7d_sum": snow,
+            "wind_max_7d": wind_max,
+            # Héritage get_physical_features : 1 si la fenêtre passe par 0°C, sinon 0
+            "freeze_thaw_cycles_7d": ((t_max > 0) & (t_min < 0)).astype(float),
+        }
+        return features, has_window
+
+    def route_physical_features(self, neighbor_idx, neighbor_dist, target_date, n_neighbors=5):
+        """
+        Équivalent vectorisé de get_physical_features (lissage inverse-distance
+        sur les N grilles, max pour le vent, arrondi pour les cycles gel/dégel).
+
+        Returns:
+            (dict de tableaux (n_routes,), bool (n_routes,) données disponibles)
+        """
+        grid_features, has_window = self.grid_window_features(target_date)
+        return smooth_route_features(grid_features, has_window, neighbor_idx,
+                                     neighbor_dist, n_neighbors)
+
+
+# Features lissées par max (vent, prudence) ou arrondies (comptes) plutôt que moyennées
+SMOOTH_MAX = {"wind_max_7d"}
+SMOOTH_ROUND = {"freeze_thaw_cycles_7d"}
+
+
+def smooth_route_features(grid_features, has_window, neighbor_idx, neighbor_dist,
+                          n_neighbors=5, max_features=SMOOTH_MAX, round_features=SMOOTH_ROUND):
+    """
+    Lissage inverse-distance des features de grille sur les N grilles
+    voisines de chaque itinéraire (règles de get_physical_features).
+    Les tableaux de grille sont (n_grid,) pour une date ou (n_grid, n_dates)
+    pour une saison (cf. backfill.py) : la sortie garde l'axe des dates.
+
+    Returns:
+        (dict de tableaux (n_routes[, n_dates]), bool données disponibles)
+    """
+    idx = neighbor_idx[:, :n_neighbors]
+    available = has_window[idx]
+    dist = neighbor_dist[:, :n_neighbors]
+    dist = dist.reshape(dist.shape + (1,) * (available.ndim - 2))
+    weights = np.where(available, 1.0 / (dist + 0.01), 0.0)
+    total = weights.sum(axis=1)
+    any_data = total > 0
+    weights = weights / np.expand_dims(np.where(any_data, total, 1.0), 1)
+
+    out = {}
+    for name, values in grid_features.items():
+        values = values[idx]
+        if name in max_features:
+            out[name] = np.where(available, values, -np.inf).max(axis=1)
+        elif name in round_features:
+            smoothed = (np.where(available, values, 0.0) * weights).sum(axis=1)
+            out[name] = np.rint(smoothed).astype(int)
+        else:
+            out[name] = (np.where(available, values, 0.0) * weights).sum(axis=1)
+    return out, any_data